@@ -0,0 +1,98 @@
+"""Benchmark for encoding messages end-to-end, i.e. rendering the texts and building the data written to the device.
+
+The messages are those of the usbmon captures in doc/. Before measuring, the output is checked to be byte-for-byte
+the same as the data the vendor software has sent to the badge (see tests/usbmon_capture.py).
+
+Run from the repository root:
+    $ python3 benchmarks/bench_encode.py
+"""
+import os
+import sys
+import timeit
+from array import array
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tests'))
+
+from lednamebadge import SimpleTextAndIcons, BadgeProtocol, LedNameBadge, RenderCache
+import usbmon_capture
+
+
+def legacy_header(lengths, speeds, modes, blinks, ants, brightness=100, date=None):
+    """The header creation of v0.14: a list from a template, filled in value by value."""
+    date = date or datetime.now()
+    ants = LedNameBadge._prepare_iterable(ants, 0, 1)
+    blinks = LedNameBadge._prepare_iterable(blinks, 0, 1)
+    speeds = [x - 1 for x in LedNameBadge._prepare_iterable(speeds, 1, 8)]
+    modes = LedNameBadge._prepare_iterable(modes, 0, 8)
+    h = [0x77, 0x61, 0x6e, 0x67] + [0x00] * 60
+    if brightness <= 25:
+        h[5] = 0x40
+    elif brightness <= 50:
+        h[5] = 0x20
+    elif brightness <= 75:
+        h[5] = 0x10
+    for i in range(8):
+        h[6] += blinks[i] << i
+        h[7] += ants[i] << i
+    for i in range(8):
+        h[8 + i] = 16 * speeds[i] + modes[i]
+    for i in range(len(lengths)):
+        h[17 + (2 * i) - 1] = lengths[i] // 256
+        h[17 + (2 * i)] = lengths[i] % 256
+    h[38:44] = [date.year % 100, date.month, date.day, date.hour, date.minute, date.second]
+    return h
+
+
+def render(creator, capture):
+    return [creator.bitmap_text(m) for m in usbmon_capture.renderable_messages(capture)]
+
+
+def legacy_encode(bitmaps, capture):
+    _, _, speeds, modes, blinks, ants, brightness = capture
+    buf = array('B')
+    buf.extend(legacy_header([b[1] for b in bitmaps], speeds, modes, blinks, ants, brightness))
+    for b in bitmaps:
+        buf.extend(b[0])
+    if len(buf) % 64:
+        buf.extend([0] * (64 - len(buf) % 64))
+    return buf
+
+
+def current_encode(bitmaps, capture):
+    _, _, speeds, modes, blinks, ants, brightness = capture
+    return BadgeProtocol.encode(bitmaps, speeds, modes, blinks, ants, brightness)
+
+
+def transfers_per_second(func, number=500):
+    captures = usbmon_capture.GOLDEN_CAPTURES
+    seconds = min(timeit.repeat(lambda: [func(c) for c in captures], number=number, repeat=5))
+    return number * len(captures) / seconds
+
+
+def bench_encode():
+    creator = SimpleTextAndIcons()
+    for capture in usbmon_capture.GOLDEN_CAPTURES:
+        expected, actual = usbmon_capture.encode_golden(capture, creator)
+        assert expected == actual, capture[0]
+    rendered = {c[0]: render(creator, c) for c in usbmon_capture.GOLDEN_CAPTURES}
+    before = transfers_per_second(lambda c: legacy_encode(rendered[c[0]], c))
+    after = transfers_per_second(lambda c: current_encode(rendered[c[0]], c))
+    print("encode only: %9.0f transfers/s before, %9.0f transfers/s after (x%.2f)" % (before, after, after / before))
+    before = transfers_per_second(lambda c: legacy_encode(render(creator, c), c))
+    after = transfers_per_second(lambda c: current_encode(render(creator, c), c))
+    print("end-to-end:  %9.0f transfers/s before, %9.0f transfers/s after (x%.2f)" % (before, after, after / before))
+    cache = RenderCache()
+    saved_cache = SimpleTextAndIcons.render_cache
+    SimpleTextAndIcons.render_cache = cache
+    try:
+        cached = transfers_per_second(lambda c: current_encode(render(creator, c), c))
+    finally:
+        SimpleTextAndIcons.render_cache = saved_cache
+    print("end-to-end:  %9.0f transfers/s with render cache (x%.2f), %d hits, %d misses" % (
+        cached, cached / before, cache.hits, cache.misses))
+
+
+if __name__ == '__main__':
+    bench_encode()
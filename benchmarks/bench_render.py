@@ -0,0 +1,101 @@
+"""Micro benchmarks for rendering text to bitmap data.
+
+Run from the repository root:
+    $ python3 benchmarks/bench_render.py
+"""
+import os
+import re
+import sys
+import timeit
+from array import array
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from lednamebadge import SimpleTextAndIcons, RenderCache
+
+MESSAGES = ["OPEN", "I:HEART2:you", ":happy: Welcome to the FabLab! :bicycle:", "Jürgen Weigert - Schichtleitung",
+            "The quick brown fox jumps over the lazy dog 0987654321"]
+
+
+class LegacyTextRenderer:
+    """The text rendering of v0.14: font as a tuple of ints, glyphs appended one by one."""
+    font = tuple(SimpleTextAndIcons.font_11x44)
+    named = {k: (tuple(v[0]), v[1], v[2]) for k, v in SimpleTextAndIcons.bitmap_named.items()}
+    builtin = {v[2]: v for v in named.values()}
+
+    def bitmap_char(self, ch):
+        if ord(ch) < 32:
+            return self.builtin[ch][:2]
+        o = SimpleTextAndIcons.char_offsets[ch]
+        return self.font[o:o + 11], 1
+
+    def bitmap_text(self, text):
+        def replace_symbolic(m):
+            name = m.group(1)
+            if name == '':
+                return ':'
+            return self.named[name][2]
+
+        text = re.sub(r':([^:]*):', replace_symbolic, text)
+        buf = array('B')
+        cols = 0
+        for c in text:
+            (b, n) = self.bitmap_char(c)
+            buf.extend(b)
+            cols += n
+        return buf, cols
+
+
+def strings_per_second(func, number=2000):
+    seconds = min(timeit.repeat(lambda: [func(m) for m in MESSAGES], number=number, repeat=5))
+    return number * len(MESSAGES) / seconds
+
+
+def bench_bitmap_text():
+    legacy = LegacyTextRenderer()
+    current = SimpleTextAndIcons()
+    for m in MESSAGES:
+        assert legacy.bitmap_text(m) == current.bitmap_text(m), m
+    before = strings_per_second(legacy.bitmap_text)
+    after = strings_per_second(current.bitmap_text)
+    print("bitmap_text: %10.0f strings/s before, %10.0f strings/s after (x%.2f)" % (before, after, after / before))
+
+
+def bench_render_cache():
+    creator = SimpleTextAndIcons()
+    before = strings_per_second(creator.bitmap_text)
+    SimpleTextAndIcons.render_cache = RenderCache()
+    try:
+        after = strings_per_second(creator.bitmap_text)
+    finally:
+        SimpleTextAndIcons.render_cache = None
+    print("render_cache: %9.0f strings/s uncached, %9.0f strings/s cached (x%.2f)" % (before, after, after / before))
+
+
+def bench_render_many(count=5000):
+    texts = ["%s %s :heart: #%d" % (MESSAGES[i % len(MESSAGES)], "Attendee", i) for i in range(count)]
+    creator = SimpleTextAndIcons()
+    assert creator.render_many(texts) == [creator.bitmap_text(t) for t in texts]
+    before = min(timeit.repeat(lambda: [creator.bitmap_text(t) for t in texts], number=1, repeat=5))
+    after = min(timeit.repeat(lambda: creator.render_many(texts), number=1, repeat=5))
+    print("render_many: %d strings in %.1f ms one by one, %.1f ms batched (x%.2f)" % (
+        count, before * 1000, after * 1000, before / after))
+
+
+def bench_proportional():
+    fixed = SimpleTextAndIcons()
+    proportional = SimpleTextAndIcons(proportional=True)
+    for m in MESSAGES + ["ABCDEFGHIJKLMNOPQRSTUVWXYZ abcdefghijklmnopqrstuvwxyz 0987654321 .,;:!?-"]:
+        b1 = len(fixed.bitmap(m)[0])
+        b2 = len(proportional.bitmap(m)[0])
+        # 64 bytes header, whole program padded to 64-byte chunks
+        c1 = (64 + b1 + 63) // 64
+        c2 = (64 + b2 + 63) // 64
+        print("proportional: %5d -> %5d bytes (%3d%%), %3d -> %3d chunks: %s" % (b1, b2, 100 * b2 // b1, c1, c2, m))
+
+
+if __name__ == '__main__':
+    bench_bitmap_text()
+    bench_render_cache()
+    bench_render_many()
+    bench_proportional()
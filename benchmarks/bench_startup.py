@@ -0,0 +1,99 @@
+"""Benchmark for the startup time of the command line entry points.
+
+Every upload by a shell script or cron job starts a new python process, so import and initialization are paid each
+time. This measures the wall clock time of complete processes, cold (without byte code cache of lednamebadge, i.e.
+the first run after an installation or update) and warm (with byte code cache), and the slowest imports from
+python -X importtime.
+
+The budget applies to the warm runs of commands not touching USB and includes the startup of the interpreter
+itself, which is printed for comparison. -M list loads the USB packages and enumerates the devices, so it is only
+reported, as is running lednamebadge.py directly: python never caches the byte code of the script it is started
+with, so it is compiled on every run.
+
+Run from the repository root:
+    $ python3 benchmarks/bench_startup.py
+"""
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+FILES = ('lednamebadge.py', 'led-badge-11x44.py', 'led-badge-12x48.py')
+BUDGET = 0.050
+
+RENDER = ('import lednamebadge as l; '
+          'l.BadgeProtocol.encode([l.SimpleTextAndIcons().bitmap("Hello :HEART2: world")], [4], [0], [0], [0])')
+
+COMMANDS = (
+    # (name, arguments, within budget)
+    ('python -c pass', ['-c', 'pass'], False),
+    ('led-badge-11x44.py --list-names', ['led-badge-11x44.py', '--list-names'], True),
+    ('led-badge-12x48.py --list-names', ['led-badge-12x48.py', '--list-names'], True),
+    ('python -m lednamebadge --list-names', ['-m', 'lednamebadge', '--list-names'], True),
+    ('lednamebadge.py --list-names', ['lednamebadge.py', '--list-names'], False),
+    ('render and encode', ['-c', RENDER], True),
+    ('led-badge-11x44.py -M list', ['led-badge-11x44.py', '-M', 'list', 'x'], False),
+)
+
+
+def python_env():
+    env = dict(os.environ)
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    env.pop('PYTHONPYCACHEPREFIX', None)
+    return env
+
+
+def run(args, directory):
+    start = time.perf_counter()
+    subprocess.run([sys.executable] + args, cwd=directory, env=python_env(), stdout=subprocess.DEVNULL,
+                   stderr=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def bench_commands(repeat=10):
+    over = []
+    for name, args, budgeted in COMMANDS:
+        cold = []
+        warm = []
+        for i in range(repeat):
+            directory = tempfile.mkdtemp()
+            try:
+                for file in FILES:
+                    shutil.copy(os.path.join(ROOT, file), directory)
+                cold.append(run(args, directory))
+                warm.append(run(args, directory))
+            finally:
+                shutil.rmtree(directory)
+        status = ''
+        if budgeted:
+            status = 'ok' if min(warm) < BUDGET else 'OVER BUDGET'
+            if min(warm) >= BUDGET:
+                over.append(name)
+        print("%-38s cold %6.1f ms, warm %6.1f ms  %s" % (name, min(cold) * 1e3, min(warm) * 1e3, status))
+    return over
+
+
+def bench_importtime(count=12):
+    env = python_env()
+    subprocess.run([sys.executable, '-c', 'import lednamebadge'], cwd=ROOT, env=env)
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import lednamebadge'], cwd=ROOT, env=env,
+                            stderr=subprocess.PIPE, universal_newlines=True)
+    imports = []
+    for line in result.stderr.splitlines():
+        fields = line.split('|')
+        if len(fields) == 3 and fields[1].strip().isdigit():
+            imports.append((int(fields[1]), int(fields[0].split(':')[1]), fields[2].rstrip()))
+    print("\nimport lednamebadge, slowest imports (cumulative / self in us):")
+    for cumulative, own, name in sorted(imports, reverse=True)[:count]:
+        print("%8d %8d %s" % (cumulative, own, name))
+
+
+if __name__ == '__main__':
+    over_budget = bench_commands()
+    bench_importtime()
+    if over_budget:
+        print("\nOver the budget of %d ms: %s" % (BUDGET * 1e3, ', '.join(over_budget)))
+        sys.exit(1)
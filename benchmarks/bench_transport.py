@@ -0,0 +1,82 @@
+"""Benchmark for splitting the data of an upload into the packets sent to the device, without a device.
+
+Compares the chunking of v0.14 (a slice copy per chunk, a new report array per chunk for hidapi) with
+WriteMethod._write_chunks() and counts the packet buffers allocated per upload.
+
+Run from the repository root:
+    $ python3 benchmarks/bench_transport.py
+"""
+import os
+import sys
+import timeit
+from array import array
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from lednamebadge import WriteMethod
+
+
+def send(packet):
+    return len(packet)
+
+
+def legacy_libusb(buf):
+    for i in range(int(len(buf) / 64)):
+        send(buf[i * 64:i * 64 + 64])
+
+
+def legacy_hidapi(buf):
+    for i in range(int(len(buf) / 64)):
+        sendbuf = array('B', [0])
+        sendbuf.extend(buf[i * 64:i * 64 + 64])
+        send(sendbuf)
+
+
+class NullWriteMethod(WriteMethod):
+    def __init__(self, report_id):
+        WriteMethod.__init__(self)
+        self.report_id = report_id
+
+    def close(self):
+        pass
+
+    def _send_packet(self, packet):
+        return send(packet)
+
+
+def packet_buffers(func, buf):
+    """Returns the number of buffers allocated by func for the packets sent, i.e. packets not being views into buf.
+    The slices copied into the report arrays of v0.14 are not even counted.
+    """
+    global send
+    packets = []
+    original = send
+
+    def counting_send(packet):
+        if not (isinstance(packet, memoryview) and packet.obj is buf):
+            packets.append(packet)
+        return len(packet)
+
+    send = counting_send
+    try:
+        func(buf)
+    finally:
+        send = original
+    return len(set([id(p) for p in packets]))
+
+
+def bench_transport(size=8192):
+    buf = array('B', range(256)) * (size // 256)
+    for name, legacy, report_id in (('libusb', legacy_libusb, None), ('hidapi', legacy_hidapi, 0)):
+        method = NullWriteMethod(report_id)
+        current = lambda b: method._write_chunks(b)
+        before = min(timeit.repeat(lambda: legacy(buf), number=1000, repeat=5)) / 1000
+        after = min(timeit.repeat(lambda: current(buf), number=1000, repeat=5)) / 1000
+        print("%s: %d bytes, %6.1f us before, %6.1f us after (x%.2f)" % (name, size, before * 1e6, after * 1e6,
+                                                                          before / after))
+        print("%s: %d packet buffers allocated per upload before, %d after" % (
+            name, packet_buffers(legacy, buf), packet_buffers(current, buf)))
+
+
+if __name__ == '__main__':
+    bench_transport()
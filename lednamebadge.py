@@ -85,22 +85,151 @@
 #     * Preparation for further or updated write methods, like bluetooth.
 #     * Automatic or manual write method and device selection, See -M and -D (substituting -H) resp.
 #       get_available_methods() and get_available_device_ids().
+# v0.15, 2026-10-17, performance work.
+#     * Images are converted in bulk (numpy, if installed, otherwise via PIL), instead of pixel by pixel.
+#     * Optional persistent cache for decoded images, see --cache-dir resp. SimpleTextAndIcons.image_cache.
+#     * Font and builtin icons are stored as bytes, text is rendered with zero-copy views into them.
+#     * Optional LRU cache for rendered texts, see SimpleTextAndIcons.render_cache. Texts referencing image files
+#       hit it as well, without loading the files again.
+#     * SimpleTextAndIcons.render_many() for rendering thousands of texts at once.
+#     * Framebuffer for pixel level work on bitmaps (blit, shift, invert, crop).
+#     * Proportional text rendering (option --proportional), narrow chars take less space.
+#     * Chars missing in the builtin font are taken from a TrueType or BDF font file (option --font).
+#     * DisplayGeometry for 11x44, 12x48 and 11x55 badges, used by rendering, header and write.
+#     * BadgeProtocol: encoder and decoder of the complete data written to the device.
+#     * libusb: write pacing derived from the endpoint and calibrated per device instead of a fixed 100 ms per
+#       chunk, see --pacing. The effective transfer rate is reported.
+#     * Common chunked transport for all write methods without copying the data per chunk, see
+#       WriteMethod._write_chunks().
+#     * BadgeSession keeps a device open for many uploads.
+#     * Devices are enumerated once per call, all write methods concurrently, see DeviceRegistry. Listing devices
+#       with libusb does not configure them anymore.
+#     * HotplugWatcher keeps a table of the connected devices up to date for long running processes. With it, the
+#       devices are enumerated again only after a device was added or removed.
+#     * Write method 'hidraw' for Linux, without any additional package or library.
+#     * The python packages of the write methods are loaded on first use. Additional write methods can be registered
+#       with WriteMethodRegistry, also by other packages via entry points.
+#     * Option -D all resp. device_id 'all' writes to all devices found concurrently and reports the result per
+#       device, see MultiDeviceWriter. With option --sync, all devices start showing the messages at the same time.
+#     * asyncio API in lednamebadge_async, see there. WriteMethod.write_steps() yields the pauses between packets,
+#       so they are waited for in the event loop without holding a thread.
+#     * Option --serve runs a daemon, which owns the devices and writes the messages requested by other programs via
+#       a Unix socket or HTTP, see BadgeDaemon. Requests for the same device are coalesced.
+#       Waiting for a request and for a locked device is bounded. HTTP requests must be sent as application/json
+#       and from a local origin, so web pages cannot write to the badges.
+#     * Writing to a device is locked across processes, so two programs do not write to the same device at the same
+#       time. See option --lock-timeout resp. DeviceLock.
+#     * Uploads of unchanged data are skipped, the last data written is remembered per device. See option --force
+#       resp. ContentStateStore.
+#     * Faster startup: modules only needed for the command line, the caches or the devices are imported on first use.
 
 
-import argparse
 import os
 import re
+import struct
 import sys
+import threading
 import time
 from array import array
+from collections import OrderedDict
 from datetime import datetime
 
 
-__version = "0.14"
+__version = "0.15"
+
+_numpy = False
+
+
+def _optional_numpy():
+    """Returns the numpy module or None, if it is not installed. numpy is only used to speed things up, there is
+    always a pure python fallback.
+    """
+    global _numpy
+    if _numpy is False:
+        try:
+            import numpy
+            _numpy = numpy
+        except ImportError:
+            _numpy = None
+    return _numpy
+
+
+def _user_cache_dir(*parts):
+    """Returns the path of the given subdirectory within the users cache directory for this program."""
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'lednamebadge', *parts)
+
+
+def _safe_name(key):
+    """Returns the given key with all chars, which are not safe in a file name, replaced by '_'."""
+    return re.sub(r'[^A-Za-z0-9_.-]', '_', key)
+
+
+def _write_file_atomically(path, data):
+    """Writes the given bytes to the file at path via a temporary file, so a concurrent reader gets either the old or
+    the new content. The directory is created, if missing. The temporary file gets a random name and is created
+    exclusively without following symlinks. Returns True, if written. Errors are ignored, as the files written this
+    way are only caches.
+    """
+    import tempfile
+    try:
+        directory = os.path.dirname(path)
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        fd, tmp_path = tempfile.mkstemp(suffix='.tmp', prefix=os.path.basename(path) + '.', dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except (IOError, OSError):
+            os.remove(tmp_path)
+            raise
+        return True
+    except (IOError, OSError):
+        return False
+
+
+class DisplayGeometry:
+    """Describes the display of a badge type: its number of pixel rows (which is also the number of bytes per
+    byte-column in the bitmap data) and its visible width in pixels. The capacity is the maximum number of byte-columns
+    of all messages together, as the device accepts only max_bytes of data, including the protocol header.
+    The known types are in DisplayGeometry.known, see get().
+    """
+    known = {}
+
+    def __init__(self, name, rows, width, max_bytes=8192):
+        self.name = name
+        self.rows = rows
+        self.width = width
+        self.max_bytes = max_bytes
+
+    def get_capacity(self):
+        """Returns the maximum number of byte-columns, which can be written to the device."""
+        return (self.max_bytes - LedNameBadge.header_size) // self.rows
+
+    @staticmethod
+    def get(name):
+        """Returns the known geometry with the given name, like '12x48'. Also a part of a name is accepted, like '12',
+            which selects the first known geometry containing it. Raises a ValueError for unknown names.
+        """
+        if name in DisplayGeometry.known:
+            return DisplayGeometry.known[name]
+        for n in sorted(DisplayGeometry.known):
+            if name and name in n:
+                return DisplayGeometry.known[n]
+        raise ValueError("Unknown display type '%s', known types are: %s" %
+                         (name, ', '.join(sorted(DisplayGeometry.known))))
+
+    def __repr__(self):
+        return "DisplayGeometry(%r, %d, %d)" % (self.name, self.rows, self.width)
+
+
+for _geometry in (DisplayGeometry('11x44', 11, 44), DisplayGeometry('12x48', 12, 48), DisplayGeometry('11x55', 11, 55)):
+    DisplayGeometry.known[_geometry.name] = _geometry
 
 
 class SimpleTextAndIcons:
-    font_11x44 = (
+    font_11x44 = bytes((
         # 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
         0x00, 0x38, 0x6c, 0xc6, 0xc6, 0xfe, 0xc6, 0xc6, 0xc6, 0xc6, 0x00,
         0x00, 0xfc, 0x66, 0x66, 0x66, 0x7c, 0x66, 0x66, 0x66, 0xfc, 0x00,
@@ -252,7 +381,7 @@ class SimpleTextAndIcons:
         0x10, 0x6c, 0x00, 0xc6, 0xc6, 0xc6, 0xc6, 0xc6, 0xc6, 0x7c, 0x00,  # Û
         0x60, 0x18, 0x00, 0xc6, 0xc6, 0xc6, 0xc6, 0xc6, 0xc6, 0x7c, 0x00,  # Ù
         0x66, 0x66, 0x00, 0x66, 0x66, 0x66, 0x3c, 0x18, 0x18, 0x3c, 0x00,  # Ÿ
-    )
+    ))
 
     charmap = u'ABCDEFGHIJKLMNOPQRSTUVWXYZ' + \
               u'abcdefghijklmnopqrstuvwxyz' + \
@@ -268,7 +397,7 @@ class SimpleTextAndIcons:
         # print(i, charmap[i], char_offsets[charmap[i]])
 
     bitmap_named = {
-        'ball':      (array('B', (
+        'ball':      (bytes((
             0b00000000,
             0b00000000,
             0b00111100,
@@ -281,7 +410,7 @@ class SimpleTextAndIcons:
             0b00111100,
             0b00000000
         )), 1, '\x1e'),
-        'happy':     (array('B', (
+        'happy':     (bytes((
             0b00000000,  # 0x00
             0b00000000,  # 0x00
             0b00111100,  # 0x3c
@@ -294,23 +423,23 @@ class SimpleTextAndIcons:
             0b00111100,  # 0x3c
             0b00000000  # 0x00
         )), 1, '\x1d'),
-        'happy2':    (array('B', (0x00, 0x08, 0x14, 0x08, 0x01, 0x00, 0x00, 0x61, 0x30, 0x1c, 0x07,
+        'happy2':    (bytes((0x00, 0x08, 0x14, 0x08, 0x01, 0x00, 0x00, 0x61, 0x30, 0x1c, 0x07,
                                   0x00, 0x20, 0x50, 0x20, 0x00, 0x80, 0x80, 0x86, 0x0c, 0x38, 0xe0)), 2, '\x1c'),
-        'heart':     (array('B', (0x00, 0x00, 0x6c, 0x92, 0x82, 0x82, 0x44, 0x28, 0x10, 0x00, 0x00)), 1, '\x1b'),
-        'HEART':     (array('B', (0x00, 0x00, 0x6c, 0xfe, 0xfe, 0xfe, 0x7c, 0x38, 0x10, 0x00, 0x00)), 1, '\x1a'),
-        'heart2':    (array('B', (0x00, 0x0c, 0x12, 0x21, 0x20, 0x20, 0x10, 0x08, 0x04, 0x02, 0x01,
+        'heart':     (bytes((0x00, 0x00, 0x6c, 0x92, 0x82, 0x82, 0x44, 0x28, 0x10, 0x00, 0x00)), 1, '\x1b'),
+        'HEART':     (bytes((0x00, 0x00, 0x6c, 0xfe, 0xfe, 0xfe, 0x7c, 0x38, 0x10, 0x00, 0x00)), 1, '\x1a'),
+        'heart2':    (bytes((0x00, 0x0c, 0x12, 0x21, 0x20, 0x20, 0x10, 0x08, 0x04, 0x02, 0x01,
                                   0x00, 0x60, 0x90, 0x08, 0x08, 0x08, 0x10, 0x20, 0x40, 0x80, 0x00)), 2, '\x19'),
-        'HEART2':    (array('B', (0x00, 0x0c, 0x1e, 0x3f, 0x3f, 0x3f, 0x1f, 0x0f, 0x07, 0x03, 0x01,
+        'HEART2':    (bytes((0x00, 0x0c, 0x1e, 0x3f, 0x3f, 0x3f, 0x1f, 0x0f, 0x07, 0x03, 0x01,
                                   0x00, 0x60, 0xf0, 0xf8, 0xf8, 0xf8, 0xf0, 0xe0, 0xc0, 0x80, 0x00)), 2, '\x18'),
-        'fablab':    (array('B', (0x07, 0x0e, 0x1b, 0x03, 0x21, 0x2c, 0x2e, 0x26, 0x14, 0x1c, 0x06,
+        'fablab':    (bytes((0x07, 0x0e, 0x1b, 0x03, 0x21, 0x2c, 0x2e, 0x26, 0x14, 0x1c, 0x06,
                                   0x80, 0x60, 0x30, 0x80, 0x88, 0x38, 0xe8, 0xc8, 0x10, 0x30, 0xc0)), 2, '\x17'),
-        'bicycle':   (array('B', (0x01, 0x02, 0x00, 0x01, 0x07, 0x09, 0x12, 0x12, 0x10, 0x08, 0x07,
+        'bicycle':   (bytes((0x01, 0x02, 0x00, 0x01, 0x07, 0x09, 0x12, 0x12, 0x10, 0x08, 0x07,
                                   0x00, 0x87, 0x81, 0x5f, 0x22, 0x94, 0x49, 0x5f, 0x49, 0x80, 0x00,
                                   0x00, 0x80, 0x00, 0x80, 0x70, 0xc8, 0x24, 0xe4, 0x04, 0x88, 0x70)), 3, '\x16'),
-        'bicycle_r': (array('B', (0x00, 0x00, 0x00, 0x00, 0x07, 0x09, 0x12, 0x13, 0x10, 0x08, 0x07,
+        'bicycle_r': (bytes((0x00, 0x00, 0x00, 0x00, 0x07, 0x09, 0x12, 0x13, 0x10, 0x08, 0x07,
                                   0x00, 0xf0, 0x40, 0xfd, 0x22, 0x94, 0x49, 0xfd, 0x49, 0x80, 0x00,
                                   0x40, 0xa0, 0x80, 0x40, 0x70, 0xc8, 0x24, 0x24, 0x04, 0x88, 0x70)), 3, '\x15'),
-        'owncloud':  (array('B', (0x00, 0x01, 0x02, 0x03, 0x06, 0x0c, 0x1a, 0x13, 0x11, 0x19, 0x0f,
+        'owncloud':  (bytes((0x00, 0x01, 0x02, 0x03, 0x06, 0x0c, 0x1a, 0x13, 0x11, 0x19, 0x0f,
                                   0x78, 0xcc, 0x87, 0xfc, 0x42, 0x81, 0x81, 0x81, 0x81, 0x43, 0xbd,
                                   0x00, 0x00, 0x00, 0x80, 0x80, 0xe0, 0x30, 0x10, 0x28, 0x28, 0xd0)), 3, '\x14'),
     }
@@ -319,9 +448,43 @@ class SimpleTextAndIcons:
     for i in bitmap_named:
         bitmap_builtin[bitmap_named[i][2]] = bitmap_named[i]
 
-    def __init__(self):
-        self.bitmap_preloaded = [([], 0)]
+    # All glyphs of the font and the builtin bitmaps in one immutable buffer, and a precomputed index
+    # char -> (glyph, length_in_byte_columns), where each glyph is a zero-copy view into that buffer.
+    _glyphs = memoryview(font_11x44 + b''.join([g[0] for g in bitmap_named.values()]))
+    _glyph_columns = {}  # char -> (index of the first byte-column in _glyphs, length_in_byte_columns)
+    for ch in char_offsets:
+        if ord(ch) >= 32:
+            _glyph_columns[ch] = (char_offsets[ch] // 11, 1)
+    o = len(font_11x44) // 11
+    for i in bitmap_named:
+        _glyph_columns[bitmap_named[i][2]] = (o, bitmap_named[i][1])
+        o += bitmap_named[i][1]
+    _glyph_index = {}
+    for ch in _glyph_columns:
+        _glyph_index[ch] = (_glyphs[11 * _glyph_columns[ch][0]:11 * sum(_glyph_columns[ch])], _glyph_columns[ch][1])
+    _glyph_chars = frozenset(_glyph_columns)
+    _glyph_lookup = None  # numpy arrays for render_many(), created on first use
+    _glyph_extents = {}  # char -> (first lit pixel column, advance in pixels), created on demand for proportional
+    proportional_space = 4  # advance of a blank glyph in proportional mode
+
+    # Set this to a BitmapCache object to cache decoded image files persistently.
+    image_cache = None
+    # Set this to a RenderCache object to cache rendered texts in memory.
+    render_cache = None
+
+    def __init__(self, proportional=False, fallback_font=None, geometry=None):
+        """With proportional=True, the chars of texts are packed at pixel granularity with one empty pixel column
+            between them, instead of using a whole byte-column per char. Builtin and loaded bitmaps keep their width.
+            fallback_font is an optional FontRasterizer for chars, which are not available in the builtin font.
+            geometry is the DisplayGeometry of the badge, default is 11x44. The bitmaps returned by bitmap(),
+            bitmap_text() and render_many() have as many bytes per byte-column as the geometry has rows. Glyphs and
+            images have 11 rows, for taller displays they are padded with empty rows at the bottom.
+        """
+        self.bitmap_preloaded = [(b'', 0)]
         self.bitmaps_preloaded_unused = False
+        self.proportional = proportional
+        self.fallback_font = fallback_font
+        self.geometry = geometry or DisplayGeometry.known['11x44']
 
     def add_preload_img(self, filename):
         """Still used by main, but deprecated. PLease use ":"-notation for bitmap() / bitmap_text()"""
@@ -337,19 +500,22 @@ class SimpleTextAndIcons:
         return SimpleTextAndIcons.bitmap_named.keys()
 
     def bitmap_char(self, ch):
-        """Returns a tuple of 11 bytes, it is the bitmap data of given character.
-            Example: ch = '_' returns (0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 255).
+        """Returns a tuple of (data, length_in_byte_columns), it is the bitmap data of given character. The data is a
+            read-only bytes-like object (a memoryview) with 11 bytes per byte-column.
+            Example: ch = '_' returns data with the 11 bytes 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 255 and 1.
             The bits in each byte are horizontal, highest bit is left.
         """
-        if ord(ch) < 32:
-            if ch in SimpleTextAndIcons.bitmap_builtin:
-                return SimpleTextAndIcons.bitmap_builtin[ch][:2]
+        glyph = SimpleTextAndIcons._glyph_index.get(ch)
+        if glyph:
+            return glyph
 
+        if ord(ch) < 32:
             self.bitmaps_preloaded_unused = False
             return self.bitmap_preloaded[ord(ch)]
 
-        o = SimpleTextAndIcons.char_offsets[ch]
-        return SimpleTextAndIcons.font_11x44[o:o + 11], 1
+        if self.fallback_font:
+            return self.fallback_font.glyph(ch)
+        raise KeyError(ch)
 
     def bitmap_text(self, text):
         """Returns a tuple of (buffer, length_in_byte_columns_aka_chars)
@@ -359,6 +525,114 @@ class SimpleTextAndIcons:
           ":happy:" is replaced with a reference to a builtin smiley glyph
           ":heart:" is replaced with a reference to a builtin heart glyph
           ":gfx/logo.png:" preloads the file gfx/logo.png and is replaced the corresponding control char.
+          If a render_cache is set, the result is taken from there, if the same text was rendered before. Texts
+          referencing preloaded or loaded images are cached together with the image data, texts referencing image
+          files together with the path, size and modification time of the files. Image files are not loaded again
+          on a cache hit.
+        """
+        cache = self.render_cache
+        if cache is None:
+            return self._bitmap_glyphs(self._replace_symbolic(text))
+
+        references = self._get_image_references(text)
+        if references is None:
+            return self._bitmap_glyphs(self._replace_symbolic(text))
+        files, preloaded = references
+        # The result depends on the images, so they are part of the key.
+        key = (self.geometry.name, self.proportional, self.fallback_font and self.fallback_font.key, text) + \
+            files + tuple([bytes(self.bitmap_preloaded[ord(c)][0]) for c in preloaded])
+        bitmap = cache.get(key)
+        if bitmap is None:
+            bitmap = self._bitmap_glyphs(self._replace_symbolic(text))
+            cache.put(key, bitmap)
+            return bitmap
+        if preloaded:
+            self.bitmaps_preloaded_unused = False
+        return array('B', bitmap[0]), bitmap[1]
+
+    def _get_image_references(self, text):
+        """Returns a tuple of (file stamps, preloaded chars) of the images referenced by the given text, see
+            bitmap_text(). A file stamp is a tuple of (absolute path, size, modification time). Returns None, if a
+            file or a preloaded image is not available, the text is not cacheable then.
+        """
+        files = []
+        chars = set([c for c in re.sub(r':[^:]*:', '', text) if ord(c) < 32])
+        for m in re.finditer(r':([^:]*):', text):
+            name = m.group(1)
+            if re.match('^[0-9]+$', name):
+                chars.add(chr(int(name)))
+            elif '.' in name:
+                try:
+                    stat = os.stat(name)
+                except (IOError, OSError):
+                    return None
+                files.append((os.path.abspath(name), stat.st_size, stat.st_mtime_ns))
+        preloaded = sorted([c for c in chars if ord(c) < 32 and c not in SimpleTextAndIcons.bitmap_builtin])
+        if preloaded and ord(preloaded[-1]) >= len(self.bitmap_preloaded):
+            return None
+        return tuple(files), preloaded
+
+    def framebuffer(self, arg):
+        """Like bitmap(), but returns a Framebuffer object for further pixel level work."""
+        return Framebuffer.from_bitmap(self.bitmap(arg), self.geometry.rows)
+
+    def render_many(self, texts):
+        """Renders many texts at once. Returns a list with one tuple of (buffer, length_in_byte_columns) per text,
+            exactly as bitmap_text() would return them. If numpy is installed, all glyphs of all texts are gathered
+            from the font in one operation. Texts referencing preloaded or loaded images or chars not available in
+            the builtin font are rendered one by one.
+        """
+        glyph_texts = [self._replace_symbolic(t) if ':' in t else t for t in texts]
+        np = _optional_numpy()
+        if np is None or self.proportional:
+            return [self._bitmap_glyphs(t) for t in glyph_texts]
+
+        bitmaps = [None] * len(glyph_texts)
+        batch = []
+        for i, t in enumerate(glyph_texts):
+            if SimpleTextAndIcons._glyph_chars.issuperset(t):
+                batch.append(i)
+            else:
+                bitmaps[i] = self._bitmap_glyphs(t)
+
+        starts, lengths = SimpleTextAndIcons._get_glyph_lookup(np)
+        joined = u''.join([glyph_texts[i] for i in batch])
+        codes = np.frombuffer(joined.encode('utf-32-le'), dtype='<u4')
+
+        # Expand every char to its byte-columns and gather them all at once
+        char_cols = lengths[codes]
+        col_ends = np.cumsum(char_cols)
+        first_cols = np.repeat(starts[codes] - (col_ends - char_cols), char_cols)
+        columns = first_cols + np.arange(int(col_ends[-1]) if len(col_ends) else 0)
+        table = np.frombuffer(SimpleTextAndIcons._glyphs, dtype=np.uint8).reshape(-1, 11)
+        data = table[columns].tobytes()
+
+        col_ends = np.concatenate(([0], col_ends))
+        char_end = 0
+        for i in batch:
+            char_start, char_end = char_end, char_end + len(glyph_texts[i])
+            col_start, col_end = int(col_ends[char_start]), int(col_ends[char_end])
+            bitmaps[i] = self._fit_geometry((array('B', data[11 * col_start:11 * col_end]), col_end - col_start))
+        return bitmaps
+
+    @staticmethod
+    def _get_glyph_lookup(np):
+        """Returns two numpy arrays, indexed by the code point of a char: the first byte-column of the char within
+            _glyphs (-1, if not available) and its length_in_byte_columns.
+        """
+        if SimpleTextAndIcons._glyph_lookup is None:
+            size = max([ord(c) for c in SimpleTextAndIcons._glyph_columns]) + 1
+            starts = np.full(size, -1, dtype=np.int64)
+            lengths = np.zeros(size, dtype=np.int64)
+            for ch, (start, cols) in SimpleTextAndIcons._glyph_columns.items():
+                starts[ord(ch)] = start
+                lengths[ord(ch)] = cols
+            SimpleTextAndIcons._glyph_lookup = (starts, lengths)
+        return SimpleTextAndIcons._glyph_lookup
+
+    def _replace_symbolic(self, text):
+        """Returns the given text with all ":"-notations replaced by the corresponding control characters, see
+            bitmap_text().
         """
 
         def replace_symbolic(m):
@@ -372,22 +646,78 @@ class SimpleTextAndIcons:
                 return chr(len(self.bitmap_preloaded) - 1)
             return SimpleTextAndIcons.bitmap_named[name][2]
 
-        text = re.sub(r':([^:]*):', replace_symbolic, text)
-        buf = array('B')
-        cols = 0
+        return re.sub(r':([^:]*):', replace_symbolic, text)
+
+    def _bitmap_glyphs(self, text):
+        """Returns a tuple of (buffer, length_in_byte_columns) of the given text without ":"-notation."""
+        if self.proportional:
+            return self._fit_geometry(self._bitmap_proportional(text))
+        glyphs = [self.bitmap_char(c) for c in text]
+        return self._fit_geometry((array('B', b''.join([g[0] for g in glyphs])), sum([g[1] for g in glyphs])))
+
+    def _fit_geometry(self, bitmap):
+        """Converts a bitmap with 11 rows to the number of rows of the geometry in one pass."""
+        rows = self.geometry.rows
+        if rows == 11:
+            return bitmap
+        buf, cols = bitmap
+        fitted = bytearray(rows * cols)
+        for row in range(min(rows, 11)):
+            fitted[row::rows] = buf[row::11]
+        return array('B', fitted), cols
+
+    def _bitmap_proportional(self, text):
+        rows = [0] * 11
+        width = 0
         for c in text:
-            (b, n) = self.bitmap_char(c)
-            buf.extend(b)
-            cols += n
-        return buf, cols
+            data, cols = self.bitmap_char(c)
+            left, advance = SimpleTextAndIcons._glyph_extent(c, data, cols)
+            shift = 8 * cols - left - advance
+            mask = (1 << advance) - 1
+            for y in range(11):
+                rows[y] = rows[y] << advance | Framebuffer._shifted(int.from_bytes(data[y::11], 'big'), -shift) & mask
+            width += advance
+        return Framebuffer(width, 11, rows).to_columns()
+
+    @staticmethod
+    def _glyph_extent(ch, data, cols):
+        """Returns a tuple of (first lit pixel column, advance in pixels) of the given glyph for proportional
+            rendering. Only font glyphs are trimmed, builtin and loaded bitmaps keep their full width.
+        """
+        extent = SimpleTextAndIcons._glyph_extents.get(ch)
+        if extent is None:
+            if ord(ch) < 32:
+                return 0, 8 * cols
+            lit = 0
+            for y in range(11):
+                lit |= int.from_bytes(data[y::11], 'big')
+            if lit:
+                left = 8 * cols - lit.bit_length()
+                right = 8 * cols - (lit & -lit).bit_length()
+                extent = (left, right - left + 2)
+            else:
+                extent = (0, SimpleTextAndIcons.proportional_space)
+            if ch in SimpleTextAndIcons._glyph_chars:
+                SimpleTextAndIcons._glyph_extents[ch] = extent
+        return extent
 
     @staticmethod
-    def bitmap_img(file):
+    def bitmap_img(file, threshold=127):
         """Returns a tuple of (buffer, length_in_byte_columns) representing the given image file.
             It has to be an 8-bit grayscale image or a color image with 8 bit per channel. Color pixels are converted to
-            grayscale by arithmetic mean. Threshold for an active led is then > 127.
+            grayscale by arithmetic mean. Threshold for an active led is then > 127 (or the given threshold).
             If the width is not a multiple on 8 it will be padded with empty pixel-columns.
+            If an image_cache is set, an image file already seen is taken from there, without using PIL at all.
         """
+        cache = SimpleTextAndIcons.image_cache
+        cache_key = None
+        if cache is not None and isinstance(file, str):
+            cache_key = cache.key(file, threshold)
+            bitmap = cache.get(cache_key)
+            if bitmap:
+                print("fetching bitmap from cache for file %s -> (%d byte-columns)" % (file, bitmap[1]))
+                return bitmap
+
         try:
             from PIL import Image
         except:
@@ -400,48 +730,495 @@ class SimpleTextAndIcons:
         print("fetching bitmap from file %s -> (%d x %d)" % (file, im.width, im.height))
         if im.height != 11:
             sys.exit("%s: image height must be 11px. Seen %d" % (file, im.height))
-        buf = array('B')
         cols = int((im.width + 7) / 8)
-        for col in range(cols):
-            for row in range(11):  # [0..10]
-                byte_val = 0
-                for bit in range(8):  # [0..7]
-                    bit_val = 0
-                    x = 8 * col + bit
-                    if x < im.width and row < im.height:
-                        pixel_color = im.getpixel((x, row))
-                        if isinstance(pixel_color, tuple):
-                            monochrome_color = sum(pixel_color[:3]) / len(pixel_color[:3])
-                        elif isinstance(pixel_color, int):
-                            monochrome_color = pixel_color
-                        else:
-                            sys.exit("%s: Unknown pixel format detected (%s)!" % (file, pixel_color))
-                        if monochrome_color > 127:
-                            bit_val = 1 << (7 - bit)
-                        byte_val += bit_val
-                buf.append(byte_val)
+        rows = SimpleTextAndIcons._image_to_rows(im, file, threshold)
         im.close()
-        return buf, cols
+        bitmap = SimpleTextAndIcons._rows_to_columns(rows, 11), cols
+        if cache_key:
+            cache.put(cache_key, bitmap)
+        return bitmap
+
+    @staticmethod
+    def _image_to_rows(im, file, threshold=127):
+        """Returns the pixels of the given PIL image packed row by row: (width + 7) // 8 bytes per pixel row, 8
+            horizontal pixels per byte, highest bit left, unused bits of the last byte are 0. A pixel is set, if its
+            brightness is > threshold. Multichannel pixels are converted to grayscale by arithmetic mean of (up to)
+            the first 3 channels, like getpixel() would see them.
+        """
+        if im.mode == '1':
+            im = im.convert('L')
+
+        np = _optional_numpy()
+        if np is not None:
+            pixels = np.asarray(im)
+            if pixels.dtype.kind not in 'iu':
+                sys.exit("%s: Unknown pixel format detected (%s)!" % (file, pixels.dtype))
+            if pixels.ndim == 3:
+                channels = min(pixels.shape[2], 3)
+                lit = pixels[:, :, :channels].sum(axis=2, dtype=np.int64) > threshold * channels
+            else:
+                lit = pixels > threshold
+            return np.packbits(lit, axis=1).tobytes()
+
+        if im.mode in ('L', 'P'):
+            lit = im.tobytes().translate(bytes(255 if v > threshold else 0 for v in range(256)))
+        elif im.mode in ('LA', 'PA', 'RGB', 'RGBA', 'RGBX', 'RGBa', 'CMYK', 'YCbCr', 'LAB', 'HSV'):
+            # Summed up by ImageMath in 32 bit, so it stays in C
+            from PIL import ImageMath
+            bands = dict(zip('abc', im.split()[:3]))
+            limit = threshold * len(bands)
+            if hasattr(ImageMath, 'lambda_eval'):
+                lit = ImageMath.lambda_eval(lambda args: args['convert'](
+                    (sum([args[name] for name in sorted(bands)]) > limit) * 255, 'L'), **bands)
+            else:
+                lit = ImageMath.eval("convert((%s > %d) * 255, 'L')" % ('+'.join(sorted(bands)), limit), **bands)
+            lit = lit.tobytes()
+        else:
+            data = im.getdata()
+            if data and not isinstance(data[0], int):
+                sys.exit("%s: Unknown pixel format detected (%s)!" % (file, data[0]))
+            lit = bytes(255 if v > threshold else 0 for v in data)
+        # Let PIL do the bit packing: mode '1' is stored exactly like we need it, row by row.
+        from PIL import Image
+        return Image.frombytes('L', im.size, lit).convert('1', dither=0).tobytes()
+
+    @staticmethod
+    def _rows_to_columns(rows, height):
+        """Reorders data packed row by row (see _image_to_rows()) into the byte-column order of the device: all bytes
+            of the first 8 pixel wide column from top to bottom, then the same for the second column, and so on.
+        """
+        stride = len(rows) // height
+        return array('B', b''.join(rows[col::stride] for col in range(stride)))
 
     def bitmap(self, arg):
         """If arg is a valid and existing path name, we load it as an image.
             Otherwise, we take it as a string (with ":"-notation, see bitmap_text()).
         """
         if os.path.exists(arg):
-            return SimpleTextAndIcons.bitmap_img(arg)
+            return self._fit_geometry(SimpleTextAndIcons.bitmap_img(arg))
         return self.bitmap_text(arg)
 
 
+class BitmapCache:
+    """A persistent cache for bitmaps decoded from image files. The entries are keyed by a hash of the file content and
+    the decoding parameters, so a modified file is never taken from the cache. Each entry is one small file in the
+    cache directory, holding the number of byte-columns and the bitmap data. If the cache grows beyond max_bytes, the
+    least recently used entries are removed. Use it by setting SimpleTextAndIcons.image_cache.
+    """
+    version = 1
+
+    def __init__(self, directory=None, max_bytes=4 * 1024 * 1024):
+        self.directory = directory or _user_cache_dir('bitmaps')
+        self.max_bytes = max_bytes
+
+    def key(self, file, threshold):
+        """Returns the cache key for the given image file and threshold or None, if the file is not readable."""
+        import hashlib
+        h = hashlib.sha1(b'%d:%d:11:' % (BitmapCache.version, threshold))
+        try:
+            with open(file, 'rb') as f:
+                for block in iter(lambda: f.read(65536), b''):
+                    h.update(block)
+        except (IOError, OSError):
+            return None
+        return h.hexdigest()
+
+    def get(self, key):
+        """Returns the cached tuple of (buffer, length_in_byte_columns) for the given key or None."""
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path, None)  # mark as recently used
+        except (IOError, OSError):
+            return None
+        if len(data) < 4:
+            return None
+        cols = struct.unpack_from('<I', data)[0]
+        return array('B', data[4:]), cols
+
+    def put(self, key, bitmap):
+        """Stores the given tuple of (buffer, length_in_byte_columns) for the given key. Errors are ignored, as
+        caching is only an optimization.
+        """
+        if _write_file_atomically(self._path(key), struct.pack('<I', bitmap[1]) + bitmap[0].tobytes()):
+            try:
+                self._evict()
+            except (IOError, OSError):
+                pass
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.bmc')
+
+    def _evict(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.bmc'):
+                st = os.stat(os.path.join(self.directory, name))
+                entries.append((st.st_mtime, st.st_size, name))
+        total = sum(e[1] for e in entries)
+        for mtime, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(os.path.join(self.directory, name))
+            total -= size
+
+
+class RenderCache:
+    """A bounded in-memory cache for rendered texts with least recently used eviction. It is limited by the number of
+    entries and by the total size of the cached bitmap data. The counters 'hits' and 'misses' tell, how often a
+    rendering was taken from the cache resp. had to be done (and was stored). Use it by setting
+    SimpleTextAndIcons.render_cache. It may be shared between threads.
+    """
+
+    def __init__(self, max_entries=256, max_bytes=1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Returns the cached tuple of (bytes, length_in_byte_columns) for the given key or None."""
+        with self._lock:
+            bitmap = self._entries.get(key)
+            if bitmap is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            return bitmap
+
+    def put(self, key, bitmap):
+        """Stores a copy of the given tuple of (buffer, length_in_byte_columns) for the given key."""
+        data = bitmap[0].tobytes()
+        with self._lock:
+            self.misses += 1
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old[0])
+            self._entries[key] = (data, bitmap[1])
+            self._bytes += len(data)
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                self._bytes -= len(self._entries.popitem(last=False)[1][0])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def get_stats(self):
+        """Returns a dict with the current number of entries, their size in bytes and the hit and miss counters."""
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self._bytes, 'hits': self.hits, 'misses': self.misses}
+
+
+class Framebuffer:
+    """A monochrome bitmap of width x height pixels for pixel level work, like composing texts and images. Each pixel row
+    is held as one integer with the leftmost pixel in the highest bit, so all operations work on whole rows at once,
+    instead of bit by bit. Use from_columns() / to_columns() to convert from and to the byte-column layout of the
+    device, as returned by SimpleTextAndIcons.bitmap() and expected by LedNameBadge.write().
+    """
+
+    def __init__(self, width, height=11, rows=None):
+        self.width = width
+        self.height = height
+        self.rows = list(rows) if rows is not None else [0] * height
+
+    @staticmethod
+    def from_columns(buf, cols, height=11):
+        """Creates a framebuffer from bitmap data in byte-column layout: height bytes per byte-column, 8 horizontal
+            pixels per byte, highest bit left.
+        """
+        data = bytes(buf[:cols * height])
+        return Framebuffer(8 * cols, height, [int.from_bytes(data[row::height], 'big') for row in range(height)])
+
+    @staticmethod
+    def from_bitmap(bitmap, height=11):
+        """Creates a framebuffer from a tuple of (buffer, length_in_byte_columns), see SimpleTextAndIcons.bitmap()"""
+        return Framebuffer.from_columns(bitmap[0], bitmap[1], height)
+
+    @staticmethod
+    def from_pixels(pixels):
+        """Creates a framebuffer from a list of rows, each row is a list of pixel values (anything true is lit)."""
+        width = max([len(row) for row in pixels]) if pixels else 0
+        rows = [int(''.join(['1' if p else '0' for p in row]) or '0', 2) << (width - len(row)) for row in pixels]
+        return Framebuffer(width, len(pixels), rows)
+
+    def to_columns(self):
+        """Returns a tuple of (buffer, length_in_byte_columns) in byte-column layout. If the width is not a multiple
+            of 8 it will be padded with empty pixel-columns on the right.
+        """
+        cols = (self.width + 7) // 8
+        pad = 8 * cols - self.width
+        buf = bytearray(cols * self.height)
+        for y, row in enumerate(self.rows):
+            buf[y::self.height] = (row << pad).to_bytes(cols, 'big')
+        return array('B', buf), cols
+
+    def to_pixels(self):
+        """Returns the pixels as a list of rows, each row is a list of booleans."""
+        return [[c == '1' for c in format(row, '0%db' % self.width)] if self.width else [] for row in self.rows]
+
+    def copy(self):
+        return Framebuffer(self.width, self.height, self.rows)
+
+    def get_pixel(self, x, y):
+        return bool(self.rows[y] >> (self.width - 1 - x) & 1)
+
+    def set_pixel(self, x, y, value=True):
+        bit = 1 << (self.width - 1 - x)
+        if value:
+            self.rows[y] |= bit
+        else:
+            self.rows[y] &= ~bit
+
+    def invert(self):
+        """Inverts all pixels."""
+        mask = self._mask(self.width)
+        self.rows = [row ^ mask for row in self.rows]
+        return self
+
+    def shift(self, dx, dy=0):
+        """Moves the content dx pixels to the right (left, if negative) and dy pixels down (up, if negative). Pixels
+            moved out are lost, pixels moved in are dark.
+        """
+        mask = self._mask(self.width)
+        rows = [self._shifted(row, -dx) & mask for row in self.rows]
+        if dy > 0:
+            rows = [0] * min(dy, self.height) + rows[:max(self.height - dy, 0)]
+        elif dy < 0:
+            rows = rows[min(-dy, self.height):] + [0] * min(-dy, self.height)
+        self.rows = rows
+        return self
+
+    def crop(self, x, y, width, height):
+        """Returns a new framebuffer with the given area of this one. Parts outside of this framebuffer are dark."""
+        mask = self._mask(width)
+        rows = [self._shifted(self.rows[y + i], width + x - self.width) & mask if 0 <= y + i < self.height else 0
+                for i in range(height)]
+        return Framebuffer(width, height, rows)
+
+    def blit(self, src, x=0, y=0, mode='or'):
+        """Draws the framebuffer src into this one at the given position. Modes are 'or' (lit pixels of src are
+            added), 'xor' (lit pixels of src toggle pixels) and 'copy' (the area of src is replaced).
+        """
+        if mode not in ('or', 'xor', 'copy'):
+            raise ValueError("Unknown blit mode: " + str(mode))
+        mask = self._mask(self.width)
+        area = self._shifted(self._mask(src.width), self.width - x - src.width) & mask
+        for i, row in enumerate(src.rows):
+            if 0 <= y + i < self.height:
+                row = self._shifted(row, self.width - x - src.width) & mask
+                if mode == 'or':
+                    self.rows[y + i] |= row
+                elif mode == 'xor':
+                    self.rows[y + i] ^= row
+                else:
+                    self.rows[y + i] = self.rows[y + i] & ~area | row
+        return self
+
+    @staticmethod
+    def _mask(width):
+        return (1 << width) - 1 if width > 0 else 0
+
+    @staticmethod
+    def _shifted(row, n):
+        """Shifts left by n bits, or right, if n is negative."""
+        return row << n if n >= 0 else row >> -n
+
+    def __eq__(self, other):
+        return (isinstance(other, Framebuffer) and (self.width, self.height, self.rows) ==
+                (other.width, other.height, other.rows))
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __str__(self):
+        return '\n'.join([''.join(['#' if p else '.' for p in row]) for row in self.to_pixels()])
+
+
+class FontRasterizer:
+    """Provides glyphs for chars, which are not available in the builtin font, from a font file: TrueType or OpenType
+    fonts (.ttf, .otf, rasterized with PIL's ImageFont at size pixels) or BDF bitmap fonts (.bdf, read directly, as
+    PIL's own BDF support is limited to 256 chars). The glyphs are vertically centered in the 11 pixel rows of the
+    badge. Each rasterized glyph is stored in a persistent glyph atlas, one file per font file content, size and
+    threshold, so each char is rasterized only once, even across processes. Use it with
+    SimpleTextAndIcons(fallback_font=...).
+    """
+    version = 1
+
+    def __init__(self, font_file, size=11, atlas_dir=None, threshold=127):
+        self.font_file = font_file
+        self.size = size
+        self.threshold = threshold
+        self.atlas_dir = atlas_dir or _user_cache_dir('glyphs')
+        import hashlib
+        h = hashlib.sha1(b'%d:%d:%d:11:' % (FontRasterizer.version, size, threshold))
+        with open(font_file, 'rb') as f:
+            h.update(f.read())
+        self.key = h.hexdigest()
+        self._font = None
+        self._index = None  # char -> (offset, length_in_byte_columns) within _data
+        self._data = b''
+
+    def glyph(self, ch):
+        """Returns a tuple of (data, length_in_byte_columns) of the given char like SimpleTextAndIcons.bitmap_char()"""
+        if self._index is None:
+            self._load_atlas()
+        entry = self._index.get(ch)
+        if entry is None:
+            buf, cols = self._rasterize(ch)
+            entry = (len(self._data), cols)
+            self._data += buf.tobytes()
+            self._index[ch] = entry
+            self._save_atlas()
+        return memoryview(self._data)[entry[0]:entry[0] + 11 * entry[1]], entry[1]
+
+    def _atlas_path(self):
+        return os.path.join(self.atlas_dir, self.key + '.atlas')
+
+    def _load_atlas(self):
+        """The atlas file consists of the length of the index, the index as JSON and the glyph data."""
+        import json
+        self._index = {}
+        try:
+            with open(self._atlas_path(), 'rb') as f:
+                data = f.read()
+            index_len = struct.unpack_from('<I', data)[0]
+            index = json.loads(data[4:4 + index_len].decode('utf-8'))
+            self._data = data[4 + index_len:]
+            self._index = {ch: tuple(entry) for ch, entry in index.items()}
+        except (IOError, OSError, ValueError, struct.error):
+            self._data = b''
+
+    def _save_atlas(self):
+        """Rewrites the atlas file. Errors are ignored, as the atlas is only an optimization."""
+        import json
+        index = json.dumps(self._index).encode('utf-8')
+        _write_file_atomically(self._atlas_path(), struct.pack('<I', len(index)) + index + self._data)
+
+    def _rasterize(self, ch):
+        if self.font_file.lower().endswith('.bdf'):
+            return self._rasterize_bdf(ch)
+        return self._rasterize_truetype(ch)
+
+    def _rasterize_truetype(self, ch):
+        try:
+            from PIL import Image, ImageDraw, ImageFont
+        except:
+            print("If you like to use font files, the module pillow is needed. Try:")
+            print("$ pip install pillow")
+            LedNameBadge._print_common_install_hints('pillow', 'python3-pillow')
+            sys.exit(1)
+
+        if self._font is None:
+            self._font = ImageFont.truetype(self.font_file, self.size)
+        ascent, descent = self._font.getmetrics()
+        baseline = (11 - ascent - descent) // 2 + ascent
+        width = max(int(self._font.getlength(ch) + 0.5), self._font.getbbox(ch, anchor='ls')[2], 1)
+        im = Image.new('L', (width, 11))
+        ImageDraw.Draw(im).text((0, baseline), ch, font=self._font, fill=255, anchor='ls')
+        rows = SimpleTextAndIcons._image_to_rows(im, self.font_file, self.threshold)
+        return SimpleTextAndIcons._rows_to_columns(rows, 11), (width + 7) // 8
+
+    def _rasterize_bdf(self, ch):
+        if self._font is None:
+            self._font = FontRasterizer._read_bdf(self.font_file)
+        ascent, descent, glyphs = self._font
+        if ord(ch) not in glyphs:
+            raise KeyError(ch)
+        advance, w, h, x_off, y_off, rows = glyphs[ord(ch)]
+        width = max(advance, x_off + w, 1)
+        top = (11 - ascent - descent) // 2 + ascent - y_off - h  # position of the first row of the glyphs bitmap
+        fb = Framebuffer(width, 11)
+        for y, row in enumerate(rows):
+            if 0 <= top + y < 11:
+                fb.rows[top + y] = Framebuffer._shifted(row, width - x_off - w) & Framebuffer._mask(width)
+        return fb.to_columns()
+
+    @staticmethod
+    def _read_bdf(file):
+        """Returns a tuple (ascent, descent, glyphs) of the given BDF font file. glyphs is a dict code point ->
+            (advance, width, height, x offset, y offset, rows), where rows are ints with the leftmost pixel in
+            the highest of width bits.
+        """
+        ascent = descent = None
+        glyphs = {}
+        with open(file, 'rb') as f:
+            lines = f.read().decode('latin-1').splitlines()
+        i = 0
+        while i < len(lines):
+            words = lines[i].split()
+            if words and words[0] == 'FONT_ASCENT':
+                ascent = int(words[1])
+            elif words and words[0] == 'FONT_DESCENT':
+                descent = int(words[1])
+            elif words and words[0] == 'FONTBOUNDINGBOX' and ascent is None:
+                ascent, descent = int(words[2]) + int(words[4]), -int(words[4])
+            elif words and words[0] == 'STARTCHAR':
+                code = advance = bbx = None
+                i += 1
+                while not lines[i].startswith('BITMAP'):
+                    words = lines[i].split()
+                    if words[0] == 'ENCODING':
+                        code = int(words[-1])
+                    elif words[0] == 'DWIDTH':
+                        advance = int(words[1])
+                    elif words[0] == 'BBX':
+                        bbx = [int(x) for x in words[1:5]]
+                    i += 1
+                w, h = bbx[0], bbx[1]
+                pad = 8 * ((w + 7) // 8) - w
+                rows = [int(lines[i + 1 + y].strip() or '0', 16) >> pad for y in range(h)]
+                i += h + 1
+                if code is not None and code >= 0:
+                    glyphs[code] = (advance if advance is not None else w, w, h, bbx[2], bbx[3], rows)
+            i += 1
+        return ascent, descent, glyphs
+
+
 class WriteMethod:
     """Base class for a write method. That is a way to communicate with a device. Think of using different access
     libraries or interfaces for communication. Basically it implements the common parts of the functionalities
     'device detection' and 'write data' and defines te interfaces to the user and the concrete write method class.
     """
+    # The report id to prefix each packet with, None for no prefix. Set it in your concrete class, if needed.
+    report_id = None
+    # A running HotplugWatcher. If set, the devices are enumerated again, after it has seen a device added or removed.
+    hotplug = None
+    # Without hotplug watcher: seconds after which the devices are enumerated again, if none was found.
+    rescan_interval = 1.0
+    # With hotplug watcher: the devices last enumerated per write method class and name, as a tuple of the watcher,
+    # its generation and the devices, so new write method objects take them over instead of enumerating again.
+    _hotplug_devices = {}
+    # Seconds to wait for a device being written by another process, see DeviceLock. None waits as long as needed,
+    # 0 fails at once. It may be set per write method object, too, see DeviceQueue.
+    lock_timeout = None
+    # A ContentStateStore. If set, writing the same data to a device again is skipped, unless forced.
+    state_store = None
+    # The ContentStateStore recording the data written, if state_store is not set, created on first use. The data
+    # is recorded by every write, so a later one skipping unchanged data does not miss a write in between.
+    default_state_store = None
 
     def __init__(self):
         """Call it from your concrete class in your __init__ method with!
         """
         self.devices = {}
+        self.device_descriptions = {}
+        self.devices_generation = None  # the HotplugWatcher generation of the last enumeration, 0 without watcher
+        self.devices_enumerated = None  # the time.time() of the last enumeration
+        self.open_device_id = None  # the device id given to the last successful _open()
+        # Whether close() shall reset the device, if the write method supports it. See BadgeSession.
+        self.reset_on_close = True
+        # A threading.Barrier to wait at before sending the last chunk, see MultiDeviceWriter. It is used once.
+        self.commit_barrier = None
+        self.commit_time = None  # the time.time() the last chunk was sent after waiting at the commit_barrier
+        # Called by write() with the seconds to wait between two packets instead of time.sleep() and with 0 before
+        # each packet, e.g. to cancel a write by raising an exception, see lednamebadge_async.
+        self.pause_function = None
 
     def __del__(self):
         self.close()
@@ -474,7 +1251,9 @@ class WriteMethod:
                     actual_device_id = device_id
 
             if actual_device_id:
-                return self._open(actual_device_id)
+                if self._open(actual_device_id):
+                    self.open_device_id = actual_device_id
+                    return True
         return False
 
     def close(self):
@@ -487,11 +1266,47 @@ class WriteMethod:
         """Get all devices available via the concrete write method. It returns a dict with the device ids as keys
         and the device descriptions as values. These device ids are used with 'open()' to specify the wanted device.
         It the common part of this process. The concrete part is to be implemented in _get_available_devices()
-        individually.
+        individually. The devices are enumerated only once per write method object, see also DeviceRegistry. With
+        a WriteMethod.hotplug watcher, they are enumerated again after a device has been added or removed. Without
+        one, they are enumerated again as long as none was found, but at most every rescan_interval seconds, so
+        a device plugged in later is found by long living objects, like a BadgeSession.
+        With a watcher, the devices are shared by all objects of the same write method, so creating a new object,
+        e.g. by LedNameBadge.write(), does not enumerate again, as long as nothing has changed.
+        The returned dict is shared, do not modify it.
+        """
+        if self.is_ready() and self.needs_enumeration():
+            hotplug = WriteMethod.hotplug
+            devices = self._get_hotplug_devices()
+            if devices is None:
+                generation = hotplug.generation if hotplug else 0
+                devices = self._get_available_devices()
+                if hotplug:
+                    WriteMethod._hotplug_devices[(self.__class__, self.get_name())] = (hotplug, generation, devices)
+            else:
+                generation = hotplug.generation
+            self.devices = devices
+            self.device_descriptions = {did: data[0] for did, data in self.devices.items()}
+            self.devices_generation = generation
+            self.devices_enumerated = time.time()
+        return self.device_descriptions
+
+    def needs_enumeration(self):
+        """Returns True, if get_available_devices() would enumerate the devices (or take them over from another object,
+        see WriteMethod.hotplug), False if it just returns them."""
+        if WriteMethod.hotplug is None and not self.devices and self.devices_generation is not None:
+            return time.time() - self.devices_enumerated >= WriteMethod.rescan_interval
+        generation = WriteMethod.hotplug.generation if WriteMethod.hotplug else 0
+        return self.devices_generation != generation
+
+    def _get_hotplug_devices(self):
+        """Returns the devices enumerated by another object of this write method at the current generation of the
+        WriteMethod.hotplug watcher or None, if there are none.
         """
-        if self.is_ready() and not self.devices:
-            self.devices = self._get_available_devices()
-        return {did: data[0] for did, data in self.devices.items()}
+        hotplug = WriteMethod.hotplug
+        entry = WriteMethod._hotplug_devices.get((self.__class__, self.get_name()))
+        if hotplug is None or entry is None or entry[0] is not hotplug or entry[1] != hotplug.generation:
+            return None
+        return entry[2]
 
     def is_device_present(self):
         """Returns True if there is one or more devices available via the concrete write method, False otherwise.
@@ -517,6 +1332,13 @@ class WriteMethod:
         """
         raise NotImplementedError()
 
+    def get_lock_key(self, device_id):
+        """Returns the name of the DeviceLock for the given device id. Override it in your concrete class, if the
+        device can be named independently of the write method, e.g. by its USB bus and device number, so processes
+        using different write methods for the same device exclude each other.
+        """
+        return "%s-%s" % (self.get_name(), device_id)
+
     def is_ready(self):
         """Returns True, if the concrete write method is basically ready for operation, otherwise False.
         This method is to be implemented in your concrete class. Basically, if the import instruction for the
@@ -531,12 +1353,70 @@ class WriteMethod:
         """
         raise NotImplementedError()
 
-    def write(self, buf):
-        """Call this to write data to the opened device.
-        The concrete write action is to be implemented in _write()."""
+    def write(self, buf, geometry=None, force=False):
+        """Call this to write data to the opened device. The optional geometry is the DisplayGeometry of the
+        badge (default 11x44), which limits the buffer size.
+        With a WriteMethod.state_store, the data is not written, if the device got the same data last time, unless
+        force is True. Returns True, if written, False, if skipped. The data written is recorded in any case, see
+        get_state_store().
+        It runs write_steps() and does the pauses in between with _pause()."""
+        steps = self.write_steps(buf, geometry, force)
+        try:
+            while True:
+                try:
+                    seconds = next(steps)
+                except StopIteration as e:
+                    return e.value
+                self._pause(seconds)
+        finally:
+            steps.close()  # releases the lock, if the pause raised
+
+    def write_steps(self, buf, geometry=None, force=False):
+        """Like write(), but as a generator, which yields the seconds to wait before it is continued, instead of
+        waiting itself, e.g. between two packets or while the device is locked by another process. Every step in
+        between is short, it sends at most one packet. Its return value is the one of write(). Closing it stops
+        the write and releases the lock. See lednamebadge_async, which waits in the event loop.
+        The concrete write action is to be implemented in _write_steps() or _write()."""
+        geometry = geometry or DisplayGeometry.known['11x44']
         self.add_padding(buf, 64)
-        self.check_length(buf, 8192)
-        self._write(buf)
+        self.check_length(buf, geometry.max_bytes)
+        lock = None
+        key = None
+        if self.has_device() and self.open_device_id is not None:
+            key = self.get_lock_key(self.open_device_id)
+            lock = yield from DeviceLock(key).acquire_steps(self.lock_timeout)
+        store = WriteMethod.get_state_store() if key is not None else None
+        try:
+            if store is not None:
+                digest = store.digest(buf)
+                if WriteMethod.state_store is not None and not force and store.is_unchanged(key, digest):
+                    state = store.count_skipped(key, len(buf))
+                    print("Unchanged since the last upload, nothing written (skipped %d times, %d bytes in total)." % (
+                        state['skipped'], state['bytes_skipped']))
+                    return False
+                store.invalidate(key)  # an interrupted upload leaves unknown data on the device
+            start = time.time()
+            yield from self._write_steps(buf)
+            if store is not None:
+                store.put(key, digest, len(buf))
+        finally:
+            if lock:
+                lock.release()
+        duration = time.time() - start
+        if self.has_device():
+            print("%d bytes written in %.2f s (%.0f bytes/s)" % (len(buf), duration, len(buf) / max(duration, 1e-6)))
+        return True
+
+    @staticmethod
+    def get_state_store():
+        """Returns the ContentStateStore recording the data written to the devices: WriteMethod.state_store, if set,
+        otherwise WriteMethod.default_state_store, which is created in the default directory on first use.
+        """
+        if WriteMethod.state_store is not None:
+            return WriteMethod.state_store
+        if WriteMethod.default_state_store is None:
+            WriteMethod.default_state_store = ContentStateStore()
+        return WriteMethod.default_state_store
 
     @staticmethod
     def add_padding(buf, block_size):
@@ -557,30 +1437,366 @@ class WriteMethod:
 
     def _write(self, buf):
         """Write the given data array to the opened device.
-        This method is to be implemented in your concrete class. It shall write the given data array to the opened
-        device.
+        This method is to be implemented in your concrete class, unless it implements _write_steps(). It shall write
+        the given data array to the opened device. Usually it prepares the device and calls _write_chunks().
         """
         raise NotImplementedError()
 
+    def _write_steps(self, buf):
+        """The concrete write action as a generator for write_steps(). It shall write the given data array to the
+        opened device and yield the seconds to wait instead of waiting itself. Usually it prepares the device and
+        yields from _iter_chunks(). This default just calls _write(), which does the pauses itself by _pause().
+        """
+        self._write(buf)
+        return
+        yield
+
+    def _write_chunks(self, buf, chunk_size=64):
+        """Writes the given data in chunks by _iter_chunks() and does the pauses in between with _pause()."""
+        for seconds in self._iter_chunks(buf, chunk_size):
+            self._pause(seconds)
+
+    def _iter_chunks(self, buf, chunk_size=64):
+        """Writes the given data (any buffer with byte sized items, like array('B') or bytearray) in chunks of
+        chunk_size bytes, each by one or more calls of _send_packet(). The chunks are views into buf, not copies.
+        If report_id is set, each chunk is copied behind the report id into one report buffer allocated once per
+        upload. Short writes are continued with the rest of the chunk. As a report must be sent as a whole, it is
+        sent again in that case. Raises an IOError, if a packet could not be written.
+        It is a generator, which yields the seconds to wait before each chunk, see _get_packet_delay().
+        With a commit_barrier, it is waited for after that before sending the last chunk, see _wait_for_commit().
+        """
+        report = None
+        if self.report_id is not None:
+            report = bytearray(1 + chunk_size)
+            report[0] = self.report_id
+        send_packet = self._send_packet
+        with memoryview(buf) as view:
+            for pos in range(0, len(view), chunk_size):
+                chunk = view[pos:pos + chunk_size]
+                if report is None:
+                    packet = chunk
+                else:
+                    report[1:1 + len(chunk)] = chunk
+                    packet = report if len(chunk) == chunk_size else report[:1 + len(chunk)]
+                committing = self.commit_barrier is not None and pos + chunk_size >= len(view)
+                yield self._get_packet_delay()
+                if committing:
+                    self._wait_for_commit()
+                count = send_packet(packet)
+                if count is not None and count != len(packet):
+                    self._send_rest(packet, count, report is not None, pos)
+                if committing:
+                    self.commit_time = time.time()
+
+    def _get_packet_delay(self):
+        """Returns the seconds to wait before sending the next chunk, 0 by default. Override it in your concrete
+        class, if the device needs a pause between two packets.
+        """
+        return 0
+
+    def _wait_for_commit(self):
+        """Waits at the commit_barrier, until all devices are ready to send their last chunk."""
+        barrier = self.commit_barrier
+        self.commit_barrier = None
+        barrier.wait()
+
+    def _send_rest(self, packet, count, is_report, pos):
+        """Handles a short write of the given packet of _write_chunks(), count is the number of bytes written."""
+        sent = 0
+        retries = 3
+        while True:
+            if count is None:
+                count = len(packet) - sent
+            if count < 0:
+                raise IOError("Writing to the device failed at offset %d" % (pos,))
+            if is_report and count < len(packet):
+                count = 0  # a report is sent as a whole or not at all
+            if count == 0:
+                retries -= 1
+                if retries < 0:
+                    raise IOError("Writing to the device failed at offset %d: short write" % (pos,))
+            sent += count
+            if sent >= len(packet):
+                return
+            self._pause(self._get_packet_delay())
+            count = self._send_packet(packet[sent:] if sent else packet)
+
+    def _pause(self, seconds):
+        """Waits the given time before sending the next packet, by the pause_function, if set."""
+        if self.pause_function is not None:
+            self.pause_function(seconds)
+        elif seconds > 0:
+            time.sleep(seconds)
+
+    def _send_packet(self, packet):
+        """Sends one packet (a bytes-like object) to the opened device.
+        This method is to be implemented in your concrete class, if it uses _write_chunks(). It shall return the
+        number of bytes written, a negative number on errors or None, if the number is not known.
+        """
+        raise NotImplementedError()
+
+
+class DeviceBusyError(IOError):
+    """Raised, if a device is being written by another process and the lock_timeout has expired."""
+    pass
+
+
+class DeviceLock:
+    """An advisory lock of one device across processes, so the chunks of two processes writing to the same device
+    at the same time do not interleave. It is a flock() on a lock file named after the device (see
+    WriteMethod.get_lock_key()) in the directory $LEDNAMEBADGE_LOCK_DIR or the temp directory, shared by all users.
+    Without fcntl (e.g. Windows), it does nothing.
+    """
+    directory = None  # overrides the directory above
+    poll_interval = 0.05
+
+    def __init__(self, key):
+        self.key = key
+        self.fd = None
+
+    @staticmethod
+    def get_directory():
+        """Returns the directory of the lock files."""
+        import tempfile
+        return DeviceLock.directory or os.environ.get('LEDNAMEBADGE_LOCK_DIR') or tempfile.gettempdir()
+
+    def get_path(self):
+        return os.path.join(DeviceLock.get_directory(), 'lednamebadge-%s.lock' % (_safe_name(self.key),))
+
+    def acquire(self, timeout=None, pause=time.sleep):
+        """Waits for the lock up to timeout seconds, as long as needed, if None, or not at all, if 0. Raises a
+        DeviceBusyError, if it is still locked then. While waiting, pause(seconds) is called. Returns self.
+        If the lock file cannot be opened, a warning is printed and the device is used without lock.
+        """
+        steps = self.acquire_steps(timeout)
+        try:
+            while True:
+                try:
+                    seconds = next(steps)
+                except StopIteration as e:
+                    return e.value
+                pause(seconds)
+        finally:
+            steps.close()
+
+    def acquire_steps(self, timeout=None):
+        """Like acquire(), but as a generator, which yields the seconds to wait before trying again."""
+        try:
+            import fcntl
+        except ImportError:
+            return self
+        try:
+            fd = os.open(self.get_path(), os.O_RDONLY | os.O_CREAT | getattr(os, 'O_NOFOLLOW', 0), 0o644)
+        except (IOError, OSError) as e:
+            print("Writing without lock, the lock file is not accessible: %s" % (e,))
+            return self
+        try:
+            # Readable for the other users, whatever the umask, as flock() needs a read-only file only. Not writable,
+            # so they cannot replace its content.
+            os.fchmod(fd, 0o644)
+        except (IOError, OSError, AttributeError):
+            pass
+        deadline = None if timeout is None else time.time() + timeout
+        waiting = False
+        try:
+            while True:
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    self.fd = fd
+                    return self
+                except (IOError, OSError) as e:
+                    import errno
+                    if e.errno not in (errno.EAGAIN, errno.EACCES, errno.EWOULDBLOCK):
+                        raise
+                if deadline is not None and time.time() >= deadline:
+                    raise DeviceBusyError("The device %s is being written by another process." % (self.key,))
+                if not waiting:
+                    print("The device %s is being written by another process, waiting." % (self.key,))
+                    waiting = True
+                yield DeviceLock.poll_interval
+        finally:
+            if self.fd is None:
+                os.close(fd)
+
+    def release(self):
+        """Releases the lock by closing the lock file. The file is not removed, as another process may wait for it."""
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+    def __enter__(self):
+        return self.acquire(WriteMethod.lock_timeout)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+
+class PacingStore:
+    """Persists the calibrated delay between two chunks written to a device, per device (see
+    WriteLibUsb._get_pacing_key()), in a small JSON file, together with the time it was stored. A delay older than
+    max_age seconds is not returned anymore, so it is calibrated again. Errors are ignored, as the delay is
+    recalibrated if missing.
+    """
+    max_age = 30 * 24 * 3600
+
+    def __init__(self, path=None):
+        self.path = path or _user_cache_dir('pacing.json')
+
+    def get(self, key):
+        """Returns the delay in seconds stored for the given key or None, if there is none or it is too old."""
+        entry = self._load().get(key)
+        if not isinstance(entry, dict) or not isinstance(entry.get('delay'), (int, float)):
+            return None  # e.g. of an older format
+        if not time.time() - PacingStore.max_age <= entry.get('time', 0) <= time.time() + 60:
+            return None
+        return entry['delay']
+
+    _lock = threading.Lock()  # devices may be written concurrently, see MultiDeviceWriter
+
+    def put(self, key, delay):
+        """Stores the given delay in seconds for the given key."""
+        import json
+        with PacingStore._lock:
+            delays = self._load()
+            delays[key] = {'delay': delay, 'time': time.time()}
+            _write_file_atomically(self.path, json.dumps(delays, indent=1, sort_keys=True).encode('utf-8'))
+
+    def _load(self):
+        import json
+        try:
+            with open(self.path) as f:
+                delays = json.load(f)
+            return delays if isinstance(delays, dict) else {}
+        except (IOError, OSError, ValueError):
+            return {}
+
+
+class ContentStateStore:
+    """Remembers the data last written to each device, so writing the same data again can be skipped, e.g. when a
+    cron job sends the same messages every minute. The data is compared by its SHA-256 hash, ignoring the date in
+    the header (see BadgeProtocol), which differs with every upload, but is not shown. There is one small JSON file
+    per device (named by WriteMethod.get_lock_key()) in the directory, which also counts the uploads written and
+    skipped. It is read and updated by WriteMethod.write() while holding the DeviceLock of the device. Errors are
+    ignored, the data is written then. Every write is recorded (see WriteMethod.get_state_store()), but unchanged
+    data is skipped only after setting WriteMethod.state_store.
+    The default directory is in the cache directory of the user, like the PacingStore, as files shared by all users
+    could be forged by any of them to make an upload be skipped.
+    """
+    version = 1
+
+    def __init__(self, directory=None):
+        self.directory = directory or _user_cache_dir('state')
+
+    @staticmethod
+    def digest(buf):
+        """Returns the hash of the given data to be written to a device, without the date in the header."""
+        import hashlib
+        with memoryview(buf) as view:
+            h = hashlib.sha256(view[:38])
+            h.update(view[44:])
+        return h.hexdigest()
+
+    def get(self, key):
+        """Returns the state of the device with the given key (see WriteMethod.get_lock_key()) as a dict with the
+        keys 'digest' (of the data last written or None, if unknown), 'written', 'bytes_written', 'skipped' and
+        'bytes_skipped'.
+        """
+        import json
+        state = {'digest': None, 'written': 0, 'bytes_written': 0, 'skipped': 0, 'bytes_skipped': 0}
+        try:
+            with open(self._path(key)) as f:
+                stored = json.load(f)
+            if isinstance(stored, dict) and stored.get('version') == ContentStateStore.version:
+                state.update([(k, stored[k]) for k in state.keys() if k in stored])
+        except (IOError, OSError, ValueError):
+            pass
+        return state
+
+    def is_unchanged(self, key, digest):
+        """Returns True, if the data with the given digest was the last one written completely to the device."""
+        return self.get(key)['digest'] == digest
+
+    def count_skipped(self, key, size):
+        """Counts an upload of size bytes skipped as unchanged. Returns the new state, see get()."""
+        state = self.get(key)
+        state['skipped'] += 1
+        state['bytes_skipped'] += size
+        self._save(key, state)
+        return state
+
+    def invalidate(self, key):
+        """Forgets the data written to the device, e.g. before writing new data."""
+        state = self.get(key)
+        if state['digest'] is not None:
+            state['digest'] = None
+            self._save(key, state)
+
+    def put(self, key, digest, size):
+        """Stores the digest of the data of size bytes written completely to the device."""
+        state = self.get(key)
+        state['digest'] = digest
+        state['written'] += 1
+        state['bytes_written'] += size
+        self._save(key, state)
+
+    def get_stats(self):
+        """Returns a dict with the keys of all devices known and their states as values, see get()."""
+        try:
+            names = sorted(os.listdir(self.directory))
+        except (IOError, OSError):
+            names = []
+        return OrderedDict([(name[:-5], self.get(name[:-5])) for name in names if name.endswith('.json')])
+
+    def _path(self, key):
+        return os.path.join(self.directory, _safe_name(key) + '.json')
+
+    def _save(self, key, state):
+        import json
+        data = json.dumps(dict(state, version=ContentStateStore.version), indent=1, sort_keys=True)
+        _write_file_atomically(self._path(key), data.encode('utf-8'))
+
 
 class WriteLibUsb(WriteMethod):
     """Write to a device using pyusb and libusb. The device ids consist of the bus number, the device number on that bus
     and the endpoint number.
+    The chunks of 64 bytes are paced according to WriteLibUsb.pacing:
+      * 'adaptive' (default): the delay between two chunks is derived from the polling interval (bInterval) and the
+        packet size (wMaxPacketSize) of the endpoint. On the first upload to a device, the time each write takes is
+        measured. The larger of the endpoint interval and the typical write time, times pacing_margin, is stored in
+        the PacingStore as the delay for that device. It is calibrated again after PacingStore.max_age. If a write
+        fails, the conservative pacing is stored for that device and used until then.
+      * 'recalibrate': like 'adaptive', but calibrates again, e.g. if a badge misses parts of the data.
+      * 'conservative': 100 ms before each chunk, like before v0.15, for badges which need it.
     """
-    _module_loaded = False
-    try:
-        import usb.core
-        import usb.util
-        _module_loaded = True
-        print("Module usb.core detected")
-    except:
-        pass
+    pacing = 'adaptive'
+    conservative_delay = 0.1
+    pacing_margin = 1.5
+    write_timeout = 1000  # ms
+    pacing_store = None  # default: PacingStore()
+
+    _module_loaded = None  # None: not tried, yet
+    usb = None
+
+    @staticmethod
+    def _load_module():
+        """Imports pyusb on first use. Returns True, if successful."""
+        if WriteLibUsb._module_loaded is None:
+            try:
+                import usb.core
+                import usb.util
+                WriteLibUsb.usb = usb
+                WriteLibUsb._module_loaded = True
+                print("Module usb.core detected")
+            except:
+                WriteLibUsb._module_loaded = False
+        return WriteLibUsb._module_loaded
 
     def __init__(self):
         WriteMethod.__init__(self)
         self.description = None
         self.dev = None
         self.endpoint = None
+        self.configured = False
 
     def get_name(self):
         return 'libusb'
@@ -597,31 +1813,29 @@ class WriteLibUsb(WriteMethod):
 
     def close(self):
         if self.dev:
-            self.dev.reset()
+            if self.reset_on_close:
+                self.dev.reset()
             WriteLibUsb.usb.util.dispose_resources(self.dev)
         self.description = None
         self.dev = None
         self.endpoint = None
+        self.configured = False
 
     def _get_available_devices(self):
         devs = WriteLibUsb.usb.core.find(idVendor=0x0416, idProduct=0x5020, find_all=True)
         devices = {}
         for d in devs:
+            # Only the descriptors are read here. Detaching the kernel driver and setting the configuration is
+            # deferred to the first write, so listing does not disturb devices in use.
             try:
-                # win32: NotImplementedError: is_kernel_driver_active
-                if d.is_kernel_driver_active(0):
-                    d.detach_kernel_driver(0)
-            except:
-                pass
-            try:
-                d.set_configuration()
-            except WriteLibUsb.usb.core.USBError:
+                manufacturer, product = d.manufacturer, d.product
+            except (WriteLibUsb.usb.core.USBError, ValueError):
                 # TODO: use all the nice output in _find_write_method(), somehow.
                 print("No read access to device list!")
                 LedNameBadge._print_sudo_hints()
                 sys.exit(1)
 
-            cfg = d.get_active_configuration()[0, 0]
+            cfg = d[0][(0, 0)]
             eps = WriteLibUsb.usb.util.find_descriptor(
                 cfg,
                 find_all=True,
@@ -629,53 +1843,141 @@ class WriteLibUsb(WriteMethod):
             for ep in eps:
                 did = "%d:%d:%d" % (d.bus, d.address, ep.bEndpointAddress)
                 descr = ("%s - %s (bus=%d dev=%d endpoint=%d)" %
-                         (d.manufacturer, d.product, d.bus, d.address, ep.bEndpointAddress))
+                         (manufacturer, product, d.bus, d.address, ep.bEndpointAddress))
                 devices[did] = (descr, d, ep)
         return devices
 
+    def get_lock_key(self, device_id):
+        d = self.devices[device_id][1]
+        return "usb-%d-%d" % (d.bus, d.address)
+
     def is_ready(self):
-        return WriteLibUsb._module_loaded
+        return WriteLibUsb._load_module()
 
     def has_device(self):
         return self.dev is not None
 
-    def _write(self, buf):
+    def _write_steps(self, buf):
         if not self.dev:
             return
 
-        try:
-            # win32: NotImplementedError: is_kernel_driver_active
-            if self.dev.is_kernel_driver_active(0):
-                self.dev.detach_kernel_driver(0)
-        except:
-            pass
+        if not self.configured:
+            try:
+                # win32: NotImplementedError: is_kernel_driver_active
+                if self.dev.is_kernel_driver_active(0):
+                    self.dev.detach_kernel_driver(0)
+            except:
+                pass
 
-        try:
-            self.dev.set_configuration()
-        except WriteLibUsb.usb.core.USBError:
-            # TODO: use all the nice output in _find_write_method(), somehow.
-            print("No write access to device!")
-            LedNameBadge._print_sudo_hints()
-            sys.exit(1)
+            try:
+                self.dev.set_configuration()
+            except WriteLibUsb.usb.core.USBError:
+                # TODO: use all the nice output in _find_write_method(), somehow.
+                print("No write access to device!")
+                LedNameBadge._print_sudo_hints()
+                sys.exit(1)
+            self.configured = True
 
         print("Write using %s via libusb" % (self.description,))
-        for i in range(int(len(buf) / 64)):
-            time.sleep(0.1)
-            self.endpoint.write(buf[i * 64:i * 64 + 64])
+        self._pacing_store = WriteLibUsb.pacing_store or PacingStore()
+        self._pacing_key = self._get_pacing_key()
+        interval = self._get_endpoint_interval()
+        if WriteLibUsb.pacing == 'conservative':
+            self._delay = WriteLibUsb.conservative_delay
+        elif WriteLibUsb.pacing == 'recalibrate':
+            self._delay = None
+        else:
+            self._delay = self._pacing_store.get(self._pacing_key)
+        self._calibrating = self._delay is None
+        if self._calibrating:
+            self._delay = interval
+        self._durations = []
+        yield from self._iter_chunks(buf)
+        if self._calibrating and self._durations:
+            self._pacing_store.put(self._pacing_key, self._get_calibrated_delay(interval))
+
+    def _get_calibrated_delay(self, interval):
+        """Returns the delay to store after calibrating: not less than the endpoint interval or the typical (median)
+        time a write has taken, with a margin, but not more than the conservative delay.
+        """
+        durations = sorted(self._durations)
+        typical = durations[len(durations) // 2]
+        return min(WriteLibUsb.conservative_delay, max(interval, typical) * WriteLibUsb.pacing_margin)
+
+    def _get_packet_delay(self):
+        if self._durations or WriteLibUsb.pacing == 'conservative':
+            return self._delay
+        return 0
+
+    def _send_packet(self, packet):
+        start = time.time()
+        try:
+            count = self.endpoint.write(packet, WriteLibUsb.write_timeout)
+        except WriteLibUsb.usb.core.USBError as e:
+            if self._delay >= WriteLibUsb.conservative_delay:
+                raise
+            print("Write failed (%s), switching to conservative pacing for this device." % (e,))
+            self._delay = WriteLibUsb.conservative_delay
+            self._pacing_store.put(self._pacing_key, self._delay)
+            self._calibrating = False
+            self._pause(self._delay)
+            start = time.time()
+            count = self.endpoint.write(packet, WriteLibUsb.write_timeout)
+        self._durations.append(time.time() - start)
+        return count
+
+    def _get_pacing_key(self):
+        """Returns the key of the device in the PacingStore: its type (vendor id, product id and release number) and
+        where it is connected (bus and port numbers, if known, otherwise bus and device number).
+        """
+        try:
+            device_type = "%04x:%04x:%04x" % (self.dev.idVendor, self.dev.idProduct, self.dev.bcdDevice)
+        except (AttributeError, TypeError):
+            device_type = "0416:5020"
+        try:
+            ports = getattr(self.dev, 'port_numbers', None)
+            if isinstance(ports, (tuple, list)) and ports:
+                return "%s@%d-%s" % (device_type, self.dev.bus, '.'.join(["%d" % (p,) for p in ports]))
+            return "%s@%d:%d" % (device_type, self.dev.bus, self.dev.address)
+        except (AttributeError, TypeError):
+            return device_type
+
+    def _get_endpoint_interval(self):
+        """Returns the time in seconds the device needs to poll one chunk of 64 bytes from the endpoint. For a full
+        speed interrupt endpoint, bInterval is the polling interval in milliseconds and one packet of up to
+        wMaxPacketSize bytes is transferred per interval.
+        """
+        try:
+            packet_size = max(1, min(64, int(self.endpoint.wMaxPacketSize)))
+            interval = max(1, int(self.endpoint.bInterval))
+        except (AttributeError, TypeError, ValueError):
+            return WriteLibUsb.conservative_delay
+        return ((64 + packet_size - 1) // packet_size) * interval / 1000.0
 
 
 class WriteUsbHidApi(WriteMethod):
     """Write to a device connected to USB using pyhidapi and libhidapi. The device ids are simply the device paths as
     used by libhidapi.
     """
-    _module_loaded = False
-    try:
-        import pyhidapi
-        pyhidapi.hid_init()
-        _module_loaded = True
-        print("Module pyhidapi detected")
-    except:
-        pass
+    _module_loaded = None  # None: not tried, yet
+    pyhidapi = None
+
+    @staticmethod
+    def _load_module():
+        """Imports and initializes pyhidapi on first use. Returns True, if successful."""
+        if WriteUsbHidApi._module_loaded is None:
+            try:
+                import pyhidapi
+                pyhidapi.hid_init()
+                WriteUsbHidApi.pyhidapi = pyhidapi
+                WriteUsbHidApi._module_loaded = True
+                print("Module pyhidapi detected")
+            except:
+                WriteUsbHidApi._module_loaded = False
+        return WriteUsbHidApi._module_loaded
+
+    # The packets must contain the "report ID" as first byte. "0" does the job here.
+    report_id = 0
 
     def __init__(self):
         WriteMethod.__init__(self)
@@ -714,52 +2016,221 @@ class WriteUsbHidApi(WriteMethod):
             devices[did] = (descr, d.path)
         return devices
 
+    def get_lock_key(self, device_id):
+        # libhidapi-hidraw: /dev/hidrawN, libhidapi-libusb: bus:device:interface in hex
+        if device_id.startswith('/dev/hidraw'):
+            return WriteHidraw.get_usb_lock_key(os.path.basename(device_id))
+        m = re.match(r'^([0-9a-fA-F]{4}):([0-9a-fA-F]{4}):[0-9a-fA-F]+$', device_id)
+        if m:
+            return "usb-%d-%d" % (int(m.group(1), 16), int(m.group(2), 16))
+        return WriteMethod.get_lock_key(self, device_id)
+
     def is_ready(self):
-        return WriteUsbHidApi._module_loaded
+        return WriteUsbHidApi._load_module()
 
     def has_device(self):
         return self.dev is not None
 
-    def _write(self, buf):
+    def _write_steps(self, buf):
         if not self.dev:
             return
 
         print("Write using [%s] via hidapi" % (self.description,))
-        for i in range(int(len(buf) / 64)):
-            # sendbuf must contain "report ID" as first byte. "0" does the job here.
-            sendbuf = array('B', [0])
-            # Then, put the 64 payload bytes into the buffer
-            sendbuf.extend(buf[i * 64:i * 64 + 64])
-            WriteUsbHidApi.pyhidapi.hid_write(self.dev, sendbuf)
+        yield from self._iter_chunks(buf)
 
+    def _send_packet(self, packet):
+        return WriteUsbHidApi.pyhidapi.hid_write(self.dev, packet)
 
-class LedNameBadge:
-    _protocol_header_template = (
-        0x77, 0x61, 0x6e, 0x67, 0x00, 0x00, 0x00, 0x00, 0x40, 0x40, 0x40, 0x40, 0x40, 0x40, 0x40, 0x40,
-        0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00,
-        0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00,
-        0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00
-    )
+
+class WriteHidraw(WriteMethod):
+    """Write to a device using the Linux hidraw driver directly, without any package or library. The devices are
+    found via /sys/class/hidraw/*/device/uevent and written by os.write() to /dev/hidrawN. The device ids are the
+    names of the hidraw nodes, e.g. 'hidraw3'. The directories may be changed to use a fake sysfs and /dev.
+    """
+    sysfs_root = '/sys'
+    dev_root = '/dev'
+    # Each report written to a hidraw node starts with the report number. "0" does the job here.
+    report_id = 0
+    _hid_id = "%08X:%08X" % (0x0416, 0x5020)
+
+    def __init__(self):
+        WriteMethod.__init__(self)
+        self.description = None
+        self.fd = None
+
+    def get_name(self):
+        return 'hidraw'
+
+    def get_description(self):
+        return 'Program a device connected via USB using the Linux hidraw driver, without additional packages.'
+
+    def _open(self, device_id):
+        self.description = self.devices[device_id][0]
+        try:
+            self.fd = os.open(self.devices[device_id][1], os.O_WRONLY)
+        except (IOError, OSError) as e:
+            print("No write access to device %s: %s" % (self.devices[device_id][1], e))
+            LedNameBadge._print_sudo_hints()
+            return False
+        print("Hidraw device initialized")
+        return True
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+        self.description = None
+        self.fd = None
+
+    def _get_available_devices(self):
+        directory = os.path.join(WriteHidraw.sysfs_root, 'class', 'hidraw')
+        devices = {}
+        for name in sorted(os.listdir(directory)):
+            uevent = {}
+            try:
+                with open(os.path.join(directory, name, 'device', 'uevent')) as f:
+                    for line in f:
+                        key, _, value = line.strip().partition('=')
+                        uevent[key] = value
+            except (IOError, OSError):
+                continue
+            # HID_ID is bus:vendor:product, e.g. 0003:00000416:00005020
+            if uevent.get('HID_ID', '').upper().endswith(WriteHidraw._hid_id):
+                descr = "%s (%s %s)" % (uevent.get('HID_NAME', '?'), name, uevent.get('HID_PHYS', ''))
+                devices[name] = (descr.replace(' )', ')'), os.path.join(WriteHidraw.dev_root, name))
+        return devices
+
+    def get_lock_key(self, device_id):
+        return WriteHidraw.get_usb_lock_key(device_id)
 
     @staticmethod
-    def header(lengths, speeds, modes, blinks, ants, brightness=100, date=datetime.now()):
-        """Create a protocol header
-            * length, speeds, modes, blinks, ants are iterables with at least one element
-            * lengths[0] is the number of chars/byte-columns of the first text/bitmap, lengths[1] of the second,
-              and so on...
-            * len(length) should match the designated bitmap data
-            * speeds come in as 1..8, but will be decremented to 0..7, here.
-            * modes: 0..8
-            * blinks and ants: 0..1 or even False...True,
-            * brightness, if given, is any number, but it'll be limited to 25, 50, 75, 100 (percent), here
-            * date, if given, is a datetime object. It will be written in the header, but is not to be seen on the
-              devices screen.
+    def get_usb_lock_key(name):
+        """Returns the lock key of the hidraw node with the given name by the bus and device number of its USB device,
+        like WriteLibUsb does. The USB device is the first parent directory in sysfs having these attributes.
         """
+        path = os.path.realpath(os.path.join(WriteHidraw.sysfs_root, 'class', 'hidraw', name, 'device'))
+        while len(path) > len(WriteHidraw.sysfs_root):
+            try:
+                with open(os.path.join(path, 'busnum')) as f:
+                    busnum = int(f.read().strip())
+                with open(os.path.join(path, 'devnum')) as f:
+                    devnum = int(f.read().strip())
+                return "usb-%d-%d" % (busnum, devnum)
+            except (IOError, OSError, ValueError):
+                path = os.path.dirname(path)
+        return "hidraw-%s" % (name,)
+
+    def is_ready(self):
+        return sys.platform.startswith('linux') and os.path.isdir(os.path.join(WriteHidraw.sysfs_root, 'class',
+                                                                               'hidraw'))
+
+    def has_device(self):
+        return self.fd is not None
+
+    def _write_steps(self, buf):
+        if self.fd is None:
+            return
+
+        print("Write using [%s] via hidraw" % (self.description,))
+        yield from self._iter_chunks(buf)
+
+    def _send_packet(self, packet):
+        return os.write(self.fd, packet)
+
+
+class WriteMethodRegistry:
+    """The registry of the write methods. The built-in ones are registered in the order they are tried with 'auto'.
+    Other packages may provide write methods (subclasses of WriteMethod) by an entry point in the group
+    'lednamebadge.write_methods', named like the method, e.g. in setup.py:
+
+        entry_points={'lednamebadge.write_methods': ['bluetooth = badge_bt.write:WriteBluetooth']}
+
+    These are listed with -M list, but imported only if selected by name. They are not tried with 'auto'. Write
+    methods registered with register() in the running program are, if auto_order is True.
+    """
+    entry_point_group = 'lednamebadge.write_methods'
+    _methods = OrderedDict()  # name -> (class, auto_order)
+    _entry_points = None
+
+    @staticmethod
+    def register(name, method_class, auto_order=True):
+        """Registers the given subclass of WriteMethod under the given name, which should be its get_name()."""
+        WriteMethodRegistry._methods[name] = (method_class, auto_order)
+
+    @staticmethod
+    def create_auto_order():
+        """Returns new objects of all registered write methods to be tried with 'auto', in that order."""
+        return [c() for c, auto_order in WriteMethodRegistry._methods.values() if auto_order]
+
+    @staticmethod
+    def create(name):
+        """Returns a new object of the write method with the given name, which is imported via its entry point, if
+        needed. Returns None, if there is no such write method.
+        """
+        if name in WriteMethodRegistry._methods:
+            return WriteMethodRegistry._methods[name][0]()
+        entry_point = WriteMethodRegistry.get_entry_points().get(name)
+        if entry_point is None:
+            return None
+        WriteMethodRegistry.register(name, entry_point.load(), False)
+        return WriteMethodRegistry._methods[name][0]()
+
+    @staticmethod
+    def get_entry_points():
+        """Returns a dict with the names and entry points of the write methods provided by other packages, which are
+        not imported, yet.
+        """
+        if WriteMethodRegistry._entry_points is None:
+            entry_points = []
+            try:
+                from importlib import metadata
+                all_entry_points = metadata.entry_points()
+                if hasattr(all_entry_points, 'select'):
+                    entry_points = all_entry_points.select(group=WriteMethodRegistry.entry_point_group)
+                else:
+                    entry_points = all_entry_points.get(WriteMethodRegistry.entry_point_group, [])
+            except ImportError:
+                pass
+            WriteMethodRegistry._entry_points = {ep.name: ep for ep in entry_points}
+        return {name: ep for name, ep in WriteMethodRegistry._entry_points.items()
+                if name not in WriteMethodRegistry._methods}
+
+
+WriteMethodRegistry.register('hidapi', WriteUsbHidApi)
+WriteMethodRegistry.register('libusb', WriteLibUsb)
+WriteMethodRegistry.register('hidraw', WriteHidraw)
+
+
+class BadgeProtocol:
+    """Encoder and decoder of the data written to the device. It consists of a header of 64 bytes, followed by the
+    bitmap data of all messages, one after the other, padded to a multiple of 64 bytes:
+      0..3   'wang'
+      4      0
+      5      brightness: 0x00 = 100%, 0x10 = 75%, 0x20 = 50%, 0x40 = 25%
+      6      blink flags, one bit per message
+      7      ants flags (animated border), one bit per message
+      8..15  per message: speed (0..7) in the upper, mode (0..8) in the lower nibble
+      16..31 per message: length in byte-columns, 16 bit big endian
+      32..37 0
+      38..43 date: year % 100, month, day, hour, minute, second
+      44..63 0
+    """
+    header_struct = struct.Struct('>4sxBBB8B8H6x6B20x')
+    magic = b'wang'
+    _brightness_codes = ((25, 0x40), (50, 0x20), (75, 0x10), (100, 0x00))
+    _zeros = (0,) * 8
+
+    @staticmethod
+    def encode_header_into(buf, offset, lengths, speeds, modes, blinks, ants, brightness=100, date=None,
+                           geometry=None):
+        """Writes the header into the writable buffer buf (e.g. a bytearray) at the given offset. For the
+            parameters see LedNameBadge.header().
+        """
+        geometry = geometry or DisplayGeometry.known['11x44']
         try:
             lengths_sum = sum(lengths)
         except:
             raise TypeError("Please give a list or tuple with at least one number: " + str(lengths))
-        if lengths_sum > (8192 - len(LedNameBadge._protocol_header_template)) / 11 + 1:
+        if lengths_sum > geometry.get_capacity() or len(lengths) > 8:
             raise ValueError("The given lengths seem to be far too high: " + str(lengths))
 
         ants = LedNameBadge._prepare_iterable(ants, 0, 1)
@@ -767,40 +2238,112 @@ class LedNameBadge:
         speeds = LedNameBadge._prepare_iterable(speeds, 1, 8)
         modes = LedNameBadge._prepare_iterable(modes, 0, 8)
 
-        speeds = [x - 1 for x in speeds]
+        brightness_code = 0x00
+        for limit, code in BadgeProtocol._brightness_codes:
+            if brightness <= limit:
+                brightness_code = code
+                break
 
-        h = list(LedNameBadge._protocol_header_template)
+        if date is None:
+            date = datetime.now()
+        try:
+            date_fields = (date.year % 100, date.month, date.day, date.hour, date.minute, date.second)
+        except:
+            raise TypeError("Please give a datetime object: " + str(date))
 
-        if brightness <= 25:
-            h[5] = 0x40
-        elif brightness <= 50:
-            h[5] = 0x20
-        elif brightness <= 75:
-            h[5] = 0x10
-        # else default 100% == 0x00
+        fields = [16 * (s - 1) + m for s, m in zip(speeds, modes)]
+        fields.extend(lengths)
+        fields.extend(BadgeProtocol._zeros[:8 - len(lengths)])
+        fields.extend(date_fields)
+        BadgeProtocol.header_struct.pack_into(
+            buf, offset, BadgeProtocol.magic, brightness_code,
+            blinks[0] | blinks[1] << 1 | blinks[2] << 2 | blinks[3] << 3 |
+            blinks[4] << 4 | blinks[5] << 5 | blinks[6] << 6 | blinks[7] << 7,
+            ants[0] | ants[1] << 1 | ants[2] << 2 | ants[3] << 3 |
+            ants[4] << 4 | ants[5] << 5 | ants[6] << 6 | ants[7] << 7,
+            *fields)
 
-        for i in range(8):
-            h[6] += blinks[i] << i
-            h[7] += ants[i] << i
+    @staticmethod
+    def encode(bitmaps, speeds, modes, blinks, ants, brightness=100, date=None, geometry=None):
+        """Returns a bytearray with the complete data to be written to the device: the header and the bitmap data
+            of the given bitmaps (a list of tuples (buffer, length_in_byte_columns) as returned by
+            SimpleTextAndIcons.bitmap()), padded to a multiple of 64 bytes. The buffer is allocated once and
+            filled in place. For the other parameters see LedNameBadge.header().
+        """
+        size = LedNameBadge.header_size + sum([len(b[0]) for b in bitmaps])
+        buf = bytearray(size + -size % 64)
+        BadgeProtocol.encode_header_into(buf, 0, [b[1] for b in bitmaps], speeds, modes, blinks, ants, brightness,
+                                         date, geometry)
+        pos = LedNameBadge.header_size
+        for b in bitmaps:
+            buf[pos:pos + len(b[0])] = b[0]
+            pos += len(b[0])
+        return buf
 
-        for i in range(8):
-            h[8 + i] = 16 * speeds[i] + modes[i]
+    @staticmethod
+    def decode(buf, geometry=None):
+        """Returns the content of the given data (as written to the device) as a dict with the keys 'brightness'
+            (25, 50, 75, 100), 'date' (a datetime object or None) and 'messages': a list with one dict per message
+            with the keys 'speed' (1..8), 'mode', 'blink', 'ants' and 'bitmap', which is a tuple of
+            (buffer, length_in_byte_columns). The messages are listed up to the last one with a length > 0, but at
+            least the first one, so empty slots in between are kept.
+            geometry is the DisplayGeometry of the badge, default 11x44. Raises a ValueError for invalid data.
+        """
+        geometry = geometry or DisplayGeometry.known['11x44']
+        if len(buf) < LedNameBadge.header_size:
+            raise ValueError("Data too short for a header: %d bytes" % (len(buf),))
+        fields = BadgeProtocol.header_struct.unpack_from(bytes(buf[:LedNameBadge.header_size]))
+        if fields[0] != BadgeProtocol.magic:
+            raise ValueError("No valid header, it starts with %r" % (fields[0],))
+        brightness_code, blinks, ants = fields[1:4]
+        speed_modes, lengths, date_fields = fields[4:12], fields[12:20], fields[20:26]
+
+        brightness = 100
+        for limit, code in BadgeProtocol._brightness_codes:
+            if brightness_code == code:
+                brightness = limit
+        try:
+            date = datetime(2000 + date_fields[0], *date_fields[1:])
+        except ValueError:
+            date = None
+
+        messages = []
+        pos = LedNameBadge.header_size
+        for i in range(max([1] + [i + 1 for i in range(8) if lengths[i]])):
+            size = lengths[i] * geometry.rows
+            if pos + size > len(buf):
+                raise ValueError("Data too short for message %d: %d bytes missing" % (i + 1, pos + size - len(buf)))
+            messages.append({'speed': (speed_modes[i] >> 4) + 1,
+                             'mode': speed_modes[i] & 0x0f,
+                             'blink': blinks >> i & 1,
+                             'ants': ants >> i & 1,
+                             'bitmap': (array('B', bytes(buf[pos:pos + size])), lengths[i])})
+            pos += size
+        return {'brightness': brightness, 'date': date, 'messages': messages}
 
-        for i in range(len(lengths)):
-            h[17 + (2 * i) - 1] = lengths[i] // 256
-            h[17 + (2 * i)] = lengths[i] % 256
 
-        try:
-            h[38 + 0] = date.year % 100
-            h[38 + 1] = date.month
-            h[38 + 2] = date.day
-            h[38 + 3] = date.hour
-            h[38 + 4] = date.minute
-            h[38 + 5] = date.second
-        except:
-            raise TypeError("Please give a datetime object: " + str(date))
+class LedNameBadge:
+    header_size = 64
 
-        return h
+    @staticmethod
+    def header(lengths, speeds, modes, blinks, ants, brightness=100, date=None, geometry=None):
+        """Create a protocol header
+            * length, speeds, modes, blinks, ants are iterables with at least one element
+            * lengths[0] is the number of chars/byte-columns of the first text/bitmap, lengths[1] of the second,
+              and so on...
+            * len(length) should match the designated bitmap data
+            * speeds come in as 1..8, but will be decremented to 0..7, here.
+            * modes: 0..8
+            * blinks and ants: 0..1 or even False...True,
+            * brightness, if given, is any number, but it'll be limited to 25, 50, 75, 100 (percent), here
+            * date, if given, is a datetime object, default is now. It will be written in the header, but is not to
+              be seen on the devices screen.
+            * geometry, if given, is the DisplayGeometry of the badge (default 11x44), which limits the lengths.
+            See BadgeProtocol for encoding complete data, including the bitmaps.
+        """
+        h = bytearray(LedNameBadge.header_size)
+        BadgeProtocol.encode_header_into(h, 0, lengths, speeds, modes, blinks, ants, brightness, date, geometry)
+        return list(h)
 
     @staticmethod
     def _prepare_iterable(iterable, min_, max_):
@@ -812,7 +2355,7 @@ class LedNameBadge:
             raise TypeError("Please give a list or tuple with at least one number: " + str(iterable))
 
     @staticmethod
-    def write(buf, method='auto', device_id='auto'):
+    def write(buf, method='auto', device_id='auto', geometry=None, synchronized=False, force=False):
         """Write the given buffer to the given device.
             It has to begin with a protocol header as provided by header() and followed by the bitmap data.
             In short: the bitmap data is organized in bytes with 8 horizontal pixels per byte and 11 resp. 12
@@ -821,11 +2364,21 @@ class LedNameBadge:
             The two optional parameters specify the write method and device, which shall be programmed. See
             get_available_methods() and get_available_device_ids(). There are two special values each: 'list'
             will print the implemented / available write methods resp. the available devices, 'auto' (default) will
-            choose an appropriate write method resp. the first device found.
+            choose an appropriate write method resp. the first device found. The device id 'all' writes to all
+            devices found with the write method concurrently, see MultiDeviceWriter, synchronized if requested. Then
+            a report is printed and the list of results per device is returned.
+            The optional geometry is the DisplayGeometry of the badge (default 11x44), which limits the buffer size.
+            With a WriteMethod.state_store (as the command line does by default), a device is not written, if it got
+            the same data last time, unless force is True. See ContentStateStore.
         """
         write_method = LedNameBadge._find_write_method(method, device_id)
+        if write_method and device_id == 'all':
+            start = time.time()
+            results = MultiDeviceWriter(write_method, synchronized=synchronized, force=force).write(buf, geometry)
+            MultiDeviceWriter.print_report(results, time.time() - start)
+            return results
         if write_method:
-            write_method.write(buf)
+            write_method.write(buf, geometry, force)
             write_method.close()
 
     @staticmethod
@@ -844,10 +2397,9 @@ class LedNameBadge:
         """Returns all devices available via the given write method as a dict. Each entry has the device id as the key
         and the device description as the value. The device id can be used as a parameter value for write().
         """
-        auto_order_methods = LedNameBadge._get_auto_order_method_list()
-        wanted_method = [m for m in auto_order_methods if m.get_name() == method]
+        wanted_method = WriteMethodRegistry.create(method)
         if wanted_method:
-            return wanted_method[0].get_available_devices()
+            return wanted_method.get_available_devices()
         return []
 
     @staticmethod
@@ -859,15 +2411,22 @@ class LedNameBadge:
         auto_order_methods = LedNameBadge._get_auto_order_method_list()
         hidapi = [m for m in auto_order_methods if m.get_name() == 'hidapi'][0]
         libusb = [m for m in auto_order_methods if m.get_name() == 'libusb'][0]
+        hidraw = [m for m in auto_order_methods if m.get_name() == 'hidraw'][0]
 
         if method == 'list':
             LedNameBadge._print_available_methods(auto_order_methods)
             sys.exit(0)
 
         if method not in [m.get_name() for m in auto_order_methods] and method != 'auto':
-            print("Unknown write method '%s'." % (method,))
-            LedNameBadge._print_available_methods(auto_order_methods)
-            sys.exit(1)
+            selected = WriteMethodRegistry.create(method)
+            if not selected:
+                print("Unknown write method '%s'." % (method,))
+                LedNameBadge._print_available_methods(auto_order_methods)
+                sys.exit(1)
+            if not selected.is_ready():
+                print("The write method '%s' is not possible to be used: %s" % (method, selected.get_description()))
+                sys.exit(1)
+            auto_order_methods.append(selected)
 
         if method == 'auto':
             if sys.version_info[0] < 3:
@@ -880,7 +2439,7 @@ class LedNameBadge:
             elif sys.platform.startswith('win'):
                 method = libusb.get_name()
                 print("Selected method %s with Windows" % (libusb.get_name(),))
-            elif not libusb.is_ready() and not hidapi.is_ready():
+            elif not libusb.is_ready() and not hidapi.is_ready() and not hidraw.is_ready():
                 if sys.version_info[0] < 3 or sys.platform.startswith('win'):
                     LedNameBadge._print_libusb_install_hints(libusb.get_name())
                     sys.exit(1)
@@ -893,6 +2452,10 @@ class LedNameBadge:
                     LedNameBadge._print_hidapi_install_hints(hidapi.get_name())
                     sys.exit(1)
 
+        if method == hidraw.get_name() and not hidraw.is_ready():
+            print("The method %s is only available with Linux and its hidraw driver." % (hidraw.get_name(),))
+            sys.exit(1)
+
         if method == libusb.get_name():
             if sys.platform.startswith('darwin'):
                 print("For MacOs, please use method '%s' or 'auto'." % (hidapi.get_name(),))
@@ -917,6 +2480,7 @@ class LedNameBadge:
                 print("Or help us implementing support for Windows.")
                 # But it is not forbidden
 
+        DeviceRegistry([m for m in auto_order_methods if method == 'auto' or method == m.get_name()]).enumerate()
         first_method_found = None
         for m in auto_order_methods:
             if method == 'auto' or method == m.get_name():
@@ -925,6 +2489,10 @@ class LedNameBadge:
                 if device_id == 'list':
                     LedNameBadge._print_available_devices(m)
                     sys.exit(0)
+                elif device_id == 'all':
+                    # Not opened, each device is opened by its own write method object, see MultiDeviceWriter
+                    if m.is_device_present():
+                        return m
                 elif m.open(device_id):
                     return m
 
@@ -945,7 +2513,7 @@ class LedNameBadge:
 
     @staticmethod
     def _get_auto_order_method_list():
-        return [WriteUsbHidApi(), WriteLibUsb()]
+        return WriteMethodRegistry.create_auto_order()
 
     @staticmethod
     def _print_available_methods(methods):
@@ -953,6 +2521,8 @@ class LedNameBadge:
         print("  'auto': selects the most appropriate of the available methods (default)")
         for m in methods:
             LedNameBadge._print_one_method(m)
+        for name, entry_point in sorted(WriteMethodRegistry.get_entry_points().items()):
+            print("  '%s': provided by %s" % (name, entry_point.value))
 
     @staticmethod
     def _print_one_method(m):
@@ -1026,12 +2596,736 @@ class LedNameBadge:
             print("* Best: add a udev rule like described in README.md.")
 
 
+class DeviceRegistry:
+    """Enumerates the devices of several write methods at once, each one in its own thread, as enumerating may take
+    a while with many devices connected. Each write method enumerates only once, afterwards its devices are taken
+    from the write method object itself (see WriteMethod.get_available_devices()).
+    """
+
+    def __init__(self, methods):
+        self.methods = [m for m in methods if m.is_ready()]
+
+    def enumerate(self):
+        """Enumerates the devices of all ready write methods concurrently and returns a dict with the method names as
+        keys and the dicts of get_available_devices() as values. An exception raised while enumerating (including
+        SystemExit) is raised again, here.
+        """
+        errors = []
+
+        def probe(m):
+            try:
+                m.get_available_devices()
+            except BaseException as e:
+                errors.append(e)
+
+        pending = [m for m in self.methods if m.needs_enumeration()]
+        if len(pending) == 1:
+            probe(pending[0])
+        else:
+            threads = [threading.Thread(target=probe, args=(m,)) for m in pending]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        if errors:
+            raise errors[0]
+        return {m.get_name(): m.get_available_devices() for m in self.methods}
+
+
+class SysfsUsbBackend:
+    """Lists the connected USB devices with a given vendor and product id by reading the Linux sysfs, without any
+    library. The attributes of a device are read only once, when it appears (resp. when its device number changes
+    because of replugging it). The root directory may be changed to use a fake sysfs tree.
+    """
+
+    def __init__(self, root='/sys', vendor_id=0x0416, product_id=0x5020):
+        self.directory = os.path.join(root, 'bus', 'usb', 'devices')
+        self.ids = ("%04x" % (vendor_id,), "%04x" % (product_id,))
+        self._known = {}  # sysfs name -> device dict or None, if not matching
+
+    def is_available(self):
+        return os.path.isdir(self.directory)
+
+    def scan(self):
+        """Returns a dict with the sysfs names (e.g. '3-4.1') of the matching devices as keys and dicts with their
+        'busnum', 'devnum', 'manufacturer', 'product' and 'path' as values.
+        """
+        try:
+            names = os.listdir(self.directory)
+        except (IOError, OSError):
+            names = []
+        known = {}
+        for name in names:
+            if ':' in name:
+                continue  # interface, not a device
+            info = self._known.get(name, False)
+            if info and self._read(info['path'], 'devnum') != str(info['devnum']):
+                info = False  # replugged since the last scan
+            known[name] = self._read_device(name) if info is False else info
+        self._known = known
+        return {name: info for name, info in known.items() if info}
+
+    def _read_device(self, name):
+        path = os.path.join(self.directory, name)
+        if (self._read(path, 'idVendor'), self._read(path, 'idProduct')) != self.ids:
+            return None
+        try:
+            return {'busnum': int(self._read(path, 'busnum')),
+                    'devnum': int(self._read(path, 'devnum')),
+                    'manufacturer': self._read(path, 'manufacturer'),
+                    'product': self._read(path, 'product'),
+                    'path': path}
+        except (TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def _read(path, attribute):
+        try:
+            with open(os.path.join(path, attribute)) as f:
+                return f.read().strip()
+        except (IOError, OSError):
+            return None
+
+
+class HotplugWatcher:
+    """Keeps a table of the connected devices up to date, by polling a backend (default: SysfsUsbBackend) in a
+    thread. Listeners added with add_listener() are called with ('add' or 'remove', sysfs name, device dict) from
+    that thread. The generation counts the changes, so others can tell cheaply, whether something has changed.
+    Setting it as WriteMethod.hotplug makes the write methods enumerate again only after a change:
+
+        watcher = HotplugWatcher().start()
+        WriteMethod.hotplug = watcher
+    """
+
+    def __init__(self, backend=None, interval=0.5):
+        self.backend = backend or SysfsUsbBackend()
+        self.interval = interval
+        self.generation = 0
+        self._devices = {}
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def add_listener(self, listener):
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        self._listeners.remove(listener)
+
+    def get_devices(self):
+        """Returns the current table as a dict, see SysfsUsbBackend.scan(). It is replaced, not modified on changes."""
+        return self._devices
+
+    def poll(self):
+        """Scans the backend once, updates the table and notifies the listeners. Returns the list of events as
+        tuples of ('add' or 'remove', sysfs name, device dict).
+        """
+        with self._lock:
+            old = self._devices
+            new = self.backend.scan()
+            events = [('remove', name, old[name]) for name in sorted(old) if name not in new or new[name] != old[name]]
+            events += [('add', name, new[name]) for name in sorted(new) if name not in old or new[name] != old[name]]
+            if events:
+                self._devices = new
+                self.generation += 1
+        for event in events:
+            for listener in list(self._listeners):
+                listener(*event)
+        return events
+
+    def start(self):
+        """Polls once and then keeps polling in a daemon thread, until stop() is called. Returns self."""
+        self.poll()
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='HotplugWatcher')
+            self._thread.daemon = True
+            self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.poll()
+
+
+class BadgeSession:
+    """A connection to one device, which stays open for many uploads. The device is selected like with
+    LedNameBadge.write(), but only once, when the session is opened. Afterwards, each write() just sends the data.
+    With libusb, the kernel driver is detached and the configuration is set once, and the device is not reset on
+    close, unless reset_on_close is True. Use it as a context manager:
+
+        with BadgeSession() as session:
+            while True:
+                session.write(buf)
+                time.sleep(5)
+    """
+
+    def __init__(self, method='auto', device_id='auto', geometry=None, reset_on_close=False):
+        """method, device_id and geometry are like with LedNameBadge.write()"""
+        self.method = method
+        self.device_id = device_id
+        self.geometry = geometry
+        self.reset_on_close = reset_on_close
+        self.write_method = None
+
+    def open(self):
+        """Selects and opens the device. Like LedNameBadge.write(), it prints hints and exits, if there is none.
+        Raises an IOError for the method 'list' and the device ids 'list' and 'all', as a session is for one device.
+        """
+        if self.write_method is None:
+            if self.method == 'list' or self.device_id in ('list', 'all'):
+                raise IOError("A session needs one device, not write method '%s' and device id '%s'." % (
+                    self.method, self.device_id))
+            write_method = LedNameBadge._find_write_method(self.method, self.device_id)
+            if write_method is None:
+                raise IOError("The device is not available with write method '%s' and device id '%s'." % (
+                    self.method, self.device_id))
+            write_method.reset_on_close = self.reset_on_close
+            self.write_method = write_method
+        return self
+
+    def write(self, buf, force=False):
+        """Writes the given buffer to the device like LedNameBadge.write(). Opens the session, if not done, yet.
+        Returns False, if skipped as unchanged, see WriteMethod.write()."""
+        self.open()
+        return self.write_method.write(buf, self.geometry, force)
+
+    def close(self):
+        """Closes the device. The session may be opened again afterwards."""
+        if self.write_method is not None:
+            self.write_method.close()
+            self.write_method = None
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class MultiDeviceWriter:
+    """Writes the same data to all devices of a write method concurrently. Each device is opened and written by its
+    own write method object in a pool of threads, so the total time is about the time of the slowest device instead
+    of the sum of all. A failing device does not stop the others. It is used by LedNameBadge.write() with the
+    device id 'all'.
+
+    If synchronized, each device gets all but the last chunk of its data, then all wait at a barrier and send their
+    last chunk together. A badge starts showing the new data only after the last chunk, so they all start at about
+    the same time, e.g. for one banner split over several badges (see write_each()). The time the last chunk was
+    sent is reported per device. A device failing before the barrier does not hold back the others, but if one is
+    not ready within commit_timeout seconds, none commits. The devices are skipped as unchanged (see
+    ContentStateStore) only if all of them are, otherwise all are written, so they start showing the data together.
+    """
+
+    def __init__(self, write_method, max_workers=None, synchronized=False, commit_timeout=60, force=False):
+        """write_method is the write method object, whose devices are to be written. It is used for the enumeration
+        only, see DeviceRegistry, but not opened. max_workers limits the number of threads, default is one per device.
+        It is ignored if synchronized, as all devices must be written at the same time, then. force is passed to
+        WriteMethod.write().
+        """
+        self.write_method = write_method
+        self.max_workers = max_workers
+        self.synchronized = synchronized
+        self.commit_timeout = commit_timeout
+        self.force = force
+
+    def write(self, buf, geometry=None):
+        """Writes the given buffer to all devices like LedNameBadge.write(). Returns a list with one dict per device,
+        sorted by the device ids, with the keys 'method', 'device_id', 'description', 'ok', 'error' (the error
+        message, if not ok, otherwise None), 'seconds' (the time for opening, writing and closing the device),
+        'commit_time' (the time.time() the last chunk was sent, if synchronized, otherwise None) and 'skipped' (True,
+        if not written as unchanged).
+        """
+        return self.write_each(dict.fromkeys(self.write_method.get_available_devices().keys(), buf), geometry)
+
+    def write_each(self, bufs, geometry=None):
+        """Writes different data to several devices, bufs is a dict with device ids as keys and the buffers to write
+        as values. Returns a list of results like write().
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        geometry = geometry or DisplayGeometry.known['11x44']
+        # Before starting, so the threads only read the buffers
+        for buf in bufs.values():
+            WriteMethod.add_padding(buf, 64)
+            WriteMethod.check_length(buf, geometry.max_bytes)
+        device_ids = sorted(bufs.keys())
+        if not device_ids:
+            return []
+        barrier = None
+        force = self.force
+        max_workers = self.max_workers or len(device_ids)
+        if self.synchronized:
+            barrier = threading.Barrier(len(device_ids), timeout=self.commit_timeout)
+            max_workers = len(device_ids)
+            force = force or not self._is_unchanged(bufs)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(lambda did: self._write_one(bufs[did], geometry, did, barrier, force),
+                                     device_ids))
+
+    def _is_unchanged(self, bufs):
+        """Returns True, if each device got its data last time, see ContentStateStore."""
+        store = WriteMethod.state_store
+        if store is None:
+            return False
+        for device_id, buf in bufs.items():
+            if device_id not in self.write_method.devices:
+                return False
+            if not store.is_unchanged(self.write_method.get_lock_key(device_id), store.digest(buf)):
+                return False
+        return True
+
+    def _write_one(self, buf, geometry, device_id, barrier, force):
+        m = self._create_write_method()
+        m.commit_barrier = barrier
+        error = None
+        skipped = False
+        start = time.time()
+        try:
+            if m.open(device_id):
+                skipped = not m.write(buf, geometry, force)
+            else:
+                error = "Device not available"
+        except threading.BrokenBarrierError:
+            error = "Not committed, as another device was not ready in time"
+        except (Exception, SystemExit) as e:
+            error = str(e) or e.__class__.__name__
+        finally:
+            if m.commit_barrier is not None:
+                # Failed before the barrier, let the others commit
+                try:
+                    m.commit_barrier.wait()
+                except threading.BrokenBarrierError:
+                    pass
+            try:
+                m.close()
+            except Exception as e:
+                error = error or str(e) or e.__class__.__name__
+        return {'method': m.get_name(), 'device_id': device_id,
+                'description': self.write_method.get_available_devices().get(device_id), 'ok': error is None,
+                'error': error, 'seconds': time.time() - start, 'commit_time': m.commit_time if error is None else None,
+                'skipped': skipped and error is None}
+
+    def _create_write_method(self):
+        """Returns a new write method object of the same kind, which takes over the devices already enumerated."""
+        m = WriteMethodRegistry.create(self.write_method.get_name())
+        m.devices = self.write_method.devices
+        m.device_descriptions = self.write_method.device_descriptions
+        m.devices_generation = self.write_method.devices_generation
+        m.reset_on_close = self.write_method.reset_on_close
+        return m
+
+    @staticmethod
+    def get_commit_skew(results):
+        """Returns the time in seconds between the first and the last device sending its last chunk or None, if the
+        results are not from a synchronized write."""
+        times = [r['commit_time'] for r in results if r.get('commit_time') is not None]
+        if not times:
+            return None
+        return max(times) - min(times)
+
+    @staticmethod
+    def print_report(results, seconds):
+        """Prints the results of write() and the total time."""
+        print("Written to %d of %d devices in %.2f s:" % (len([r for r in results if r['ok']]), len(results), seconds))
+        skew = MultiDeviceWriter.get_commit_skew(results)
+        first = min([r['commit_time'] for r in results if r.get('commit_time') is not None] or [None])
+        for r in results:
+            if r['ok'] and r.get('commit_time') is not None:
+                print("  %s '%s': ok in %.2f s, committed at +%.1f ms" % (r['method'], r['device_id'], r['seconds'],
+                                                                          (r['commit_time'] - first) * 1e3))
+            elif r['ok'] and r.get('skipped'):
+                print("  %s '%s': unchanged, skipped" % (r['method'], r['device_id']))
+            elif r['ok']:
+                print("  %s '%s': ok in %.2f s" % (r['method'], r['device_id'], r['seconds']))
+            else:
+                print("  %s '%s': failed after %.2f s: %s" % (r['method'], r['device_id'], r['seconds'], r['error']))
+        if skew is not None:
+            print("Commit skew: %.1f ms" % (skew * 1e3,))
+
+
+class DeviceQueue:
+    """The queue of the write requests for one device of a BadgeDaemon. It holds at most one pending request, as only
+    the newest content matters: a new request replaces a pending one (coalescing). A thread writes the pending request
+    via a BadgeSession, which keeps the device open between the writes. If writing fails, the device is closed and
+    opened again for the next request. With a lock_timeout, it waits at most that many seconds for the device being
+    written by another process (see DeviceLock) instead of WriteMethod.lock_timeout, so one busy device cannot stall
+    the queue forever.
+    """
+
+    def __init__(self, method='auto', device_id='auto', lock_timeout=None):
+        self.session = BadgeSession(method, device_id)
+        self.lock_timeout = lock_timeout
+        self._cond = threading.Condition()
+        self._pending = None
+        self._in_flight = False
+        self._closing = False
+        self._thread = None
+        self.stats = {'received': 0, 'written': 0, 'skipped': 0, 'coalesced': 0, 'failed': 0, 'last_error': None,
+                      'last_latency': None, 'max_latency': None, 'total_latency': 0.0}
+
+    def put(self, buf, geometry=None, force=False):
+        """Queues the given buffer, replacing a pending one. Returns the WriteRequest, see WriteRequest.wait().
+        If force is True, it is written even if unchanged, see WriteMethod.write()."""
+        request = WriteRequest(buf, geometry, force)
+        with self._cond:
+            if self._closing:
+                raise IOError("The queue is closed")
+            replaced = self._pending
+            self._pending = request
+            self.stats['received'] += 1
+            if replaced:
+                self.stats['coalesced'] += 1
+                request.force = request.force or replaced.force
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='DeviceQueue')
+                self._thread.daemon = True
+                self._thread.start()
+            self._cond.notify()
+        if replaced:
+            replaced.finish('coalesced', None)
+        return request
+
+    def get_stats(self):
+        """Returns a dict with the counts of the requests received, written, skipped (unchanged, see
+        ContentStateStore), coalesced (replaced by a newer one before being written) and failed, the last error, the
+        latencies from receiving a request until it was written in seconds (last, max and mean) and the queue depth
+        (pending and in-flight requests).
+        """
+        with self._cond:
+            stats = dict(self.stats)
+            stats['queue_depth'] = (1 if self._pending else 0) + (1 if self._in_flight else 0)
+        done = stats['written'] + stats['skipped'] + stats['failed']
+        stats['mean_latency'] = stats.pop('total_latency') / done if done else None
+        return stats
+
+    def close(self):
+        """Writes a pending request, stops the thread and closes the device."""
+        with self._cond:
+            self._closing = True
+            self._cond.notify()
+            thread = self._thread
+        if thread is not None:
+            thread.join()
+        self.session.close()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._pending is None and not self._closing:
+                    self._cond.wait()
+                if self._pending is None:
+                    return
+                request = self._pending
+                self._pending = None
+                self._in_flight = True
+            error = None
+            state = 'written'
+            try:
+                self.session.geometry = request.geometry
+                self.session.open()
+                if self.lock_timeout is not None:
+                    self.session.write_method.lock_timeout = self.lock_timeout
+                if not self.session.write(request.buf, request.force):
+                    state = 'unchanged'
+            except SystemExit:
+                error = "Device not available"
+            except Exception as e:
+                error = str(e) or e.__class__.__name__
+            if error:
+                self.session.close()
+                state = 'failed'
+            latency = time.time() - request.received
+            with self._cond:
+                self._in_flight = False
+                self.stats['skipped' if state == 'unchanged' else state] += 1
+                self.stats['last_error'] = error or self.stats['last_error']
+                self.stats['last_latency'] = latency
+                self.stats['max_latency'] = max(latency, self.stats['max_latency'] or 0.0)
+                self.stats['total_latency'] += latency
+            request.finish(state, error)
+
+
+class WriteRequest:
+    """A request queued in a DeviceQueue. Its state is 'queued', 'written', 'unchanged' (skipped, see
+    ContentStateStore), 'failed' or 'coalesced'. A request still queued or being written after waiting for it with
+    a timeout is reported as 'timeout' by wait()."""
+
+    def __init__(self, buf, geometry=None, force=False):
+        self.buf = buf
+        self.geometry = geometry
+        self.force = force
+        self.received = time.time()
+        self.state = 'queued'
+        self.error = None
+        self._done = threading.Event()
+
+    def finish(self, state, error):
+        self.state = state
+        self.error = error
+        self._done.set()
+
+    def wait(self, timeout=None):
+        """Waits until the request is written, skipped, failed or replaced by a newer one, but at most timeout
+        seconds, if not None. Returns the state, 'timeout' if not done within timeout."""
+        if not self._done.wait(timeout):
+            return 'timeout'
+        return self.state
+
+
+class BadgeDaemon:
+    """A long running process owning the devices, so several programs can update the same badge without racing for
+    it. They send requests as JSON objects to a Unix socket (one object per line, one response line each) or by HTTP
+    POST to localhost, e.g.:
+
+        {"messages": ["Door open", ":bell:"], "speed": "4,8", "brightness": 50, "device_id": "auto", "wait": true}
+
+    The keys are like the command line options: messages, type, speed, mode, blink, ants, brightness, proportional,
+    method, device_id and force. Missing keys are taken from the defaults given to the daemon. With "force": true,
+    the data is written even if unchanged, see ContentStateStore. With "wait": true, the response is sent when the
+    data is written, skipped or replaced by a newer request, but after wait_timeout seconds at the latest, with the
+    state "timeout" then. A device being written by another process is waited for at most lock_timeout seconds,
+    unless WriteMethod.lock_timeout is set, so a stuck device does not block its queue. The requests are queued per device and coalesced, see
+    DeviceQueue. {"command": "stats"} resp. HTTP GET /stats returns the statistics per device queue.
+    """
+    wait_timeout = 60
+    lock_timeout = 30
+
+    def __init__(self, defaults=None, fallback_font=None):
+        self.defaults = {'type': '11x44', 'speed': '4', 'mode': '0', 'blink': '0', 'ants': '0', 'brightness': 100,
+                         'proportional': False, 'method': 'auto', 'device_id': 'auto', 'force': False}
+        self.defaults.update(defaults or {})
+        self.fallback_font = fallback_font
+        self.queues = OrderedDict()
+        self.started = time.time()
+        self.requests = 0
+        self.servers = []
+        self._lock = threading.Lock()
+
+    def handle(self, request):
+        """Handles one request (a dict) and returns the response as a dict."""
+        with self._lock:
+            self.requests += 1
+        if not isinstance(request, dict):
+            return {'ok': False, 'error': "The request must be a JSON object"}
+        command = request.get('command', 'write')
+        if command == 'stats':
+            return dict(self.get_stats(), ok=True)
+        if command != 'write':
+            return {'ok': False, 'error': "Unknown command '%s'" % (command,)}
+        try:
+            buf, geometry = self.render(request)
+        except SystemExit as e:
+            return {'ok': False, 'error': str(e) if e.code not in (None, 0, 1) else "The messages could not be rendered"}
+        except Exception as e:
+            return {'ok': False, 'error': "The messages could not be rendered: %s" % (str(e) or e.__class__.__name__,)}
+        if self._get(request, 'device_id') in ('all', 'list') or self._get(request, 'method') == 'list':
+            return {'ok': False, 'error': "Please give a write method and device id or 'auto'"}
+        queue_name, queue = self._get_queue(self._get(request, 'method'), self._get(request, 'device_id'))
+        written = queue.put(buf, geometry, bool(self._get(request, 'force')))
+        if request.get('wait'):
+            state = written.wait(BadgeDaemon.wait_timeout)
+            response = {'ok': state not in ('failed', 'timeout'), 'device': queue_name, 'state': state}
+            if state == 'timeout':
+                response['error'] = "Not written within %g s, the request is still queued" % (BadgeDaemon.wait_timeout,)
+            elif written.error:
+                response['error'] = written.error
+            return response
+        return {'ok': True, 'device': queue_name, 'state': written.state, 'queue_depth': queue.get_stats()['queue_depth']}
+
+    def render(self, request):
+        """Returns a tuple of the buffer to write and the DisplayGeometry for the given request."""
+        messages = request.get('messages')
+        if isinstance(messages, str):
+            messages = [messages]
+        if not messages or not all([isinstance(m, str) for m in messages]):
+            raise ValueError("'messages' must be a list of strings")
+        geometry = DisplayGeometry.get(self._get(request, 'type'))
+        creator = SimpleTextAndIcons(bool(self._get(request, 'proportional')), self.fallback_font, geometry)
+        bitmaps = [creator.bitmap(m) for m in messages]
+        values = [self._get_ints(request, key) for key in ('speed', 'mode', 'blink', 'ants')]
+        buf = array('B', BadgeProtocol.encode(bitmaps, values[0], values[1], values[2], values[3],
+                                              int(self._get(request, 'brightness')), geometry=geometry))
+        WriteMethod.add_padding(buf, 64)
+        if len(buf) > geometry.max_bytes:
+            raise ValueError("The messages need %d bytes, the device takes %d" % (len(buf), geometry.max_bytes))
+        return buf, geometry
+
+    def get_stats(self):
+        """Returns a dict with the uptime in seconds, the number of requests and the statistics per device queue
+        (see DeviceQueue.get_stats()) keyed by 'method/device_id'.
+        """
+        with self._lock:
+            queues = list(self.queues.items())
+        return {'uptime': time.time() - self.started, 'requests': self.requests,
+                'devices': OrderedDict([(name, queue.get_stats()) for name, queue in queues])}
+
+    def serve_unix(self, path):
+        """Starts serving requests on a Unix socket at the given path in a thread. Returns the server."""
+        import socket
+        import socketserver
+        if not hasattr(socket, 'AF_UNIX'):
+            raise IOError("Unix sockets are not available on this platform, please use HTTP.")
+        if os.path.exists(path):
+            import stat
+            if not stat.S_ISSOCK(os.stat(path).st_mode):
+                raise IOError("%s exists and is not a socket" % (path,))
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(path)
+            except (IOError, OSError):
+                os.remove(path)  # left over by a daemon not running anymore
+            else:
+                raise IOError("Another daemon is serving %s" % (path,))
+            finally:
+                probe.close()
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    if line.strip():
+                        self.wfile.write(daemon._handle_json(line) + b'\n')
+                        self.wfile.flush()
+
+        server = socketserver.ThreadingUnixStreamServer(path, Handler)
+        server.daemon_threads = True
+        return self._start(server, "Serving on Unix socket %s" % (path,))
+
+    def serve_http(self, port, host='127.0.0.1'):
+        """Starts serving requests by HTTP at the given port in a thread: POST / with a request, GET /stats. Returns
+        the server. Requests must have the Content-Type application/json and, if sent, a local Origin, so web pages
+        opened in a browser cannot write to the badges (CSRF).
+        """
+        import json
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        daemon = self
+        origins = set()
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip('/') == '/stats':
+                    self._respond(daemon._handle_json(b'{"command": "stats"}'))
+                else:
+                    self.send_error(404)
+
+            def do_POST(self):
+                content_type = (self.headers.get('Content-Type') or '').split(';')[0].strip().lower()
+                origin = self.headers.get('Origin')
+                if content_type != 'application/json':
+                    self._reject(415, "Content-Type must be application/json")
+                elif origin is not None and origin.rstrip('/').lower() not in origins:
+                    self._reject(403, "Origin %s is not allowed" % (origin,))
+                else:
+                    length = int(self.headers.get('Content-Length') or 0)
+                    self._respond(daemon._handle_json(self.rfile.read(length)))
+
+            def _reject(self, status, error):
+                self.close_connection = True
+                self._respond(json.dumps({'ok': False, 'error': error}).encode('utf-8'), status)
+
+            def _respond(self, body, status=200):
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        for name in (host, 'localhost', '127.0.0.1', '[::1]'):
+            origins.add('http://%s:%d' % (name, server.server_address[1]))
+        return self._start(server, "Serving on http://%s:%d/" % (host, server.server_address[1]))
+
+    def close(self):
+        """Stops the servers and writes the pending requests before closing the devices."""
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+            if isinstance(server.server_address, str) and os.path.exists(server.server_address):
+                os.remove(server.server_address)
+        self.servers = []
+        for queue in list(self.queues.values()):
+            queue.close()
+
+    def _start(self, server, message):
+        thread = threading.Thread(target=server.serve_forever, name='BadgeDaemon')
+        thread.daemon = True
+        thread.start()
+        self.servers.append(server)
+        print(message)
+        return server
+
+    def _handle_json(self, data):
+        import json
+        try:
+            request = json.loads(data.decode('utf-8'))
+        except ValueError as e:
+            response = {'ok': False, 'error': "Invalid JSON: %s" % (e,)}
+        else:
+            response = self.handle(request)
+        return json.dumps(response).encode('utf-8')
+
+    def _get(self, request, key):
+        value = request.get(key)
+        return self.defaults[key] if value is None else value
+
+    def _get_ints(self, request, key):
+        value = self._get(request, key)
+        if isinstance(value, (list, tuple)):
+            return [int(x) for x in value]
+        return split_to_ints(str(value))
+
+    def _get_queue(self, method, device_id):
+        name = '%s/%s' % (method, device_id)
+        with self._lock:
+            if name not in self.queues:
+                lock_timeout = BadgeDaemon.lock_timeout if WriteMethod.lock_timeout is None else None
+                self.queues[name] = DeviceQueue(method, device_id, lock_timeout)
+            return name, self.queues[name]
+
+    @staticmethod
+    def get_default_socket():
+        """Returns the default path of the Unix socket: lednamebadge.sock in $XDG_RUNTIME_DIR or the temp directory."""
+        import tempfile
+        directory = os.environ.get('XDG_RUNTIME_DIR') or tempfile.gettempdir()
+        return os.path.join(directory, 'lednamebadge.sock')
+
+    def serve_forever(self, addresses):
+        """Serves on the given addresses until interrupted. An address is a port number or host:port for HTTP or the
+        path of a Unix socket.
+        """
+        for address in addresses:
+            host, _, port = address.rpartition(':')
+            if port.isdigit() and os.sep not in address:
+                self.serve_http(int(port), host or '127.0.0.1')
+            else:
+                self.serve_unix(address)
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            print("Stopping")
+        finally:
+            self.close()
+
+
 def main():
+    import argparse
     parser = argparse.ArgumentParser(formatter_class=argparse.RawDescriptionHelpFormatter,
                                      description='Upload messages or graphics to a 11x44 led badge via USB HID.\nVersion %s from https://github.com/jnweiger/led-badge-ls32\n -- see there for more examples and for updates.' % __version,
                                      epilog='Example combining image and text:\n sudo %s "I:HEART2:you"' % sys.argv[0])
-    parser.add_argument('-t', '--type', default='11x44',
-                        help="Type of display: supported values are 12x48 or (default) 11x44. Rename the program to led-badge-12x48, to switch the default.")
+    parser.add_argument('-t', '--type',
+                        help="Type of display: supported values are 12x48, 11x55 or (default) 11x44. Rename the program to led-badge-12x48, to switch the default.")
     parser.add_argument('-H',
                         '--hid',
                         default='0',
@@ -1043,7 +3337,9 @@ def main():
     parser.add_argument('-D',
                         '--device-id',
                         default='auto',
-                        help="Force using the given device id, if ambiguous. Use one of 'auto', 'list' or whatever list is printing.")
+                        help="Force using the given device id, if ambiguous. Use one of 'auto', 'list', 'all' (write to all devices found concurrently) or whatever list is printing.")
+    parser.add_argument('--sync', action='store_true',
+                        help="With -D all: the devices start showing the messages at the same time. The measured time difference is reported.")
     parser.add_argument('-s', '--speed', default='4', help="Scroll speed (Range 1..8). Up to 8 comma-separated values.")
     parser.add_argument('-B', '--brightness', default='100',
                         help="Brightness for the display in percent: 25, 50, 75, or 100.")
@@ -1054,6 +3350,19 @@ def main():
                         '--ants',
                         default='0',
                         help="1: animated border, 0: normal. Up to 8 comma-separated values.")
+    parser.add_argument('--proportional', action='store_true',
+                        help="Use proportional text rendering: less space between the chars, less data to upload.")
+    parser.add_argument('--font', metavar='FILE',
+                        help="TrueType, OpenType or BDF font file for chars not available in the builtin font.")
+    parser.add_argument('--font-size', type=int, default=11, help="Size of the --font in pixels (default 11).")
+    parser.add_argument('--cache-dir', metavar='DIR', default=os.environ.get('LEDNAMEBADGE_CACHE_DIR'),
+                        help="Cache decoded images in DIR to speed up repeated uploads. Default: $LEDNAMEBADGE_CACHE_DIR, if set.")
+    parser.add_argument('--lock-timeout', metavar='SECONDS', type=float,
+                        help="Wait at most SECONDS for a device being written by another process, 0: fail at once. Default: wait as long as needed, %g s with --serve." % (BadgeDaemon.lock_timeout,))
+    parser.add_argument('--force', action='store_true',
+                        help="Write to the device, even if it got the same messages last time. Default: skip unchanged uploads.")
+    parser.add_argument('--pacing', choices=('adaptive', 'recalibrate', 'conservative'), default='adaptive',
+                        help="Pacing of the chunks written with method libusb: 'adaptive' (default) derives it from the device, 'recalibrate' measures the device again (e.g. if the badge misses data), 'conservative' waits 100 ms per chunk, like older versions did.")
     parser.add_argument('-p', '--preload', metavar='FILE', action='append',
                         help=argparse.SUPPRESS)  # "Load bitmap images. Use ^A, ^B, ^C, ... in text messages to make them visible. Deprecated, embed within ':' instead")
     parser.add_argument('-l',
@@ -1061,7 +3370,9 @@ def main():
                         action='version',
                         help="list named icons to be embedded in messages and exit.",
                         version=':' + ':  :'.join(SimpleTextAndIcons._get_named_bitmaps_keys()) + ':  ::  or e.g. :path/to/some_icon.png:')
-    parser.add_argument('message', metavar='MESSAGE', nargs='+',
+    parser.add_argument('--serve', metavar='ADDRESS', nargs='?', action='append', const=BadgeDaemon.get_default_socket(),
+                        help="Run as a daemon writing the messages requested by other programs, see README.md. ADDRESS is the path of a Unix socket (default %s) or [HOST:]PORT for HTTP. May be given more than once." % (BadgeDaemon.get_default_socket().replace('%', '%%'),))
+    parser.add_argument('message', metavar='MESSAGE', nargs='*',
                         help="Up to 8 message texts with embedded builtin icons or loaded images within colons(:) -- See -l for a list of builtins.")
     parser.add_argument('--mode-help', action='version', help=argparse.SUPPRESS, version="""
     
@@ -1085,8 +3396,36 @@ def main():
      (No "rotation" or "smoothing"(?) effect can be expected, though)
     """ % sys.argv[0])
     args = parser.parse_args()
+    if not args.message and not args.serve:
+        parser.error("the following arguments are required: MESSAGE")
+
+    if args.cache_dir:
+        SimpleTextAndIcons.image_cache = BitmapCache(args.cache_dir)
+    WriteLibUsb.pacing = args.pacing
+    WriteMethod.lock_timeout = args.lock_timeout
+    WriteMethod.state_store = WriteMethod.get_state_store()
+
+    fallback_font = None
+    if args.font:
+        fallback_font = FontRasterizer(args.font, args.font_size)
 
-    creator = SimpleTextAndIcons()
+    try:
+        geometry = DisplayGeometry.get(args.type or ('12x48' if '12' in sys.argv[0] else '11x44'))
+    except ValueError as e:
+        sys.exit(str(e))
+    print("Type: %s" % (geometry.name,))
+
+    if args.serve:
+        defaults = {'type': geometry.name, 'speed': args.speed, 'mode': args.mode, 'blink': args.blink,
+                    'ants': args.ants, 'brightness': int(args.brightness), 'proportional': args.proportional,
+                    'method': args.method, 'device_id': args.device_id, 'force': args.force}
+        try:
+            BadgeDaemon(defaults, fallback_font).serve_forever(args.serve)
+        except (IOError, OSError) as e:
+            sys.exit(str(e))
+        return
+
+    creator = SimpleTextAndIcons(args.proportional, fallback_font, geometry)
 
     if args.preload:
         for filename in args.preload:
@@ -1100,28 +3439,13 @@ def main():
         print(
             "\nWARNING:\n Your preloaded images are not used.\n Try without '-p' or embed the control character '^A' in your message.\n")
 
-    if '12' in args.type or '12' in sys.argv[0]:
-        print("Type: 12x48")
-        for msg_bitmap in msg_bitmaps:
-            # trivial hack to support 12x48 badges:
-            # patch extra empty lines into the message stream.
-            for i in reversed(range(1, int(len(msg_bitmap[0]) / 11) + 1)):
-                msg_bitmap[0][i * 11:i * 11] = array('B', [0])
-    else:
-        print("Type: 11x44")
-
-    lengths = [b[1] for b in msg_bitmaps]
     speeds = split_to_ints(args.speed)
     modes = split_to_ints(args.mode)
     blinks = split_to_ints(args.blink)
     ants = split_to_ints(args.ants)
     brightness = int(args.brightness)
 
-    buf = array('B')
-    buf.extend(LedNameBadge.header(lengths, speeds, modes, blinks, ants, brightness))
-
-    for msg_bitmap in msg_bitmaps:
-        buf.extend(msg_bitmap[0])
+    buf = array('B', BadgeProtocol.encode(msg_bitmaps, speeds, modes, blinks, ants, brightness, geometry=geometry))
 
     # Translate -H to -M parameter
     method = args.method
@@ -1132,7 +3456,14 @@ def main():
         else:
             sys.exit("Parameter values are ambiguous. Please use -M only.")
 
-    LedNameBadge.write(buf, method, args.device_id)
+    if args.sync and args.device_id != 'all':
+        sys.exit("Option --sync needs -D all.")
+    try:
+        results = LedNameBadge.write(buf, method, args.device_id, geometry, args.sync, args.force)
+    except DeviceBusyError as e:
+        sys.exit(str(e))
+    if results and not all([r['ok'] for r in results]):
+        sys.exit(1)
 
 
 def split_to_ints(list_str):
@@ -0,0 +1,202 @@
+"""asyncio API for lednamebadge, e.g. for updating badges from an asyncio web service.
+
+The blocking calls of the write methods (pyusb, pyhidapi, hidraw) run in a dedicated thread pool, so the event loop
+is never blocked. A write is run step by step (see WriteMethod.write_steps()), each step sending at most one packet
+in the pool. The pauses in between (see the pacing of WriteLibUsb) are done with asyncio.sleep() in the event loop,
+so no thread is held while waiting. A write can be cancelled or given a timeout, it is stopped before the next packet
+then. Many badges can be written concurrently from one event loop, even with a small thread pool.
+
+    async with AsyncBadge() as badge:
+        await badge.write(buf, timeout=30)
+
+    for badge in await open_all():
+        ...
+
+    async for event, name, info in watch_devices():
+        print(event, name)
+"""
+import asyncio
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from lednamebadge import LedNameBadge, DeviceRegistry, HotplugWatcher, WriteMethodRegistry
+
+_executor = None
+max_workers = 32
+
+
+class WriteCancelled(Exception):
+    """Raised in the thread writing to a device by a write method only implementing _write(), when the write was
+    cancelled or timed out."""
+    pass
+
+
+def get_executor():
+    """Returns the thread pool for the blocking calls, which is created on first use with max_workers threads."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='lednamebadge')
+    return _executor
+
+
+def set_executor(executor):
+    """Sets the thread pool for the blocking calls, e.g. to size it for many badges."""
+    global _executor
+    _executor = executor
+
+
+async def run_blocking(func, *args):
+    """Runs func(*args) in the thread pool and returns its result."""
+    return await asyncio.get_running_loop().run_in_executor(get_executor(), functools.partial(func, *args))
+
+
+async def get_available_devices(method='auto'):
+    """Enumerates the devices without blocking the event loop. Returns a dict with the write method names as keys
+    and dicts of device ids and descriptions as values, see DeviceRegistry.enumerate(). With 'auto', all ready write
+    methods in the order of 'auto' are enumerated.
+    """
+    if method == 'auto':
+        methods = WriteMethodRegistry.create_auto_order()
+    else:
+        methods = [m for m in [WriteMethodRegistry.create(method)] if m]
+    return await run_blocking(DeviceRegistry(methods).enumerate)
+
+
+async def open_all(method='auto', geometry=None, reset_on_close=False):
+    """Returns an opened AsyncBadge for each device found with the given write method. With 'auto', only the first
+    write method finding any devices is used, like with LedNameBadge.write() and the device id 'all'.
+    """
+    badges = []
+    for name, devices in (await get_available_devices(method)).items():
+        if devices:
+            for device_id in sorted(devices.keys()):
+                badges.append(await AsyncBadge(name, device_id, geometry, reset_on_close).open())
+            break
+    return badges
+
+
+async def watch_devices(interval=0.5, watcher=None):
+    """Async iterator over the devices being added and removed, as tuples of ('add' or 'remove', sysfs name, device
+    dict), see HotplugWatcher. The devices connected at the start are reported as added. The watcher (default: a
+    HotplugWatcher reading the Linux sysfs) is polled in the thread pool every interval seconds.
+    """
+    watcher = watcher or HotplugWatcher(interval=interval)
+    while True:
+        for event in await run_blocking(watcher.poll):
+            yield event
+        await asyncio.sleep(interval)
+
+
+def _next_step(steps):
+    """Runs the given generator to its next pause. Returns a tuple of True and its return value, if it has finished,
+    otherwise of False and the seconds to pause, as a StopIteration cannot be passed through a future.
+    """
+    try:
+        return False, next(steps)
+    except StopIteration as e:
+        return True, e.value
+
+
+class _WriteControl:
+    """The pause_function of a write method object only implementing _write(), which does its pauses itself in the
+    thread of the pool. It raises WriteCancelled there after cancel() was called from the event loop.
+    """
+
+    def __init__(self):
+        self.cancelled = False
+
+    def __call__(self, seconds):
+        if self.cancelled:
+            raise WriteCancelled()
+        if seconds > 0:
+            time.sleep(seconds)
+        if self.cancelled:
+            raise WriteCancelled()
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class AsyncBadge:
+    """One device, kept open for many writes like BadgeSession, but with coroutines. The device is selected like with
+    LedNameBadge.write(), when it is opened. If none is available, an IOError is raised.
+    """
+
+    def __init__(self, method='auto', device_id='auto', geometry=None, reset_on_close=False):
+        self.method = method
+        self.device_id = device_id
+        self.geometry = geometry
+        self.reset_on_close = reset_on_close
+        self.write_method = None
+        self._lock = None
+
+    async def open(self):
+        """Selects and opens the device. Returns self."""
+        if self.write_method is None:
+            try:
+                write_method = await run_blocking(LedNameBadge._find_write_method, self.method, self.device_id)
+            except SystemExit:
+                write_method = None
+            if write_method is None:
+                raise IOError("The device is not available with write method '%s' and device id '%s'." % (
+                    self.method, self.device_id))
+            self.write_method = write_method
+            self.write_method.reset_on_close = self.reset_on_close
+        return self
+
+    async def write(self, buf, timeout=None):
+        """Writes the given buffer to the device like LedNameBadge.write(). Opens the device, if not done, yet.
+        Raises asyncio.TimeoutError, if not done within timeout seconds. If timed out or cancelled, the write is
+        stopped before the next packet and the device is closed, as it has got incomplete data. Writes to the same
+        badge are done one after the other.
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            await self.open()
+            control = _WriteControl()
+            self.write_method.pause_function = control
+            steps = self.write_method.write_steps(buf, self.geometry)
+            try:
+                await asyncio.wait_for(self._run_steps(steps, control), timeout)
+            except (asyncio.CancelledError, asyncio.TimeoutError):
+                try:
+                    steps.close()  # releases the lock
+                finally:
+                    await self.close()
+                raise
+            finally:
+                if self.write_method is not None:
+                    self.write_method.pause_function = None
+
+    @staticmethod
+    async def _run_steps(steps, control):
+        """Runs the steps of a write in the thread pool and waits in between in the event loop."""
+        while True:
+            future = asyncio.ensure_future(run_blocking(_next_step, steps))
+            try:
+                done, value = await asyncio.shield(future)
+            except asyncio.CancelledError:
+                control.cancel()
+                try:
+                    await future  # the packet being sent, the generator cannot be closed while running
+                except WriteCancelled:
+                    pass
+                raise
+            if done:
+                return value
+            await asyncio.sleep(value)
+
+    async def close(self):
+        """Closes the device. It may be opened again afterwards."""
+        if self.write_method is not None:
+            write_method = self.write_method
+            self.write_method = None
+            await run_blocking(write_method.close)
+
+    async def __aenter__(self):
+        return await self.open()
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
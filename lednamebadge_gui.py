@@ -23,7 +23,7 @@ from PySide6.QtWidgets import (
     QMessageBox,
 )
 
-from lednamebadge import SimpleTextAndIcons, LedNameBadge
+from lednamebadge import SimpleTextAndIcons, LedNameBadge, DisplayGeometry
 
 
 class SlotWidget(QGroupBox):
@@ -135,6 +135,11 @@ class MainWindow(QMainWindow):
         self.write_button = QPushButton("Write to Badge")
         self.write_button.clicked.connect(self.write_to_badge)
         header.addWidget(self.write_button)
+        header.addWidget(QLabel("Type"))
+        self.type_box = QComboBox()
+        for name in sorted(DisplayGeometry.known):
+            self.type_box.addItem(name, DisplayGeometry.known[name])
+        header.addWidget(self.type_box)
         header.addStretch(1)
         root.addLayout(header)
 
@@ -200,7 +205,8 @@ class MainWindow(QMainWindow):
     # Schreiben zum Badge
     def write_to_badge(self) -> None:
         """Collect data from all slots and write to the device."""
-        creator = SimpleTextAndIcons()
+        geometry = self.type_box.currentData()
+        creator = SimpleTextAndIcons(geometry=geometry)
         msg_bitmaps = []
         speeds = []
         modes = []
@@ -219,14 +225,14 @@ class MainWindow(QMainWindow):
 
         # Helligkeit ist entfernt – setze festen Standard (100%)
         brightness = 100
-        header = LedNameBadge.header(lengths, speeds, modes, blinks, ants, brightness)
+        header = LedNameBadge.header(lengths, speeds, modes, blinks, ants, brightness, geometry=geometry)
 
         buf = array('B')
         buf.extend(header)
         for b in msg_bitmaps:
             buf.extend(b[0])
 
-        LedNameBadge.write(buf)
+        LedNameBadge.write(buf, geometry=geometry)
         self.statusBar().showMessage("Daten wurden an das Badge gesendet.", 2000)
 
 
@@ -1,15 +1,163 @@
+import os
+import shutil
 import sys
+import tempfile
+import threading
+import time
 from unittest import TestCase
 from unittest.mock import patch, MagicMock
 from io import StringIO
 
+import lednamebadge
+from lednamebadge import WriteMethod, WriteMethodRegistry
+
 
 class USBError(BaseException):
     pass
 
 
-class AbstractWriteMethodTest(TestCase):
+class FakeWriteMethod(WriteMethod):
+    """A write method for the tests, registered as 'fake' by FakeWriteMethodTest. It is configured by its class
+    attributes, which are reset before each test, and it records what was written in them, too.
+    """
+    devices_found = {}  # the devices of all objects not given their own ones
+    failing = {}  # device id: 'open' or 'write'
+    slow = {}  # device id: seconds to sleep before writing
+    delay = 0.0  # seconds to pause before each packet, see WriteMethod._get_packet_delay()
+    barrier = None  # a threading.Barrier each write waits at
+    gate = None  # a threading.Event each write waits for, after setting started
+    started = None
+    written = []  # a tuple of the device id and the data per write
+    packets = []  # a tuple of the device id, the data and the name of the thread per packet
+    enumerations = 0  # of all objects
+    closed = 0
+
+    @staticmethod
+    def reset():
+        FakeWriteMethod.devices_found = {'a': ('Badge A',), 'b': ('Badge B',)}
+        FakeWriteMethod.failing = {}
+        FakeWriteMethod.slow = {}
+        FakeWriteMethod.delay = 0.0
+        FakeWriteMethod.barrier = None
+        FakeWriteMethod.gate = threading.Event()
+        FakeWriteMethod.gate.set()
+        FakeWriteMethod.started = threading.Event()
+        FakeWriteMethod.written = []
+        FakeWriteMethod.packets = []
+        FakeWriteMethod.enumerations = 0
+        FakeWriteMethod.closed = 0
+
+    def __init__(self, name='fake', devices=None):
+        """devices is a dict of device ids and descriptions instead of devices_found."""
+        WriteMethod.__init__(self)
+        self.name = name
+        self.fake_devices = devices
+        self.enumeration_barrier = None  # waited at while enumerating
+        self.enumeration_error = None  # raised while enumerating
+        self.own_enumerations = 0
+        self.device_id = None
+
+    def get_name(self):
+        return self.name
+
+    def get_description(self):
+        return 'Fake %s' % (self.name,)
+
+    def is_ready(self):
+        return True
+
+    def has_device(self):
+        return self.device_id is not None
+
+    def close(self):
+        if self.device_id is not None:
+            FakeWriteMethod.closed += 1
+        self.device_id = None
+
+    def _open(self, device_id):
+        if FakeWriteMethod.failing.get(device_id) == 'open':
+            return False
+        self.device_id = device_id
+        return True
+
+    def _get_available_devices(self):
+        FakeWriteMethod.enumerations += 1
+        self.own_enumerations += 1
+        if self.enumeration_barrier:
+            self.enumeration_barrier.wait(5)
+        if self.enumeration_error:
+            raise self.enumeration_error
+        if self.fake_devices is not None:
+            return {did: (description,) for did, description in self.fake_devices.items()}
+        return dict(FakeWriteMethod.devices_found)
+
+    def _write_steps(self, buf):
+        FakeWriteMethod.started.set()
+        FakeWriteMethod.gate.wait(5)
+        if FakeWriteMethod.barrier:
+            FakeWriteMethod.barrier.wait(5)
+        if FakeWriteMethod.failing.get(self.device_id) == 'write':
+            raise IOError("Writing to the device failed at offset 64")
+        if self.device_id in FakeWriteMethod.slow:
+            time.sleep(FakeWriteMethod.slow[self.device_id])  # e.g. a slow device
+        yield from self._iter_chunks(buf)
+        FakeWriteMethod.written.append((self.device_id, bytes(buf)))
+
+    def _get_packet_delay(self):
+        return FakeWriteMethod.delay
+
+    def _send_packet(self, packet):
+        FakeWriteMethod.packets.append((self.device_id, bytes(packet), threading.current_thread().name))
+        return len(packet)
+
+
+class IsolatedTest(TestCase):
+    """Keeps the device locks (see DeviceLock), the pacing (see PacingStore) and the data written (see
+    ContentStateStore) of a test in a temporary directory, self.directory, instead of the real temp and cache
+    directories.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.isolate(lednamebadge, True)
+
+    def isolate(self, module, restore=False):
+        """Points the given lednamebadge module to the temporary directory."""
+        values = ((module.DeviceLock, 'directory', self.directory),
+                  (module.WriteLibUsb, 'pacing_store', module.PacingStore(os.path.join(self.directory, 'pacing.json'))),
+                  (module.WriteMethod, 'default_state_store',
+                   module.ContentStateStore(os.path.join(self.directory, 'state'))))
+        for target, name, value in values:
+            if restore:
+                attribute_patch = patch.object(target, name, value)
+                attribute_patch.start()
+                self.addCleanup(attribute_patch.stop)
+            else:
+                setattr(target, name, value)
+
+
+class FakeWriteMethodTest(IsolatedTest):
+    """Registers FakeWriteMethod as 'fake' and resets it before each test. The output is captured in self.stdout."""
+
+    def setUp(self):
+        super().setUp()
+        FakeWriteMethod.reset()
+        methods_patch = patch.dict(WriteMethodRegistry._methods)
+        methods_patch.start()
+        self.addCleanup(methods_patch.stop)
+        WriteMethodRegistry.register('fake', FakeWriteMethod, auto_order=False)
+        stdout_patch = patch('sys.stdout', new_callable=StringIO)
+        self.stdout = stdout_patch.start()
+        self.addCleanup(stdout_patch.stop)
+
+
+class AbstractWriteMethodTest(IsolatedTest):
+    hidraw_sysfs_root = '/nonexistent'
+    hidraw_dev_root = '/nonexistent'
+
     def setUp(self):
+        super().setUp()
         print("Real platform: " + sys.platform)
 
 
@@ -32,6 +180,10 @@ class AbstractWriteMethodTest(TestCase):
         with self.do_import_patch(pyusb_available, pyhidapi_available, device_available) as module_mocks:
             with patch('sys.stdout', new_callable=StringIO) as stdio_mock:
                 import lednamebadge
+                # No real hidraw devices, see test_lednamebadge_hidraw.py
+                lednamebadge.WriteHidraw.sysfs_root = self.hidraw_sysfs_root
+                lednamebadge.WriteHidraw.dev_root = self.hidraw_dev_root
+                self.isolate(lednamebadge)
                 try:
                     result = func(lednamebadge.LedNameBadge)
                     mocks = {'pyhidapi': module_mocks['pyhidapi'], 'usb': module_mocks['usb']}
@@ -64,6 +216,7 @@ class AbstractWriteMethodTest(TestCase):
         mock = MagicMock()
         mock.hid_enumerate.return_value = [device] if device_available else []
         mock.hid_open_path.return_value = 123456 if device_available else []
+        mock.hid_write.return_value = 65
         return mock
 
 
@@ -73,9 +226,15 @@ class AbstractWriteMethodTest(TestCase):
         device.product = 'LibUsb Test Product'
         device.bus = 3
         device.address = 4
+        device.idVendor = 0x0416
+        device.idProduct = 0x5020
+        device.bcdDevice = 0x0100
 
         ep = MagicMock()
         ep.bEndpointAddress = 2
+        ep.bInterval = 1
+        ep.wMaxPacketSize = 64
+        ep.write.return_value = 64
 
         mock = MagicMock()
         mock.core = MagicMock()
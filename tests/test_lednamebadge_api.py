@@ -9,7 +9,9 @@ class Test(abstract_write_method_test.AbstractWriteMethodTest):
         methods, output = self.call_info_methods()
         self.assertDictEqual({
             'hidapi': ('Program a device connected via USB using the pyhidapi package and libhidapi.', True),
-            'libusb': ('Program a device connected via USB using the pyusb package and libusb.', True)},
+            'libusb': ('Program a device connected via USB using the pyusb package and libusb.', True),
+            'hidraw': ('Program a device connected via USB using the Linux hidraw driver, without additional packages.',
+                       False)},
             methods)
 
     def test_get_device_ids(self):
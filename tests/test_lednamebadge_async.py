@@ -0,0 +1,159 @@
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import time
+from array import array
+from unittest import IsolatedAsyncioTestCase
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import abstract_write_method_test
+import lednamebadge_async
+from abstract_write_method_test import FakeWriteMethod
+from lednamebadge import WriteMethod, HotplugWatcher, SysfsUsbBackend
+
+
+class Test(abstract_write_method_test.FakeWriteMethodTest, IsolatedAsyncioTestCase):
+    async def test_write(self):
+        FakeWriteMethod.delay = 0.01
+        ticks = []
+
+        async def ticker():
+            while True:
+                ticks.append(time.time())
+                await asyncio.sleep(0.005)
+
+        ticker_task = asyncio.ensure_future(ticker())
+        with patch('time.sleep') as sleep_mock:
+            async with lednamebadge_async.AsyncBadge('fake', 'b') as badge:
+                await badge.write(array('B', [1] * 256))
+        ticker_task.cancel()
+        self.assertEqual(4, len(FakeWriteMethod.packets))
+        self.assertEqual('b', FakeWriteMethod.packets[0][0])
+        self.assertTrue(FakeWriteMethod.packets[0][2].startswith('lednamebadge'))
+        sleep_mock.assert_not_called()  # waiting in the event loop
+        self.assertGreater(len(ticks), 3)  # which is not blocked
+        self.assertEqual(1, FakeWriteMethod.closed)
+
+    async def test_timeout(self):
+        FakeWriteMethod.delay = 0.05
+        badge = lednamebadge_async.AsyncBadge('fake')
+        with self.assertRaises(asyncio.TimeoutError):
+            await badge.write(array('B', [1] * 64 * 20), timeout=0.12)
+        self.assertLess(len(FakeWriteMethod.packets), 5)
+        self.assertEqual(1, FakeWriteMethod.closed)
+        self.assertIsNone(badge.write_method)
+
+        FakeWriteMethod.delay = 0.0
+        await badge.write(array('B', [1] * 64))  # opened again
+        await badge.close()
+        self.assertEqual(2, FakeWriteMethod.closed)
+
+    async def test_cancel(self):
+        FakeWriteMethod.delay = 0.05
+        badge = lednamebadge_async.AsyncBadge('fake')
+        task = asyncio.ensure_future(badge.write(array('B', [1] * 64 * 20)))
+        await asyncio.sleep(0.12)
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        count = len(FakeWriteMethod.packets)
+        self.assertLess(count, 5)
+        await asyncio.sleep(0.1)
+        self.assertEqual(count, len(FakeWriteMethod.packets))  # the thread stopped
+        self.assertEqual(1, FakeWriteMethod.closed)
+
+    async def test_many(self):
+        FakeWriteMethod.delay = 0.05
+        badges = await lednamebadge_async.open_all('fake')
+        self.assertEqual(['a', 'b'], [b.write_method.device_id for b in badges])
+        start = time.time()
+        await asyncio.gather(*[b.write(array('B', [1] * 64 * 4)) for b in badges])
+        self.assertLess(time.time() - start, 0.35)  # concurrently, not 2 * 4 * 0.05 s
+        self.assertEqual(8, len(FakeWriteMethod.packets))
+        for b in badges:
+            await b.close()
+
+    async def test_one_thread(self):
+        FakeWriteMethod.delay = 0.05
+        badges = await lednamebadge_async.open_all('fake')
+        executor = ThreadPoolExecutor(max_workers=1)
+        with patch.object(lednamebadge_async, '_executor', executor):
+            start = time.time()
+            await asyncio.gather(*[b.write(array('B', [1] * 64 * 4)) for b in badges])
+            self.assertLess(time.time() - start, 0.35)  # the thread is not held while pausing
+            for b in badges:
+                await b.close()
+        executor.shutdown()
+        self.assertEqual(8, len(FakeWriteMethod.packets))
+
+    async def test_legacy_write(self):
+        def write(m, buf):
+            m._write_chunks(buf)
+
+        FakeWriteMethod.delay = 0.05
+        badge = lednamebadge_async.AsyncBadge('fake')
+        with patch.object(FakeWriteMethod, '_write', write, create=True), \
+                patch.object(FakeWriteMethod, '_write_steps', WriteMethod._write_steps):
+            await badge.write(array('B', [1] * 64 * 2))
+            with self.assertRaises(asyncio.TimeoutError):
+                await badge.write(array('B', [1] * 64 * 20), timeout=0.12)
+        self.assertLess(len(FakeWriteMethod.packets), 2 + 5)
+        self.assertEqual(1, FakeWriteMethod.closed)
+
+    async def test_enumerate(self):
+        self.assertEqual({'fake': {'a': 'Badge A', 'b': 'Badge B'}},
+                         await lednamebadge_async.get_available_devices('fake'))
+        self.assertEqual({}, await lednamebadge_async.get_available_devices('nothing'))
+
+    async def test_no_device(self):
+        FakeWriteMethod.devices_found = {}
+        with self.assertRaises(IOError):
+            await lednamebadge_async.AsyncBadge('fake').open()
+        with patch.object(lednamebadge_async.LedNameBadge, '_find_write_method', return_value=None):
+            with self.assertRaises(IOError):
+                await lednamebadge_async.AsyncBadge('fake').open()
+
+    async def test_watch_devices(self):
+        root = tempfile.mkdtemp()
+        try:
+            device = os.path.join(root, 'bus', 'usb', 'devices', '3-4')
+            os.makedirs(device)
+            for attribute, value in (('idVendor', '0416'), ('idProduct', '5020'), ('busnum', 3), ('devnum', 5)):
+                with open(os.path.join(device, attribute), 'w') as f:
+                    f.write("%s\n" % (value,))
+            events = lednamebadge_async.watch_devices(0.01, HotplugWatcher(SysfsUsbBackend(root)))
+            event = await asyncio.wait_for(events.__anext__(), 5)
+            self.assertEqual(('add', '3-4'), event[:2])
+            shutil.rmtree(device)
+            event = await asyncio.wait_for(events.__anext__(), 5)
+            self.assertEqual(('remove', '3-4'), event[:2])
+            await events.aclose()
+        finally:
+            shutil.rmtree(root)
+
+
+class TestLibUsb(abstract_write_method_test.AbstractWriteMethodTest):
+    def test_pacing(self):
+        def func(m):
+            sys.modules['lednamebadge'].WriteLibUsb.pacing = 'conservative'
+            sys.modules['lednamebadge'].WriteLibUsb.conservative_delay = 0.01
+            # Bound to the freshly imported lednamebadge with the mocks, the original is restored afterwards
+            del sys.modules['lednamebadge_async']
+            import lednamebadge_async as fresh_async
+            badge = fresh_async.AsyncBadge('libusb')
+
+            async def write():
+                await badge.write(array('B', [1] * 256))
+                await badge.close()
+
+            asyncio.run(write())
+            return True
+
+        with patch('time.sleep') as sleep_mock:
+            result, output, mocks = self.prepare_modules(True, True, True, func)
+        self.assertTrue(result)
+        sleep_mock.assert_not_called()
+        self.assertEqual(4, mocks['usb'].util.find_descriptor.return_value[0].write.call_count)
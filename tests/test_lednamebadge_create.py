@@ -1,7 +1,18 @@
+import os
+import random
+import shutil
+import tempfile
 from array import array
+from io import BytesIO
 from unittest import TestCase
+from unittest.mock import patch
 
-from lednamebadge import SimpleTextAndIcons as testee
+from lednamebadge import SimpleTextAndIcons as testee, BitmapCache, RenderCache
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 
 class Test(TestCase):
@@ -13,6 +24,72 @@ class Test(TestCase):
                                  4, 5, 15, 31, 63, 127, 255]),
                           3), buf)
 
+    def test_bitmap_img_modes(self):
+        from PIL import Image
+        rnd = random.Random(4711)
+        for mode in ('1', 'L', 'P', 'LA', 'RGB', 'RGBA', 'I'):
+            for width in (1, 8, 13, 44, 301):
+                im = Image.new(mode, (width, 11))
+                bands = len(im.getbands())
+                im.putdata([tuple(rnd.randrange(256) for _ in range(bands)) if bands > 1 else rnd.randrange(256)
+                            for _ in range(width * 11)])
+                file = BytesIO()
+                im.save(file, 'TIFF' if mode == 'I' else 'PNG')
+                expected = self.reference_bitmap_img(Image.open(BytesIO(file.getvalue())))
+                for numpy_module in {numpy, None}:
+                    with self.subTest(mode=mode, width=width, numpy=numpy_module is not None):
+                        with patch('lednamebadge._optional_numpy', return_value=numpy_module):
+                            self.assertEqual(expected, testee.bitmap_img(BytesIO(file.getvalue())))
+
+    @staticmethod
+    def reference_bitmap_img(im):
+        """The original pixel by pixel implementation of bitmap_img()"""
+        buf = array('B')
+        cols = int((im.width + 7) / 8)
+        for col in range(cols):
+            for row in range(11):
+                byte_val = 0
+                for bit in range(8):
+                    x = 8 * col + bit
+                    if x < im.width:
+                        pixel_color = im.getpixel((x, row))
+                        if isinstance(pixel_color, tuple):
+                            monochrome_color = sum(pixel_color[:3]) / len(pixel_color[:3])
+                        else:
+                            monochrome_color = pixel_color
+                        if monochrome_color > 127:
+                            byte_val += 1 << (7 - bit)
+                buf.append(byte_val)
+        return buf, cols
+
+    def test_bitmap_img_cached(self):
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        expected = testee.bitmap_img("resources/bitpatterns.png")
+        with patch.object(testee, 'image_cache', BitmapCache(cache_dir)):
+            self.assertEqual(expected, testee.bitmap_img("resources/bitpatterns.png"))
+            self.assertEqual(1, len(os.listdir(cache_dir)))
+            # A cache hit must not need PIL at all
+            with patch.dict('sys.modules', {'PIL': None}):
+                self.assertEqual(expected, testee.bitmap_img("resources/bitpatterns.png"))
+            # Other threshold, other entry
+            self.assertNotEqual(expected, testee.bitmap_img("resources/bitpatterns.png", 255))
+            self.assertEqual(2, len(os.listdir(cache_dir)))
+
+    def test_bitmap_cache_eviction(self):
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        cache = BitmapCache(cache_dir)
+        for i in range(5):
+            cache.put('key%d' % i, (array('B', [i] * 100), 9))
+            os.utime(os.path.join(cache_dir, 'key%d.bmc' % i), (i, i))
+        cache.max_bytes = 250
+        cache.get('key0')  # recently used now
+        cache.put('key5', (array('B', [5] * 100), 9))
+        self.assertEqual(['key0.bmc', 'key5.bmc'], sorted(os.listdir(cache_dir)))
+        self.assertEqual((array('B', [0] * 100), 9), cache.get('key0'))
+        self.assertIsNone(cache.get('key1'))
+
     def test_bitmap_text(self):
         creator = testee()
         buf = creator.bitmap("/:HEART2:\\")
@@ -21,6 +98,17 @@ class Test(TestCase):
                                  240, 248, 248, 248, 240, 224, 192, 128, 0, 0, 128, 192, 96, 48, 24, 12, 6, 2, 0, 0]),
                           4), buf)
 
+    def test_bitmap_char(self):
+        creator = testee()
+        for ch in testee.charmap:
+            if ord(ch) >= 32:
+                o = testee.char_offsets[ch]
+                self.assertEqual((testee.font_11x44[o:o + 11], 1), creator.bitmap_char(ch))
+        for data, cols, ch in testee.bitmap_named.values():
+            self.assertEqual((data, cols), creator.bitmap_char(ch))
+        with self.assertRaises(KeyError):
+            creator.bitmap_char('\u20ac')
+
     def test_preload(self):
         creator = testee()
         self.assertFalse(creator.are_preloaded_unused())
@@ -32,3 +120,103 @@ class Test(TestCase):
                                 [128, 64, 32, 16, 8, 4, 2, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 128, 64, 32, 0, 1, 2, 3,
                                  4, 5, 15, 31, 63, 127, 255]),
                           3), buf)
+
+    def test_render_cache(self):
+        cache = RenderCache()
+        creator = testee()
+        expected = creator.bitmap("/:HEART2:\\")
+        with patch.object(testee, 'render_cache', cache):
+            self.assertEqual(expected, creator.bitmap("/:HEART2:\\"))
+            buf = creator.bitmap("/:HEART2:\\")
+            self.assertEqual(expected, buf)
+            buf[0][0] = 255  # must not modify the cache entry
+            self.assertEqual(expected, testee().bitmap("/:HEART2:\\"))
+        self.assertEqual({'entries': 1, 'bytes': 44, 'hits': 2, 'misses': 1}, cache.get_stats())
+
+    def test_render_cache_preloaded(self):
+        cache = RenderCache()
+        with patch.object(testee, 'render_cache', cache):
+            creator = testee()
+            creator.add_preload_img("resources/bitpatterns.png")
+            creator.bitmap("A\x01")
+            creator.add_preload_img("resources/bitpatterns.png")
+            self.assertTrue(creator.are_preloaded_unused())
+            buf = creator.bitmap("A\x01")
+            self.assertFalse(creator.are_preloaded_unused())
+            self.assertEqual(4, buf[1])
+            self.assertEqual({'entries': 1, 'bytes': 44, 'hits': 1, 'misses': 1}, cache.get_stats())
+
+            other = testee()
+            other.bitmap_preloaded.append((array('B', [1] * 11), 1))
+            self.assertEqual((array('B', [0, 56, 108, 198, 198, 254, 198, 198, 198, 198, 0] + [1] * 11), 2),
+                             other.bitmap("A\x01"))
+            self.assertEqual(2, cache.get_stats()['misses'])
+
+    def test_render_cache_image_file(self):
+        cache = RenderCache()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'x.png')
+        shutil.copy("resources/bitpatterns.png", path)
+        creator = testee()
+        creator.render_cache = cache
+        expected = testee().bitmap("A:%s:" % path)
+        with patch.object(testee, 'bitmap_img', wraps=testee.bitmap_img) as bitmap_img:
+            for _ in range(3):
+                self.assertEqual(expected, creator.bitmap("A:%s:" % path))
+            self.assertEqual(1, bitmap_img.call_count)
+            self.assertEqual(2, len(creator.bitmap_preloaded))
+            self.assertEqual({'entries': 1, 'bytes': 44, 'hits': 2, 'misses': 1}, cache.get_stats())
+
+            shutil.copy("resources/bitpatterns.png", path)
+            os.utime(path, ns=(0, 0))  # a changed file is loaded again
+            self.assertEqual(expected, creator.bitmap("A:%s:" % path))
+            self.assertEqual(2, bitmap_img.call_count)
+        self.assertIsNone(testee.render_cache)
+
+    def test_render_cache_eviction(self):
+        cache = RenderCache(max_entries=2)
+        with patch.object(testee, 'render_cache', cache):
+            creator = testee()
+            for text in ("A", "B", "A", "C"):
+                creator.bitmap_text(text)
+        self.assertEqual(["A", "C"], [key[-1] for key in cache._entries])
+        cache = RenderCache(max_bytes=30)
+        with patch.object(testee, 'render_cache', cache):
+            testee().bitmap_text("AB")
+            testee().bitmap_text("CD")
+        self.assertEqual(["CD"], [key[-1] for key in cache._entries])
+
+    def test_render_many(self):
+        texts = ["", "A", "OPEN", "/:HEART2:\\", "a::b:bicycle:c", "Jürgen ÄÖÜ ß", "\x18x\x18", ":24:"] * 3
+        expected = [testee().bitmap_text(t) for t in texts]
+        for numpy_module in {numpy, None}:
+            with self.subTest(numpy=numpy_module is not None):
+                with patch('lednamebadge._optional_numpy', return_value=numpy_module):
+                    self.assertEqual(expected, testee().render_many(texts))
+                    self.assertEqual([], testee().render_many([]))
+                    with self.assertRaises(KeyError):
+                        testee().render_many(["ok", "not ok: €"])
+
+    def test_render_many_preloaded(self):
+        creator = testee()
+        creator.add_preload_img("resources/bitpatterns.png")
+        bitmaps = creator.render_many(["A", "\x01B", ":resources/bitpatterns.png:", "C"])
+        self.assertEqual(testee().bitmap_text("A"), bitmaps[0])
+        self.assertEqual(4, bitmaps[1][1])
+        self.assertEqual(testee().bitmap_img("resources/bitpatterns.png"), bitmaps[2])
+        self.assertEqual(testee().bitmap_text("C"), bitmaps[3])
+        self.assertFalse(creator.are_preloaded_unused())
+
+    def test_proportional(self):
+        creator = testee(proportional=True)
+        # 'H' is 7 pixels wide, 'i' 4 pixels, each plus one empty column
+        self.assertEqual((array('B', [0, 198, 198, 198, 198, 254, 198, 198, 198, 198, 0,
+                                      0, 96, 96, 0, 224, 96, 96, 96, 96, 240, 0]), 2), creator.bitmap("Hi"))
+        # Blanks have a fixed advance, icons keep their width
+        self.assertEqual(2, creator.bitmap(" :heart: ")[1])
+        self.assertEqual(testee().bitmap(":HEART2:"), creator.bitmap(":HEART2:"))
+
+        text = "The quick brown fox jumps over the lazy dog"
+        self.assertLess(creator.bitmap(text)[1], testee().bitmap(text)[1])
+        self.assertEqual([creator.bitmap_text(t) for t in ("Hi", text)], creator.render_many(["Hi", text]))
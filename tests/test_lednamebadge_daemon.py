@@ -0,0 +1,166 @@
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+from io import StringIO
+from unittest.mock import patch
+from urllib.error import HTTPError
+from urllib.request import urlopen, Request
+
+import abstract_write_method_test
+from abstract_write_method_test import FakeWriteMethod
+from lednamebadge import WriteMethod, BadgeDaemon, BadgeProtocol, main
+
+
+class Test(abstract_write_method_test.FakeWriteMethodTest):
+    def setUp(self):
+        super().setUp()
+        self.daemon = BadgeDaemon({'method': 'fake', 'speed': '2'})
+
+    def tearDown(self):
+        FakeWriteMethod.gate.set()
+        self.daemon.close()
+
+    def texts(self):
+        decoded = [(w[0], BadgeProtocol.decode(w[1])) for w in FakeWriteMethod.written]
+        return [(d[0], len(d[1]['messages']), d[1]['messages'][0]['speed']) for d in decoded]
+
+    def test_write(self):
+        response = self.daemon.handle({'messages': ['Hello', ':HEART2:'], 'device_id': 'b', 'mode': [4, 5], 'wait': True})
+        self.assertEqual({'ok': True, 'device': 'fake/b', 'state': 'written'}, response)
+        self.assertEqual([('b', 2, 2)], self.texts())
+        self.assertEqual([4, 5], [m['mode'] for m in BadgeProtocol.decode(FakeWriteMethod.written[0][1])['messages']])
+        stats = self.daemon.get_stats()
+        self.assertEqual(1, stats['requests'])
+        self.assertEqual(['fake/b'], list(stats['devices'].keys()))
+        self.assertEqual(1, stats['devices']['fake/b']['written'])
+        self.assertEqual(0, stats['devices']['fake/b']['queue_depth'])
+        self.assertIsNotNone(stats['devices']['fake/b']['mean_latency'])
+
+    def test_coalescing(self):
+        FakeWriteMethod.gate.clear()
+        first = self.daemon.handle({'messages': ['1'], 'speed': 1})
+        self.assertTrue(FakeWriteMethod.started.wait(5))  # in flight
+        responses = [self.daemon.handle({'messages': ['2'] * n, 'speed': n}) for n in (2, 3, 4)]
+        self.assertEqual([2, 2, 2], [r['queue_depth'] for r in responses])
+        queue = self.daemon.queues['fake/auto']
+        self.assertEqual(2, queue.get_stats()['coalesced'])
+        FakeWriteMethod.gate.set()
+        queue.close()
+        self.assertEqual('queued', first['state'])
+        # Only the newest of the requests arriving while writing is written
+        self.assertEqual([('a', 1, 1), ('a', 4, 4)], self.texts())
+        stats = queue.get_stats()
+        self.assertEqual((4, 2, 2, 0), (stats['received'], stats['written'], stats['coalesced'], stats['failed']))
+
+    def test_coalesced_wait(self):
+        FakeWriteMethod.gate.clear()
+        self.daemon.handle({'messages': ['1']})
+        self.assertTrue(FakeWriteMethod.started.wait(5))
+        results = []
+        waiting = threading.Thread(target=lambda: results.append(self.daemon.handle({'messages': ['2'], 'wait': True})))
+        waiting.start()
+        while self.daemon.queues['fake/auto'].get_stats()['received'] < 2:
+            waiting.join(0.01)
+        self.daemon.handle({'messages': ['3']})
+        waiting.join(5)
+        self.assertEqual([{'ok': True, 'device': 'fake/auto', 'state': 'coalesced'}], results)
+
+    def test_wait_timeout(self):
+        FakeWriteMethod.gate.clear()
+        with patch.object(BadgeDaemon, 'wait_timeout', 0.05):
+            response = self.daemon.handle({'messages': ['1'], 'wait': True})
+        self.assertEqual({'ok': False, 'device': 'fake/auto', 'state': 'timeout',
+                          'error': "Not written within 0.05 s, the request is still queued"}, response)
+        FakeWriteMethod.gate.set()
+        self.assertEqual('written', self.daemon.handle({'messages': ['2'], 'wait': True})['state'])
+
+    def test_lock_timeout(self):
+        self.daemon.handle({'messages': ['1'], 'device_id': 'a', 'wait': True})
+        self.assertEqual(BadgeDaemon.lock_timeout, self.daemon.queues['fake/a'].session.write_method.lock_timeout)
+        with patch.object(WriteMethod, 'lock_timeout', 5):
+            self.daemon.handle({'messages': ['1'], 'device_id': 'b', 'wait': True})
+            self.assertEqual(5, self.daemon.queues['fake/b'].session.write_method.lock_timeout)
+
+    def test_errors(self):
+        self.assertFalse(self.daemon.handle({'messages': [':nothing:']})['ok'])
+        self.assertFalse(self.daemon.handle({'messages': 'x' * 2000})['ok'])
+        self.assertFalse(self.daemon.handle({'messages': [1]})['ok'])
+        self.assertFalse(self.daemon.handle({'messages': ['x'], 'device_id': 'all'})['ok'])
+        self.assertFalse(self.daemon.handle({'command': 'shutdown'})['ok'])
+        self.assertFalse(self.daemon.handle([])['ok'])
+        self.assertEqual({}, self.daemon.get_stats()['devices'])
+
+        FakeWriteMethod.failing = {'a': 'write'}
+        response = self.daemon.handle({'messages': ['x'], 'wait': True})
+        self.assertEqual({'ok': False, 'device': 'fake/auto', 'state': 'failed',
+                          'error': "Writing to the device failed at offset 64"}, response)
+        self.assertEqual(1, self.daemon.get_stats()['devices']['fake/auto']['failed'])
+
+        FakeWriteMethod.failing = {}
+        self.assertTrue(self.daemon.handle({'messages': ['x'], 'wait': True})['ok'])  # reopened
+
+    def test_unix_socket(self):
+        if not hasattr(socket, 'AF_UNIX'):
+            self.skipTest("no Unix sockets")
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, 'badge.sock')
+        self.daemon.serve_unix(path)
+        with self.assertRaises(IOError):
+            BadgeDaemon().serve_unix(path)
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        client.connect(path)
+        f = client.makefile('rwb')
+        f.write(b'{"messages": ["Hi"], "wait": true}\n{"command": "stats"}\nnot json\n')
+        f.flush()
+        responses = [json.loads(f.readline().decode('utf-8')) for i in range(3)]
+        client.close()
+        self.assertEqual('written', responses[0]['state'])
+        self.assertEqual(1, responses[1]['devices']['fake/auto']['written'])
+        self.assertFalse(responses[2]['ok'])
+        self.daemon.close()
+        self.assertFalse(os.path.exists(path))
+        os.rmdir(directory)
+
+    def test_http(self):
+        server = self.daemon.serve_http(0)
+        url = 'http://127.0.0.1:%d/' % (server.server_address[1],)
+        data = json.dumps({'messages': ['Hi'], 'wait': True}).encode('utf-8')
+        with urlopen(Request(url, data, {'Content-Type': 'application/json'}), timeout=5) as response:
+            self.assertEqual('written', json.loads(response.read().decode('utf-8'))['state'])
+        with urlopen(url + 'stats', timeout=5) as response:
+            self.assertEqual(1, json.loads(response.read().decode('utf-8'))['devices']['fake/auto']['written'])
+
+    def test_http_rejected(self):
+        server = self.daemon.serve_http(0)
+        port = server.server_address[1]
+        url = 'http://127.0.0.1:%d/' % (port,)
+        data = json.dumps({'messages': ['Hi']}).encode('utf-8')
+        for status, headers in ((415, {}),
+                                (415, {'Content-Type': 'text/plain'}),
+                                (415, {'Content-Type': 'application/x-www-form-urlencoded'}),
+                                (403, {'Content-Type': 'application/json', 'Origin': 'http://evil.example'}),
+                                (403, {'Content-Type': 'application/json', 'Origin': 'null'}),
+                                (403, {'Content-Type': 'application/json', 'Origin': 'http://127.0.0.1:1'})):
+            with self.subTest(headers=headers):
+                with self.assertRaises(HTTPError) as context:
+                    urlopen(Request(url, data, headers), timeout=5)
+                self.assertEqual(status, context.exception.code)
+                self.assertFalse(json.loads(context.exception.read().decode('utf-8'))['ok'])
+                context.exception.close()
+        self.assertEqual(0, self.daemon.requests)
+
+        headers = {'Content-Type': 'application/json; charset=utf-8', 'Origin': 'http://localhost:%d' % (port,)}
+        with urlopen(Request(url, data, headers), timeout=5) as response:
+            self.assertTrue(json.loads(response.read().decode('utf-8'))['ok'])
+
+    def test_main(self):
+        with patch.object(BadgeDaemon, 'serve_forever') as serve_mock, patch.object(WriteMethod, 'state_store'):
+            with patch.object(sys, 'argv', ['lednamebadge.py', '--serve', '--serve', '8044', '-s', '7']):
+                main()
+        serve_mock.assert_called_once_with([BadgeDaemon.get_default_socket(), '8044'])
+        with patch.object(sys, 'argv', ['lednamebadge.py']), patch('sys.stderr', new_callable=StringIO):
+            with self.assertRaises(SystemExit):
+                main()
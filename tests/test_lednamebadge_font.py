@@ -0,0 +1,98 @@
+import glob
+import os
+import shutil
+import tempfile
+from array import array
+from unittest import TestCase, skipUnless
+from unittest.mock import patch
+
+from lednamebadge import FontRasterizer as testee, SimpleTextAndIcons
+
+BDF = """STARTFONT 2.1
+FONT -test-fixed-medium-r-normal--9-90-75-75-c-50-iso10646-1
+SIZE 9 75 75
+FONTBOUNDINGBOX 5 9 0 -2
+STARTPROPERTIES 2
+FONT_ASCENT 7
+FONT_DESCENT 2
+ENDPROPERTIES
+CHARS 2
+STARTCHAR Lslash
+ENCODING 321
+SWIDTH 500 0
+DWIDTH 6 0
+BBX 5 7 0 0
+BITMAP
+80
+80
+A0
+C0
+80
+80
+F8
+ENDCHAR
+STARTCHAR scedilla
+ENCODING 351
+SWIDTH 500 0
+DWIDTH 5 0
+BBX 4 7 0 -2
+BITMAP
+70
+80
+60
+10
+E0
+20
+40
+ENDCHAR
+ENDFONT
+"""
+
+TRUETYPE_FONTS = glob.glob('/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf') + glob.glob('C:/Windows/Fonts/arial.ttf')
+
+
+class Test(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+        self.font_file = os.path.join(self.tmp_dir, 'test.bdf')
+        with open(self.font_file, 'w') as f:
+            f.write(BDF)
+        self.atlas_dir = os.path.join(self.tmp_dir, 'atlas')
+
+    def test_bdf_glyph(self):
+        font = testee(self.font_file, atlas_dir=self.atlas_dir)
+        self.assertEqual(([0, 0x80, 0x80, 0xa0, 0xc0, 0x80, 0x80, 0xf8, 0, 0, 0], 1),
+                         (font.glyph(u'\u0141')[0].tolist(), font.glyph(u'\u0141')[1]))
+        self.assertEqual(([0, 0, 0, 0x70, 0x80, 0x60, 0x10, 0xe0, 0x20, 0x40, 0], 1),
+                         (font.glyph(u'\u015f')[0].tolist(), font.glyph(u'\u015f')[1]))
+        with self.assertRaises(KeyError):
+            font.glyph(u'\u20ac')
+
+    def test_atlas(self):
+        font = testee(self.font_file, atlas_dir=self.atlas_dir)
+        expected = font.glyph(u'\u0141')[0].tobytes()
+        self.assertEqual(1, len(os.listdir(self.atlas_dir)))
+        # Another process does not need to read the font file again
+        font = testee(self.font_file, atlas_dir=self.atlas_dir)
+        with patch.object(testee, '_read_bdf', side_effect=AssertionError("not rasterized again")):
+            self.assertEqual(expected, font.glyph(u'\u0141')[0].tobytes())
+        # Another size is another atlas
+        testee(self.font_file, size=12, atlas_dir=self.atlas_dir).glyph(u'\u0141')
+        self.assertEqual(2, len(os.listdir(self.atlas_dir)))
+
+    def test_fallback(self):
+        creator = SimpleTextAndIcons(fallback_font=testee(self.font_file, atlas_dir=self.atlas_dir))
+        buf, cols = creator.bitmap(u"A\u0141")
+        self.assertEqual(2, cols)
+        self.assertEqual(SimpleTextAndIcons().bitmap("A")[0], buf[:11])
+        self.assertEqual([creator.bitmap(u"A\u0141"), creator.bitmap("B")], creator.render_many([u"A\u0141", "B"]))
+        with self.assertRaises(KeyError):
+            SimpleTextAndIcons().bitmap(u"A\u0141")
+
+    @skipUnless(TRUETYPE_FONTS, "No TrueType font found")
+    def test_truetype(self):
+        font = testee(TRUETYPE_FONTS[0], atlas_dir=self.atlas_dir)
+        data, cols = font.glyph(u'\u0141')
+        self.assertEqual(11 * cols, len(data))
+        self.assertTrue(any(data))
@@ -0,0 +1,58 @@
+from array import array
+from unittest import TestCase
+
+from lednamebadge import Framebuffer as testee, SimpleTextAndIcons
+
+
+class Test(TestCase):
+    def setUp(self):
+        self.pixels = [[0, 1, 1, 0, 0],
+                       [1, 0, 0, 1, 0],
+                       [1, 1, 1, 1, 1]]
+
+    def test_columns_roundtrip(self):
+        bitmap = SimpleTextAndIcons().bitmap("/:HEART2:\\")
+        fb = testee.from_bitmap(bitmap)
+        self.assertEqual((32, 11), (fb.width, fb.height))
+        self.assertEqual(bitmap, fb.to_columns())
+        self.assertEqual(bitmap, SimpleTextAndIcons().framebuffer("/:HEART2:\\").to_columns())
+
+    def test_to_columns_padding(self):
+        fb = testee.from_pixels(self.pixels)
+        self.assertEqual((array('B', [0b01100000, 0b10010000, 0b11111000]), 1), fb.to_columns())
+        self.assertEqual((array('B'), 0), testee(0, 3).to_columns())
+
+    def test_pixels(self):
+        fb = testee.from_pixels(self.pixels)
+        self.assertEqual([[bool(p) for p in row] for row in self.pixels], fb.to_pixels())
+        self.assertTrue(fb.get_pixel(1, 0))
+        self.assertFalse(fb.get_pixel(0, 0))
+        fb.set_pixel(0, 0)
+        fb.set_pixel(4, 2, False)
+        self.assertEqual("###..\n#..#.\n####.", str(fb))
+
+    def test_invert(self):
+        self.assertEqual("#..##\n.##.#\n.....", str(testee.from_pixels(self.pixels).invert()))
+
+    def test_shift(self):
+        self.assertEqual("...##\n..#..\n..###",
+                         str(testee.from_pixels(self.pixels).shift(2)))
+        self.assertEqual("#....\n.#...\n###..", str(testee.from_pixels(self.pixels).shift(-2)))
+        self.assertEqual(".....\n.##..\n#..#.", str(testee.from_pixels(self.pixels).shift(0, 1)))
+        self.assertEqual("#####\n.....\n.....", str(testee.from_pixels(self.pixels).shift(0, -2)))
+        self.assertEqual(".....\n.....\n.....", str(testee.from_pixels(self.pixels).shift(0, 5)))
+
+    def test_crop(self):
+        fb = testee.from_pixels(self.pixels)
+        self.assertEqual(".#.\n###", str(fb.crop(2, 1, 3, 2)))
+        self.assertEqual("#...\n##..\n....", str(fb.crop(3, 1, 4, 3)))
+        self.assertEqual("...\n...", str(fb.crop(-2, -1, 3, 2)))
+
+    def test_blit(self):
+        src = testee.from_pixels([[1, 1], [1, 0]])
+        self.assertEqual(".###.\n#.##.\n#####", str(testee.from_pixels(self.pixels).blit(src, 2, 0)))
+        self.assertEqual(".#.#.\n#.##.\n#####", str(testee.from_pixels(self.pixels).blit(src, 2, 0, 'xor')))
+        self.assertEqual(".##..\n#..##\n####.", str(testee.from_pixels(self.pixels).blit(src, 3, 1, 'copy')))
+        self.assertEqual(".##.#\n#..#.\n#####", str(testee.from_pixels(self.pixels).blit(src, 4, -1)))
+        with self.assertRaises(ValueError):
+            testee.from_pixels(self.pixels).blit(src, mode='and')
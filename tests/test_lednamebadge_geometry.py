@@ -0,0 +1,46 @@
+import datetime
+from array import array
+from unittest import TestCase
+
+from lednamebadge import DisplayGeometry as testee, SimpleTextAndIcons, LedNameBadge
+
+
+class Test(TestCase):
+    def test_get(self):
+        self.assertEqual((11, 44), (testee.get('11x44').rows, testee.get('11x44').width))
+        self.assertEqual((12, 48), (testee.get('12x48').rows, testee.get('12x48').width))
+        self.assertEqual((11, 55), (testee.get('11x55').rows, testee.get('11x55').width))
+        self.assertIs(testee.get('12x48'), testee.get('12'))
+        self.assertIs(testee.get('11x55'), testee.get('55'))
+        with self.assertRaises(ValueError):
+            testee.get('16x64')
+
+    def test_capacity(self):
+        self.assertEqual(738, testee.get('11x44').get_capacity())
+        self.assertEqual(677, testee.get('12x48').get_capacity())
+        self.assertEqual(738, testee.get('11x55').get_capacity())
+
+    def test_bitmap_12x48(self):
+        for arg in ("/:HEART2:\\", "resources/bitpatterns.png", ""):
+            expected = self.legacy_12x48_hack(SimpleTextAndIcons().bitmap(arg))
+            self.assertEqual(expected, SimpleTextAndIcons(geometry=testee.get('12x48')).bitmap(arg))
+        texts = ["A", ":heart:B"]
+        self.assertEqual([self.legacy_12x48_hack(SimpleTextAndIcons().bitmap(t)) for t in texts],
+                         SimpleTextAndIcons(geometry=testee.get('12x48')).render_many(texts))
+        fb = SimpleTextAndIcons(geometry=testee.get('12x48')).framebuffer("A")
+        self.assertEqual((8, 12), (fb.width, fb.height))
+
+    def test_header_capacity(self):
+        date = datetime.datetime(2022, 11, 13, 17, 38, 24)
+        LedNameBadge.header((738,), (4,), (4,), (0,), (0,), 100, date, testee.get('11x44'))
+        LedNameBadge.header((677,), (4,), (4,), (0,), (0,), 100, date, testee.get('12x48'))
+        with self.assertRaises(ValueError):
+            LedNameBadge.header((678,), (4,), (4,), (0,), (0,), 100, date, testee.get('12x48'))
+
+    @staticmethod
+    def legacy_12x48_hack(bitmap):
+        """The former way of main() to support 12x48 badges"""
+        buf = array('B', bitmap[0])
+        for i in reversed(range(1, int(len(buf) / 11) + 1)):
+            buf[i * 11:i * 11] = array('B', [0])
+        return buf, bitmap[1]
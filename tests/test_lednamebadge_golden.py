@@ -0,0 +1,73 @@
+import os
+from unittest import TestCase
+from unittest.mock import patch
+
+import usbmon_capture
+from lednamebadge import SimpleTextAndIcons, BadgeProtocol, LedNameBadge, RenderCache
+
+
+class Test(TestCase):
+    def test_read_packets(self):
+        packets = usbmon_capture.read_packets(os.path.join(usbmon_capture.DOC_DIR, 'ABCDE.txt'))
+        self.assertEqual(19, len(packets))
+        self.assertEqual([64] * 19, [len(p) for p in packets])
+        self.assertEqual(b'wang', packets[0][:4])
+        # This line of the hex dump is split in two in the capture
+        self.assertEqual(bytes.fromhex("00386cc6c6fec6c6c6c60000fc666666"), packets[1][:16])
+
+    def test_list_captures(self):
+        self.assertEqual(sorted([c[0] for c in usbmon_capture.GOLDEN_CAPTURES]), usbmon_capture.list_captures())
+
+    def test_golden(self):
+        for capture in usbmon_capture.GOLDEN_CAPTURES:
+            with self.subTest(capture=capture[0]):
+                expected, actual = usbmon_capture.encode_golden(capture)
+                self.assertEqual(expected.hex(' '), actual.hex(' '))
+
+    def test_golden_render_cache(self):
+        cache = RenderCache()
+        creator = SimpleTextAndIcons()
+        with patch.object(SimpleTextAndIcons, 'render_cache', cache):
+            for i in range(2):
+                for capture in usbmon_capture.GOLDEN_CAPTURES:
+                    with self.subTest(capture=capture[0], run=i):
+                        expected, actual = usbmon_capture.encode_golden(capture, creator)
+                        self.assertEqual(expected.hex(' '), actual.hex(' '))
+        stats = cache.get_stats()
+        self.assertEqual(stats['misses'], stats['hits'])  # the second run is taken from the cache
+        self.assertGreater(stats['hits'], 0)
+
+    def test_hex_dump(self):
+        self.assertEqual(['hex.txt'], [d[0] for d in usbmon_capture.HEX_DUMPS])
+        for hex_dump in usbmon_capture.HEX_DUMPS:
+            with self.subTest(hex_dump=hex_dump[0]):
+                dump = usbmon_capture.read_hex_dump(os.path.join(usbmon_capture.DOC_DIR, hex_dump[0]))
+                transfer = usbmon_capture.read_transfer(os.path.join(usbmon_capture.DOC_DIR, hex_dump[1]))
+                self.assertEqual(transfer[LedNameBadge.header_size:LedNameBadge.header_size + len(dump)], dump)
+                expected, actual = usbmon_capture.render_hex_dump(hex_dump)
+                self.assertEqual(expected.hex(' '), actual.hex(' '))
+
+    def test_vendor_glyphs(self):
+        """The capture differs from lednamebadge by exactly the bytes given in VENDOR_GLYPHS, see the reasons there"""
+        creator = SimpleTextAndIcons()
+        seen = set()
+        for capture in usbmon_capture.GOLDEN_CAPTURES:
+            transfer = usbmon_capture.read_transfer(os.path.join(usbmon_capture.DOC_DIR, capture[0]))
+            for ch, pos in usbmon_capture.vendor_glyph_positions(capture, LedNameBadge.header_size):
+                with self.subTest(capture=capture[0], char=ch):
+                    glyph, reason = usbmon_capture.VENDOR_GLYPHS[ch]
+                    self.assertTrue(reason)
+                    self.assertEqual(glyph.hex(' '), transfer[pos:pos + 11].hex(' '))
+                    try:
+                        self.assertNotEqual(glyph, bytes(creator.bitmap_text(ch)[0]))
+                    except KeyError:
+                        pass  # not in the builtin font at all
+                    seen.add(ch)
+        self.assertEqual(set(usbmon_capture.VENDOR_GLYPHS.keys()), seen)
+
+    def test_decode(self):
+        buf = usbmon_capture.read_transfer(os.path.join(usbmon_capture.DOC_DIR, 'dot-dot-pipe_-komma.txt'))
+        decoded = BadgeProtocol.decode(buf)
+        self.assertEqual([(5, 0, 8), (5, 6, 0), (5, 7, 5), (5, 8, 7)],
+                         [(m['speed'], m['mode'], m['bitmap'][1]) for m in decoded['messages']])
+        self.assertIsNone(decoded['date'])
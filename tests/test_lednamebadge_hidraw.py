@@ -0,0 +1,80 @@
+import os
+import shutil
+import sys
+import tempfile
+from array import array
+from unittest.mock import patch
+
+import abstract_write_method_test
+
+
+class Test(abstract_write_method_test.AbstractWriteMethodTest):
+    def setUp(self):
+        super().setUp()
+        self.root = tempfile.mkdtemp()
+        self.hidraw_sysfs_root = os.path.join(self.root, 'sys')
+        self.hidraw_dev_root = os.path.join(self.root, 'dev')
+        os.makedirs(self.hidraw_dev_root)
+        self.add_hidraw('hidraw0', '0003:0000046D:0000C52B', 'Logitech USB Receiver')
+        self.add_hidraw('hidraw1', '0003:00000416:00005020', 'LSicroelectronics LS32 Custm HID')
+        os.mkfifo(os.path.join(self.hidraw_dev_root, 'hidraw1'))
+        # The reader must be opened first, so opening the writer does not block
+        self.reader = os.open(os.path.join(self.hidraw_dev_root, 'hidraw1'), os.O_RDONLY | os.O_NONBLOCK)
+
+    def tearDown(self):
+        os.close(self.reader)
+        shutil.rmtree(self.root)
+
+    def add_hidraw(self, name, hid_id, hid_name):
+        path = os.path.join(self.hidraw_sysfs_root, 'class', 'hidraw', name, 'device')
+        os.makedirs(path)
+        with open(os.path.join(path, 'uevent'), 'w') as f:
+            f.write("DRIVER=hid-generic\nHID_ID=%s\nHID_NAME=%s\nHID_PHYS=usb-0000:00:14.0-4/input0\nHID_UNIQ=\n" % (
+                hid_id, hid_name))
+
+    @patch('sys.platform', new='linux')
+    def test_device_ids(self):
+        device_ids, output, _ = self.prepare_modules(False, False, False,
+                                                     lambda m: m.get_available_device_ids('hidraw'))
+        self.assertEqual({'hidraw1': 'LSicroelectronics LS32 Custm HID (hidraw1 usb-0000:00:14.0-4/input0)'},
+                         device_ids)
+
+    @patch('sys.platform', new='linux')
+    def test_write(self):
+        for method in ('hidraw', 'auto'):
+            with self.subTest(method=method):
+                # Without pyusb and pyhidapi, 'auto' selects hidraw
+                _, output, _ = self.prepare_modules(False, False, False,
+                                                    lambda m: m.write(array('B', range(100)), method))
+                self.assertIn("Hidraw device initialized", output)
+                self.assertIn("via hidraw", output)
+                data = os.read(self.reader, 1000)
+                expected = array('B', [0]) + array('B', range(64)) + array('B', [0]) + array('B', range(64, 100))
+                expected.extend([0] * 28)
+                self.assertEqual(expected.tobytes(), data)
+
+    @patch('sys.platform', new='linux')
+    def test_auto_order(self):
+        # with the python packages, hidapi is preferred
+        _, output, mocks = self.prepare_modules(True, True, True, lambda m: m.write(array('B', [1]), 'auto'))
+        self.assertIn("via hidapi", output)
+        self.assertEqual(b'', self.read_all())
+
+    @patch('sys.platform', new='linux')
+    def test_no_access(self):
+        os.remove(os.path.join(self.hidraw_dev_root, 'hidraw1'))
+        _, output, _ = self.prepare_modules(False, False, False, lambda m: m.write(array('B', [1]), 'hidraw'))
+        self.assertIn("No write access to device", output)
+        self.assertIn("device is not available", output)
+
+    @patch('sys.platform', new='darwin')
+    def test_not_linux(self):
+        _, output, _ = self.prepare_modules(False, True, True, lambda m: m.write(array('B', [1]), 'hidraw'))
+        self.assertIn("only available with Linux", output)
+        self.assertNotIn("device initialized", output)
+
+    def read_all(self):
+        try:
+            return os.read(self.reader, 1000)
+        except BlockingIOError:
+            return b''
@@ -0,0 +1,126 @@
+import os
+import shutil
+import tempfile
+import threading
+from array import array
+from unittest.mock import patch
+
+import abstract_write_method_test
+from abstract_write_method_test import FakeWriteMethod
+from lednamebadge import HotplugWatcher, SysfsUsbBackend, WriteMethod, DeviceRegistry, LedNameBadge
+
+
+class Test(abstract_write_method_test.FakeWriteMethodTest):
+    def setUp(self):
+        super().setUp()
+        self.root = tempfile.mkdtemp()
+        self.devices_dir = os.path.join(self.root, 'bus', 'usb', 'devices')
+        os.makedirs(self.devices_dir)
+        self.add_device('usb3', '1d6b', '0003', 3, 1)
+        self.add_device('3-4:1.0', '0416', '5020', 3, 5)  # interfaces are ignored
+        self.watcher = HotplugWatcher(SysfsUsbBackend(self.root), interval=0.01)
+
+    def tearDown(self):
+        self.watcher.stop()
+        WriteMethod.hotplug = None
+        shutil.rmtree(self.root)
+
+    def add_device(self, name, vendor_id, product_id, busnum, devnum):
+        path = os.path.join(self.devices_dir, name)
+        if not os.path.isdir(path):
+            os.mkdir(path)
+        for attribute, value in (('idVendor', vendor_id), ('idProduct', product_id), ('busnum', busnum),
+                                 ('devnum', devnum), ('manufacturer', 'LSicroelectronics'),
+                                 ('product', 'LS32 Custm HID')):
+            with open(os.path.join(path, attribute), 'w') as f:
+                f.write("%s\n" % (value,))
+
+    def remove_device(self, name):
+        shutil.rmtree(os.path.join(self.devices_dir, name))
+
+    def test_scan(self):
+        self.add_device('3-4', '0416', '5020', 3, 5)
+        self.assertEqual({'3-4': {'busnum': 3, 'devnum': 5, 'manufacturer': 'LSicroelectronics',
+                                  'product': 'LS32 Custm HID', 'path': os.path.join(self.devices_dir, '3-4')}},
+                         SysfsUsbBackend(self.root).scan())
+        self.assertTrue(SysfsUsbBackend(self.root).is_available())
+        self.assertFalse(SysfsUsbBackend(os.path.join(self.root, 'nothing')).is_available())
+        self.assertEqual({}, SysfsUsbBackend(os.path.join(self.root, 'nothing')).scan())
+
+    def test_events(self):
+        events = []
+        self.watcher.add_listener(lambda *event: events.append(event[:2]))
+        self.assertEqual([], self.watcher.poll())
+        self.assertEqual(0, self.watcher.generation)
+
+        self.add_device('3-4', '0416', '5020', 3, 5)
+        self.add_device('3-5', '0416', '5020', 3, 6)
+        self.watcher.poll()
+        self.assertEqual([('add', '3-4'), ('add', '3-5')], events)
+        self.assertEqual(['3-4', '3-5'], sorted(self.watcher.get_devices()))
+        self.assertEqual(1, self.watcher.generation)
+
+        self.assertEqual([], self.watcher.poll())
+        self.assertEqual(1, self.watcher.generation)
+
+        self.remove_device('3-4')
+        self.add_device('3-5', '0416', '5020', 3, 7)  # replugged
+        self.watcher.poll()
+        self.assertEqual([('remove', '3-4'), ('remove', '3-5'), ('add', '3-5')], events[2:])
+        self.assertEqual(7, self.watcher.get_devices()['3-5']['devnum'])
+        self.assertEqual(2, self.watcher.generation)
+
+    def test_thread(self):
+        added = threading.Event()
+        self.watcher.add_listener(lambda event, name, info: added.set())
+        self.watcher.start()
+        self.add_device('3-4', '0416', '5020', 3, 5)
+        self.assertTrue(added.wait(5))
+        self.watcher.stop()
+        self.assertIn('3-4', self.watcher.get_devices())
+
+    def test_write_method_cache(self):
+        method = FakeWriteMethod(devices={'1': 'Fake'})
+        WriteMethod.hotplug = self.watcher
+        self.assertEqual({'1': 'Fake'}, method.get_available_devices())
+        self.assertIs(method.get_available_devices(), method.get_available_devices())
+        self.assertFalse(method.needs_enumeration())
+        self.assertEqual(1, method.own_enumerations)
+
+        self.add_device('3-4', '0416', '5020', 3, 5)
+        method.fake_devices = {'2': 'Fake'}
+        self.watcher.poll()
+        self.assertTrue(method.needs_enumeration())
+        self.assertEqual({'fake': {'2': 'Fake'}}, DeviceRegistry([method]).enumerate())
+        self.assertEqual({'2': 'Fake'}, method.get_available_devices())
+        self.assertEqual(2, method.own_enumerations)
+
+    def test_new_write_methods(self):
+        WriteMethod.hotplug = self.watcher
+        for i in range(3):
+            self.assertEqual({'a': 'Badge A', 'b': 'Badge B'}, LedNameBadge.get_available_device_ids('fake'))
+        LedNameBadge.write(array('B', [1] * 64), 'fake', 'b')
+        self.assertEqual(1, FakeWriteMethod.enumerations)
+        self.assertEqual([('b', b'\1' * 64)], FakeWriteMethod.written)
+
+        self.add_device('3-4', '0416', '5020', 3, 5)
+        FakeWriteMethod.devices_found = {'c': ('Badge C',)}
+        self.watcher.poll()
+        self.assertEqual({'c': 'Badge C'}, LedNameBadge.get_available_device_ids('fake'))
+        self.assertEqual({'c': 'Badge C'}, LedNameBadge.get_available_device_ids('fake'))
+        self.assertEqual(2, FakeWriteMethod.enumerations)
+
+        WriteMethod.hotplug = None
+        LedNameBadge.get_available_device_ids('fake')
+        self.assertEqual(3, FakeWriteMethod.enumerations)  # without watcher, once per object
+
+    def test_write_method_without_watcher(self):
+        found = {}
+        method = FakeWriteMethod(devices=found)
+        self.assertEqual({}, method.get_available_devices())
+        self.assertFalse(method.needs_enumeration())  # not again within the same call
+        with patch.object(WriteMethod, 'rescan_interval', 0.0):
+            self.assertTrue(method.needs_enumeration())  # none found, so a device plugged in later is found
+            found['1'] = 'Fake'
+            self.assertEqual({'1': 'Fake'}, method.get_available_devices())
+            self.assertFalse(method.needs_enumeration())
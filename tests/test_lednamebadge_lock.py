@@ -0,0 +1,119 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from array import array
+from io import StringIO
+from unittest import TestCase
+from unittest.mock import patch
+
+import abstract_write_method_test
+from abstract_write_method_test import FakeWriteMethod
+from lednamebadge import WriteMethod, WriteHidraw, WriteUsbHidApi, DeviceLock, DeviceBusyError
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+HOLD_LOCK = """
+import fcntl, sys, time
+f = open(sys.argv[1], 'a')
+fcntl.flock(f, fcntl.LOCK_EX)
+print('locked', flush=True)
+time.sleep(float(sys.argv[2]))
+"""
+
+
+@unittest.skipIf(fcntl is None, "no fcntl")
+class Test(abstract_write_method_test.FakeWriteMethodTest):
+    def setUp(self):
+        super().setUp()
+        self.processes = []
+
+    def tearDown(self):
+        for p in self.processes:
+            p.kill()
+            p.wait()
+            p.stdout.close()
+        WriteMethod.lock_timeout = None
+
+    def hold_lock(self, key, seconds):
+        p = subprocess.Popen([sys.executable, '-c', HOLD_LOCK, DeviceLock(key).get_path(), str(seconds)],
+                             stdout=subprocess.PIPE, universal_newlines=True)
+        self.processes.append(p)
+        self.assertEqual('locked', p.stdout.readline().strip())
+        return p
+
+    def test_lock(self):
+        lock = DeviceLock('usb-3-4').acquire(0)
+        self.assertEqual(os.path.join(self.directory, 'lednamebadge-usb-3-4.lock'), lock.get_path())
+        self.assertEqual(0o644, os.stat(lock.get_path()).st_mode & 0o777)  # readable, but not writable by others
+        with self.assertRaises(DeviceBusyError):
+            DeviceLock('usb-3-4').acquire(0)
+        DeviceLock('usb-3-5').acquire(0).release()
+        pauses = []
+        with patch('sys.stdout', new_callable=StringIO) as stdout:
+            with self.assertRaises(DeviceBusyError):
+                DeviceLock('usb-3-4').acquire(0.1, pauses.append)
+        self.assertIn("being written by another process, waiting", stdout.getvalue())
+        self.assertGreater(len(pauses), 0)
+        lock.release()
+        with DeviceLock('usb-3-4'):
+            pass
+        self.assertEqual('lednamebadge-_dev_hidraw1.lock', os.path.basename(DeviceLock('/dev/hidraw1').get_path()))
+
+    def test_write_fail_fast(self):
+        self.hold_lock('fake-a', 30)
+        method = FakeWriteMethod()
+        self.assertTrue(method.open('auto'))
+        WriteMethod.lock_timeout = 0
+        with self.assertRaises(DeviceBusyError):
+            method.write(array('B', [0] * 64))
+        self.assertEqual([], FakeWriteMethod.written)
+
+    def test_write_wait(self):
+        p = self.hold_lock('fake-a', 0.3)
+        method = FakeWriteMethod()
+        method.open('auto')
+        with patch('sys.stdout', new_callable=StringIO) as stdout:
+            method.write(array('B', [0] * 64))
+        self.assertEqual(1, len(FakeWriteMethod.written))
+        self.assertIn("The device fake-a is being written by another process, waiting.", stdout.getvalue())
+        self.assertEqual(0, p.wait(5))
+
+    def test_not_opened(self):
+        method = FakeWriteMethod()
+        method.write(array('B', [0] * 64))  # nothing to lock
+        self.assertEqual(0, len(os.listdir(self.directory)))
+
+
+class TestLockKeys(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        usb_device = os.path.join(self.root, 'devices', 'pci0000:00', 'usb3', '3-4')
+        hid_device = os.path.join(usb_device, '3-4:1.0', '0003:0416:5020.0001')
+        os.makedirs(hid_device)
+        for attribute, value in (('busnum', 3), ('devnum', 7)):
+            with open(os.path.join(usb_device, attribute), 'w') as f:
+                f.write("%d\n" % (value,))
+        os.makedirs(os.path.join(self.root, 'class', 'hidraw', 'hidraw1'))
+        os.symlink(hid_device, os.path.join(self.root, 'class', 'hidraw', 'hidraw1', 'device'))
+        self.sysfs_patch = patch.object(WriteHidraw, 'sysfs_root', self.root)
+        self.sysfs_patch.start()
+
+    def tearDown(self):
+        self.sysfs_patch.stop()
+        shutil.rmtree(self.root)
+
+    def test_hidraw(self):
+        self.assertEqual('usb-3-7', WriteHidraw().get_lock_key('hidraw1'))
+        self.assertEqual('hidraw-hidraw2', WriteHidraw().get_lock_key('hidraw2'))
+
+    def test_hidapi(self):
+        self.assertEqual('usb-3-7', WriteUsbHidApi().get_lock_key('/dev/hidraw1'))
+        self.assertEqual('usb-3-10', WriteUsbHidApi().get_lock_key('0003:000a:00'))
+        self.assertEqual('hidapi-IOService:/AppleACPIPlatformExpert',
+                         WriteUsbHidApi().get_lock_key('IOService:/AppleACPIPlatformExpert'))
@@ -0,0 +1,138 @@
+import sys
+import threading
+import time
+from array import array
+from io import StringIO
+from unittest.mock import patch
+
+import abstract_write_method_test
+from abstract_write_method_test import FakeWriteMethod
+from lednamebadge import WriteMethodRegistry, LedNameBadge, MultiDeviceWriter, DeviceRegistry
+
+
+class Test(abstract_write_method_test.FakeWriteMethodTest):
+    def setUp(self):
+        super().setUp()
+        FakeWriteMethod.devices_found = {'a': ('Badge A',), 'b': ('Badge B',), 'c': ('Badge C',)}
+
+    def write_all(self, buf):
+        with patch('sys.stdout', new_callable=StringIO) as stdout:
+            results = LedNameBadge.write(buf, 'fake', 'all')
+        return results, stdout.getvalue()
+
+    def test_concurrent(self):
+        FakeWriteMethod.barrier = threading.Barrier(3)
+        results, output = self.write_all(array('B', [1] * 100))
+        self.assertEqual(['a', 'b', 'c'], [r['device_id'] for r in results])
+        self.assertTrue(all([r['ok'] for r in results]))
+        self.assertEqual(['Badge A', 'Badge B', 'Badge C'], [r['description'] for r in results])
+        self.assertEqual([('a', b'\1' * 100 + b'\0' * 28), ('b', b'\1' * 100 + b'\0' * 28),
+                          ('c', b'\1' * 100 + b'\0' * 28)], sorted(FakeWriteMethod.written))
+        self.assertEqual(1, FakeWriteMethod.enumerations)
+        self.assertIn("Written to 3 of 3 devices in", output)
+        self.assertIn("fake 'b': ok in", output)
+
+    def test_failures(self):
+        FakeWriteMethod.failing = {'a': 'open', 'c': 'write'}
+        results, output = self.write_all(array('B', [1] * 64))
+        self.assertEqual([False, True, False], [r['ok'] for r in results])
+        self.assertEqual(["Device not available", None, "Writing to the device failed at offset 64"],
+                         [r['error'] for r in results])
+        self.assertEqual(['b'], [w[0] for w in FakeWriteMethod.written])
+        self.assertIn("Written to 1 of 3 devices in", output)
+        self.assertIn("fake 'c': failed after", output)
+
+    def test_max_workers(self):
+        method = WriteMethodRegistry.create('fake')
+        DeviceRegistry([method]).enumerate()
+        with patch('sys.stdout', new_callable=StringIO):
+            results = MultiDeviceWriter(method, max_workers=1).write(array('B', [1] * 64))
+        self.assertEqual(3, len(results))
+        self.assertIsNone(method.device_id)  # used for the enumeration only
+
+    def test_too_long(self):
+        with self.assertRaises(SystemExit):
+            self.write_all(array('B', [1] * 8193))
+        self.assertEqual([], FakeWriteMethod.written)
+
+
+class TestHidApi(abstract_write_method_test.AbstractWriteMethodTest):
+    def test_hidapi(self):
+        self.print_test_conditions(True, True, True, 'hidapi', 'all')
+        results, output, mocks = self.prepare_modules(True, True, True,
+                                                      lambda m: m.write(array('B', [1] * 64), 'hidapi', 'all'))
+        self.assertEqual(1, len(results))
+        self.assertTrue(results[0]['ok'])
+        mocks['pyhidapi'].hid_close.assert_called_once()
+        self.assertIn("Written to 1 of 1 devices in", output)
+
+    def test_libusb_synchronized(self):
+        def func(m):
+            sys.modules['lednamebadge'].WriteLibUsb.pacing = 'conservative'
+            return m.write(array('B', [1] * 256), 'libusb', 'all', synchronized=True)
+
+        with patch('time.sleep') as sleep_mock:
+            results, output, mocks = self.prepare_modules(True, True, True, func)
+        self.assertTrue(results[0]['ok'])
+        self.assertIsNotNone(results[0]['commit_time'])
+        # The pacing before the last chunk is done before the barrier, not twice
+        self.assertEqual(4, sleep_mock.call_count)
+        self.assertEqual(4, mocks['usb'].util.find_descriptor.return_value[0].write.call_count)
+        self.assertIn("Commit skew: 0.0 ms", output)
+
+    def test_no_device(self):
+        results, output, mocks = self.prepare_modules(True, True, False,
+                                                      lambda m: m.write(array('B', [1] * 64), 'auto', 'all'))
+        self.assertIsNone(results)
+        self.assertIn("The device is not available", output)
+
+
+class TestSynchronized(abstract_write_method_test.FakeWriteMethodTest):
+    def setUp(self):
+        super().setUp()
+        FakeWriteMethod.devices_found = {'a': ('Badge A',), 'b': ('Badge B',), 'c': ('Badge C',)}
+        FakeWriteMethod.slow = {'a': 0.05}
+        self.method = WriteMethodRegistry.create('fake')
+        DeviceRegistry([self.method]).enumerate()
+
+    def write_each(self, bufs, **kwargs):
+        with patch('sys.stdout', new_callable=StringIO) as stdout:
+            start = time.time()
+            results = MultiDeviceWriter(self.method, synchronized=True, **kwargs).write_each(bufs)
+            MultiDeviceWriter.print_report(results, time.time() - start)
+        return results, stdout.getvalue()
+
+    def test_commit(self):
+        bufs = {did: array('B', [i] * 64 * 3 + [i + 10] * 64) for i, did in enumerate(['a', 'b', 'c'])}
+        results, output = self.write_each(bufs)
+        self.assertTrue(all([r['ok'] for r in results]))
+        last_chunks = [i for i, e in enumerate(FakeWriteMethod.packets) if e[1] == bufs[e[0]][192:].tobytes()]
+        # The last chunks are sent after all the others, even by the slow device a
+        self.assertEqual([9, 10, 11], sorted(last_chunks))
+        for did in ('a', 'b', 'c'):
+            self.assertEqual(bufs[did].tobytes(), b''.join([e[1] for e in FakeWriteMethod.packets if e[0] == did]))
+        skew = MultiDeviceWriter.get_commit_skew(results)
+        self.assertLess(skew, 0.02)
+        self.assertIn("Commit skew: %.1f ms" % (skew * 1e3,), output)
+        self.assertIn("committed at +0.0 ms", output)
+
+    def test_failing_device(self):
+        FakeWriteMethod.failing = {'b': 'write'}
+        results, output = self.write_each({did: array('B', [1] * 128) for did in ('a', 'b', 'c')})
+        self.assertEqual([True, False, True], [r['ok'] for r in results])
+        self.assertIsNone(results[1]['commit_time'])
+        self.assertEqual(4, len(FakeWriteMethod.packets))
+
+    def test_timeout(self):
+        FakeWriteMethod.slow = {'a': 0.3}
+        results, output = self.write_each({did: array('B', [1] * 128) for did in ('a', 'b')}, commit_timeout=0.1)
+        self.assertEqual([False, False], [r['ok'] for r in results])
+        self.assertIn("another device was not ready in time", results[1]['error'])
+        # No device got its last chunk
+        self.assertEqual(['a', 'b'], sorted([e[0] for e in FakeWriteMethod.packets]))
+        self.assertNotIn("Commit skew", output)
+
+    def test_not_synchronized(self):
+        with patch('sys.stdout', new_callable=StringIO):
+            results = MultiDeviceWriter(self.method).write(array('B', [1] * 128))
+        self.assertIsNone(MultiDeviceWriter.get_commit_skew(results))
@@ -0,0 +1,122 @@
+import json
+import os
+import sys
+import time
+from array import array
+from unittest.mock import patch
+
+import abstract_write_method_test
+from abstract_write_method_test import USBError
+
+KEY = '0416:5020:0100@3:4'  # the device type and bus and device number of the mock
+
+
+class Test(abstract_write_method_test.AbstractWriteMethodTest):
+    def setUp(self):
+        super().setUp()
+        self.pacing_file = os.path.join(self.directory, 'pacing.json')
+
+    def test_conservative(self):
+        sleeps, output, mocks = self.call_write(256, 'conservative')
+        self.assertEqual([0.1] * 4, sleeps)
+        self.assertEqual(4, self.endpoint(mocks).write.call_count)
+        self.assertFalse(os.path.exists(self.pacing_file))
+        self.assertIn("256 bytes written in", output)
+        self.assertIn("bytes/s", output)
+
+    def test_adaptive_calibration(self):
+        sleeps, output, mocks = self.call_write(256)
+        # bInterval = 1 ms, wMaxPacketSize = 64 bytes: 1 ms per chunk, no sleep before the first one
+        self.assertEqual([0.001] * 3, sleeps)
+        self.assertEqual(4, self.endpoint(mocks).write.call_count)
+        self.assertEqual([KEY], list(self.read_pacing_file().keys()))
+        # Not less than the endpoint interval, with a margin
+        self.assertEqual(0.0015, self.read_pacing_file()[KEY]['delay'])
+
+        sleeps, output, mocks = self.call_write(256)
+        self.assertEqual([0.0015] * 3, sleeps)
+
+        self.write_pacing_file({KEY: {'delay': 0.0005, 'time': time.time()}})
+        sleeps, output, mocks = self.call_write(256)
+        self.assertEqual([0.0005] * 3, sleeps)
+        self.assertEqual(0.0005, self.read_pacing_file()[KEY]['delay'])
+
+    def test_adaptive_slow_writes(self):
+        sleeps, output, mocks = self.call_write(256, write_duration=0.004)
+        self.assertEqual(0.006, round(self.read_pacing_file()[KEY]['delay'], 6))
+
+    def test_revalidation(self):
+        for entry in (0.0, {'delay': 0.0, 'time': time.time() - 31 * 24 * 3600}):  # older format resp. too old
+            with self.subTest(entry=entry):
+                self.write_pacing_file({KEY: entry})
+                sleeps, output, mocks = self.call_write(256)
+                self.assertEqual([0.001] * 3, sleeps)
+                self.assertEqual(0.0015, self.read_pacing_file()[KEY]['delay'])
+
+        self.write_pacing_file({KEY: {'delay': 0.0, 'time': time.time()}})
+        sleeps, output, mocks = self.call_write(256, 'recalibrate')
+        self.assertEqual([0.001] * 3, sleeps)
+        self.assertEqual(0.0015, self.read_pacing_file()[KEY]['delay'])
+
+    def test_per_device(self):
+        sleeps, output, mocks = self.call_write(256, port_numbers=(1, 2))
+        self.assertEqual(['0416:5020:0100@3-1.2'], list(self.read_pacing_file().keys()))
+        sleeps, output, mocks = self.call_write(256, port_numbers=(1, 3))
+        self.assertEqual([0.001] * 3, sleeps)  # calibrated again
+
+    def test_adaptive_packet_size(self):
+        sleeps, output, mocks = self.call_write(192, wMaxPacketSize=8, bInterval=2)
+        self.assertEqual([0.016] * 2, sleeps)
+
+    def test_adaptive_fallback(self):
+        sleeps, output, mocks = self.call_write(256, write_errors=1)
+        self.assertIn("switching to conservative pacing", output)
+        self.assertEqual(5, self.endpoint(mocks).write.call_count)
+        self.assertEqual([0.1] * 3, sleeps[-3:])
+        self.assertEqual(0.1, self.read_pacing_file()[KEY]['delay'])
+
+        sleeps, output, mocks = self.call_write(256)
+        self.assertEqual([0.1] * 3, sleeps)
+
+
+    # -------------------------------------------------------------------------
+
+
+    def endpoint(self, mocks):
+        return mocks['usb'].util.find_descriptor.return_value[0]
+
+    def read_pacing_file(self):
+        with open(self.pacing_file) as f:
+            return json.load(f)
+
+    def write_pacing_file(self, delays):
+        os.makedirs(os.path.dirname(self.pacing_file), exist_ok=True)
+        with open(self.pacing_file, 'w') as f:
+            json.dump(delays, f)
+
+    def call_write(self, size, pacing='adaptive', write_errors=0, write_duration=0.0, port_numbers=None,
+                   **endpoint_attributes):
+        clock = [time.time()]
+        errors = [write_errors]
+
+        def write(packet, timeout):
+            if errors[0]:
+                errors[0] -= 1
+                raise USBError("timeout")
+            clock[0] += write_duration
+            return 64
+
+        def func(m):
+            lednamebadge = sys.modules['lednamebadge']
+            lednamebadge.WriteLibUsb.pacing = pacing
+            sys.modules['usb'].core.find.return_value[0].port_numbers = port_numbers
+            endpoint = sys.modules['usb'].util.find_descriptor.return_value[0]
+            for name, value in endpoint_attributes.items():
+                setattr(endpoint, name, value)
+            endpoint.write.side_effect = write
+            return m.write(array('B', [1] * size), 'libusb')
+
+        self.print_test_conditions(True, True, True, 'libusb', 'auto')
+        with patch('time.sleep') as sleep_mock, patch('time.time', lambda: clock[0]):
+            _, output, mocks = self.prepare_modules(True, True, True, func)
+        return [c[0][0] for c in sleep_mock.call_args_list], output, mocks
@@ -0,0 +1,75 @@
+import datetime
+from array import array
+from unittest import TestCase
+from unittest.mock import patch, Mock
+
+from lednamebadge import BadgeProtocol as testee, SimpleTextAndIcons, LedNameBadge, DisplayGeometry
+
+
+class Test(TestCase):
+    def setUp(self):
+        self.test_date = datetime.datetime(2022, 11, 13, 17, 38, 24)
+        creator = SimpleTextAndIcons()
+        self.bitmaps = [creator.bitmap("Hello"), creator.bitmap(":HEART2:"), creator.bitmap("Bye")]
+
+    def test_encode_as_legacy(self):
+        expected = array('B', LedNameBadge.header([b[1] for b in self.bitmaps], (5, 3, 1), (6, 2, 0), (0, 1, 0),
+                                                  (1, 0, 1), 50, self.test_date))
+        for b in self.bitmaps:
+            expected.extend(b[0])
+        expected.extend([0] * (-len(expected) % 64))
+
+        buf = testee.encode(self.bitmaps, (5, 3, 1), (6, 2, 0), (0, 1, 0), (1, 0, 1), 50, self.test_date)
+        self.assertIsInstance(buf, bytearray)
+        self.assertEqual(0, len(buf) % 64)
+        self.assertEqual(expected.tobytes(), bytes(buf))
+
+    def test_encode_header_into(self):
+        buf = bytearray(b'\xff' * 70)
+        testee.encode_header_into(buf, 3, (6, 7), (5, 3), (6, 2), (0, 1), (1, 0), 75, self.test_date)
+        self.assertEqual(b'\xff' * 3, buf[:3])
+        self.assertEqual(LedNameBadge.header((6, 7), (5, 3), (6, 2), (0, 1), (1, 0), 75, self.test_date),
+                         list(buf[3:67]))
+        self.assertEqual(b'\xff' * 3, buf[67:])
+
+    def test_round_trip(self):
+        buf = testee.encode(self.bitmaps, (5, 3, 1), (6, 2, 0), (0, 1, 0), (1, 0, 1), 50, self.test_date)
+        decoded = testee.decode(buf)
+        self.assertEqual(50, decoded['brightness'])
+        self.assertEqual(self.test_date, decoded['date'])
+        self.assertEqual([(5, 6, 0, 1), (3, 2, 1, 0), (1, 0, 0, 1)],
+                         [(m['speed'], m['mode'], m['blink'], m['ants']) for m in decoded['messages']])
+        self.assertEqual(self.bitmaps, [m['bitmap'] for m in decoded['messages']])
+
+    def test_round_trip_12x48(self):
+        geometry = DisplayGeometry.get('12x48')
+        bitmaps = [SimpleTextAndIcons(geometry=geometry).bitmap("Hi")]
+        buf = testee.encode(bitmaps, (8,), (8,), (1,), (1,), 25, self.test_date, geometry)
+        decoded = testee.decode(buf, geometry)
+        self.assertEqual(25, decoded['brightness'])
+        self.assertEqual([(8, 8, 1, 1, bitmaps[0])],
+                         [(m['speed'], m['mode'], m['blink'], m['ants'], m['bitmap']) for m in decoded['messages']])
+
+    def test_round_trip_brightness(self):
+        for brightness, expected in ((1, 25), (25, 25), (26, 50), (60, 75), (80, 100), (100, 100)):
+            buf = testee.encode(self.bitmaps[:1], (1,), (0,), (0,), (0,), brightness, self.test_date)
+            self.assertEqual(expected, testee.decode(buf)['brightness'])
+
+    def test_decode_invalid(self):
+        buf = testee.encode(self.bitmaps, (1,), (0,), (0,), (0,), 100, self.test_date)
+        with self.assertRaises(ValueError):
+            testee.decode(buf[:32])
+        with self.assertRaises(ValueError):
+            testee.decode(b'gnaw' + bytes(buf[4:]))
+        with self.assertRaises(ValueError):
+            testee.decode(buf[:64 + 11])
+        buf[38:44] = bytes(6)
+        self.assertIsNone(testee.decode(buf)['date'])
+
+    def test_date_default_is_call_time(self):
+        mock_datetime = Mock()
+        mock_datetime.now.return_value = datetime.datetime(2031, 1, 2, 3, 4, 5)
+        # Patch the globals of the testee, as other tests may have reloaded the module in the meantime.
+        with patch.dict(testee.encode_header_into.__globals__, {'datetime': mock_datetime}):
+            buf = LedNameBadge.header((6,), (4,), (4,), (0,), (0,))
+        self.assertEqual([31, 1, 2, 3, 4, 5], buf[38:44])
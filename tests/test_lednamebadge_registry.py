@@ -0,0 +1,123 @@
+import sys
+import threading
+from io import StringIO
+from unittest import TestCase
+from unittest.mock import patch
+
+import abstract_write_method_test
+from abstract_write_method_test import FakeWriteMethod
+from lednamebadge import DeviceRegistry, WriteMethodRegistry, LedNameBadge
+
+
+class TestDeviceRegistry(TestCase):
+    def test_concurrent(self):
+        barrier = threading.Barrier(2)
+        a = FakeWriteMethod('a', {'1': 'One'})
+        b = FakeWriteMethod('b', {})
+        a.enumeration_barrier = b.enumeration_barrier = barrier  # both have to be enumerating at the same time
+        self.assertEqual({'a': {'1': 'One'}, 'b': {}}, DeviceRegistry([a, b]).enumerate())
+        self.assertEqual({'a': {'1': 'One'}, 'b': {}}, DeviceRegistry([a, b]).enumerate())
+        self.assertFalse(barrier.broken)
+        self.assertEqual((1, 1), (a.own_enumerations, b.own_enumerations))
+        b.get_available_devices()
+        self.assertFalse(b.is_device_present())
+        self.assertEqual(1, b.own_enumerations)
+
+    def test_error(self):
+        a = FakeWriteMethod('a', {'1': 'One'})
+        b = FakeWriteMethod('b', {})
+        b.enumeration_error = SystemExit(1)
+        with self.assertRaises(SystemExit):
+            DeviceRegistry([a, b]).enumerate()
+
+
+class TestEnumeration(abstract_write_method_test.AbstractWriteMethodTest):
+    def test_write_enumerates_once(self):
+        for method in ('auto', 'hidapi', 'libusb'):
+            with self.subTest(method=method):
+                _, output, mocks = self.prepare_modules(True, True, True, lambda m: m.write(bytearray(64), method))
+                self.assertEqual(0 if method == 'libusb' else 1, mocks['pyhidapi'].hid_enumerate.call_count)
+                self.assertEqual(0 if method == 'hidapi' else 1, mocks['usb'].core.find.call_count)
+
+    def test_no_device_enumerates_once(self):
+        def func(m):
+            with self.assertRaises(SystemExit):
+                m.write(bytearray(64), 'auto')
+            return sys.modules['pyhidapi'].hid_enumerate.call_count, sys.modules['usb'].core.find.call_count
+
+        counts, output, mocks = self.prepare_modules(True, True, False, func)
+        self.assertIn('device is not available', output)
+        self.assertEqual((1, 1), counts)
+
+    def test_list_without_side_effects(self):
+        device_ids, output, mocks = self.prepare_modules(True, True, True,
+                                                         lambda m: m.get_available_device_ids('libusb'))
+        self.assertEqual(['3:4:2'], list(device_ids.keys()))
+        device = mocks['usb'].core.find.return_value[0]
+        device.set_configuration.assert_not_called()
+        device.detach_kernel_driver.assert_not_called()
+        device.reset.assert_not_called()
+
+
+class FakeEntryPoint:
+    def __init__(self, name, value):
+        self.name = name
+        self.value = value
+        self.loaded = 0
+
+    def load(self):
+        self.loaded += 1
+        return lambda: FakeWriteMethod(self.name, {'x': 'Plugged in'})
+
+
+class TestWriteMethodRegistry(TestCase):
+    def setUp(self):
+        self.methods_patch = patch.dict(WriteMethodRegistry._methods)
+        self.methods_patch.start()
+        self.entry_point = FakeEntryPoint('plugin', 'badge_plugin.write:WritePlugin')
+        self.entry_points_patch = patch.object(WriteMethodRegistry, '_entry_points', {'plugin': self.entry_point})
+        self.entry_points_patch.start()
+
+    def tearDown(self):
+        self.entry_points_patch.stop()
+        self.methods_patch.stop()
+
+    def test_builtin(self):
+        self.assertEqual(['hidapi', 'libusb', 'hidraw'],
+                         [m.get_name() for m in WriteMethodRegistry.create_auto_order()])
+
+    def test_register(self):
+        WriteMethodRegistry.register('fake', lambda: FakeWriteMethod('fake', {'1': 'One'}))
+        self.assertEqual('fake', WriteMethodRegistry.create_auto_order()[-1].get_name())
+        self.assertEqual(('Fake fake', True), LedNameBadge.get_available_methods()['fake'])
+        self.assertEqual({'1': 'One'}, LedNameBadge.get_available_device_ids('fake'))
+        WriteMethodRegistry.register('manual', lambda: FakeWriteMethod('manual', {}), auto_order=False)
+        self.assertNotIn('manual', [m.get_name() for m in WriteMethodRegistry.create_auto_order()])
+
+    def test_entry_point(self):
+        with patch('sys.stdout', new_callable=StringIO) as stdout:
+            with self.assertRaises(SystemExit):
+                LedNameBadge._find_write_method('list', 'auto')
+        self.assertIn("'plugin': provided by badge_plugin.write:WritePlugin", stdout.getvalue())
+        self.assertEqual(0, self.entry_point.loaded)
+        self.assertNotIn('plugin', LedNameBadge.get_available_methods())
+
+        with patch('sys.stdout', new_callable=StringIO) as stdout:
+            method = LedNameBadge._find_write_method('plugin', 'auto')
+        self.assertEqual('plugin', method.get_name())
+        self.assertEqual(1, self.entry_point.loaded)
+        self.assertEqual({'x': 'Plugged in'}, LedNameBadge.get_available_device_ids('plugin'))
+        self.assertEqual(1, self.entry_point.loaded)
+        self.assertIsNone(WriteMethodRegistry.create('nothing'))
+
+
+class TestLazyLoading(abstract_write_method_test.AbstractWriteMethodTest):
+    def test_import(self):
+        _, output, mocks = self.prepare_modules(True, True, True, lambda m: None)
+        self.assertNotIn('detected', output)
+        mocks['pyhidapi'].hid_init.assert_not_called()
+
+    def test_load_selected_only(self):
+        _, output, mocks = self.prepare_modules(True, True, True, lambda m: m.write(bytearray(64), 'hidapi'))
+        self.assertIn('pyhidapi detected', output)
+        self.assertNotIn('usb.core detected', output)
@@ -1,3 +1,4 @@
+import sys
 from unittest.mock import patch
 
 import abstract_write_method_test
@@ -157,7 +158,14 @@ class Test(abstract_write_method_test.AbstractWriteMethodTest):
         self.print_test_conditions(pyusb_available, pyhidapi_available, device_available, method, device_id)
         method_obj, output, _ = self.prepare_modules(pyusb_available, pyhidapi_available, device_available,
                                                   lambda m: m._find_write_method(method, device_id))
-        self.assertEqual(pyusb_available, 'usb.core detected' in output)
-        self.assertEqual(pyhidapi_available, 'pyhidapi detected' in output)
+        # The modules are loaded on first use, so they are reported only if available and needed
+        if not pyusb_available:
+            self.assertNotIn('usb.core detected', output)
+        if not pyhidapi_available:
+            self.assertNotIn('pyhidapi detected', output)
+        if method in ('auto', 'libusb') and pyusb_available and not sys.platform.startswith('darwin'):
+            self.assertIn('usb.core detected', output)
+        if method in ('auto', 'hidapi') and pyhidapi_available and sys.version_info[0] >= 3:
+            self.assertIn('pyhidapi detected', output)
         return method_obj, output
 
@@ -0,0 +1,85 @@
+import sys
+from array import array
+from unittest.mock import patch
+
+import abstract_write_method_test
+
+
+class Test(abstract_write_method_test.AbstractWriteMethodTest):
+    def test_libusb(self):
+        _, output, mocks = self.call_session('libusb', 3)
+        device = mocks['usb'].core.find.return_value[0]
+        endpoint = mocks['usb'].util.find_descriptor.return_value[0]
+        self.assertEqual(1, mocks['usb'].core.find.call_count)
+        self.assertEqual(3, endpoint.write.call_count)
+        self.assertEqual(1, output.count("device initialized"))
+        device.reset.assert_not_called()
+        mocks['usb'].util.dispose_resources.assert_called_once_with(device)
+
+    def test_libusb_configuration(self):
+        _, output, mocks = self.call_session('libusb', 3)
+        device = mocks['usb'].core.find.return_value[0]
+        # only before the first write
+        device.set_configuration.assert_called_once()
+
+    def test_libusb_reset(self):
+        _, output, mocks = self.call_session('libusb', 2, reset_on_close=True)
+        mocks['usb'].core.find.return_value[0].reset.assert_called_once()
+
+    def test_hidapi(self):
+        _, output, mocks = self.call_session('hidapi', 3)
+        mocks['pyhidapi'].hid_open_path.assert_called_once()
+        self.assertEqual(3, mocks['pyhidapi'].hid_write.call_count)
+        mocks['pyhidapi'].hid_close.assert_called_once()
+
+    def test_reopen(self):
+        def func(session):
+            session.write(array('B', [1, 2, 3]))
+            session.close()
+            session.write(array('B', [1, 2, 3]))
+            session.close()
+
+        _, output, mocks = self.call_session('hidapi', 0, func=func)
+        self.assertEqual(2, mocks['pyhidapi'].hid_open_path.call_count)
+        self.assertEqual(2, mocks['pyhidapi'].hid_close.call_count)
+
+    def test_no_device(self):
+        def func(m):
+            with self.assertRaises(SystemExit):
+                sys.modules['lednamebadge'].BadgeSession('hidapi').open()
+            return True
+
+        result, output, mocks = self.prepare_modules(True, True, False, func)
+        self.assertTrue(result)
+
+    def test_not_one_device(self):
+        def func(m):
+            lednamebadge = sys.modules['lednamebadge']
+            for method, device_id in (('list', 'auto'), ('hidapi', 'list'), ('hidapi', 'all')):
+                with self.assertRaises(IOError):
+                    lednamebadge.BadgeSession(method, device_id).open()
+            with patch.object(lednamebadge.LedNameBadge, '_find_write_method', return_value=None):
+                with self.assertRaises(IOError):
+                    lednamebadge.BadgeSession('hidapi').open()
+            return True
+
+        result, output, mocks = self.prepare_modules(True, True, True, func)
+        self.assertTrue(result)
+
+
+    # -------------------------------------------------------------------------
+
+
+    def call_session(self, method, writes, reset_on_close=False, func=None):
+        def session_func(m):
+            session = sys.modules['lednamebadge'].BadgeSession(method, reset_on_close=reset_on_close)
+            if func:
+                func(session)
+            else:
+                with session:
+                    for i in range(writes):
+                        session.write(array('B', [1, 2, 3]))
+            return session
+
+        self.print_test_conditions(True, True, True, method, 'auto')
+        return self.prepare_modules(True, True, True, session_func)
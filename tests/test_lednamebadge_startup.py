@@ -0,0 +1,24 @@
+import os
+import subprocess
+import sys
+from unittest import TestCase
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+
+class Test(TestCase):
+    def imported_modules(self, code, *modules):
+        script = "import sys\n%s\nprint(','.join([m for m in %r if m in sys.modules]))" % (code, modules)
+        output = subprocess.check_output([sys.executable, '-c', script], cwd=ROOT, universal_newlines=True)
+        return [m for m in output.strip().split(',') if m]
+
+    def test_import(self):
+        # Only needed for the command line, caches or writing to a device
+        self.assertEqual([], self.imported_modules("import lednamebadge",
+                                                   'argparse', 'hashlib', 'json', 'usb', 'pyhidapi', 'PIL', 'numpy'))
+
+    def test_render(self):
+        self.assertEqual([], self.imported_modules(
+            "import lednamebadge\n"
+            "lednamebadge.BadgeProtocol.encode([lednamebadge.SimpleTextAndIcons().bitmap('Hi :HEART2:')], [4], [0], [0], [0])",
+            'argparse', 'hashlib', 'json', 'usb', 'pyhidapi', 'PIL', 'numpy'))
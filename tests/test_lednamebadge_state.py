@@ -0,0 +1,129 @@
+import os
+import threading
+from array import array
+from datetime import datetime
+from unittest.mock import patch
+
+import abstract_write_method_test
+import lednamebadge
+from abstract_write_method_test import FakeWriteMethod
+from lednamebadge import WriteMethod, LedNameBadge, BadgeProtocol, ContentStateStore, DeviceQueue, \
+    SimpleTextAndIcons
+
+
+def encode(text, date):
+    bitmap = SimpleTextAndIcons().bitmap(text)
+    return array('B', BadgeProtocol.encode([bitmap], [4], [0], [0], [0], date=date))
+
+
+class Test(abstract_write_method_test.FakeWriteMethodTest):
+    def setUp(self):
+        super().setUp()
+        self.store = ContentStateStore(self.directory)
+        for name in ('state_store', 'default_state_store'):
+            store_patch = patch.object(WriteMethod, name, self.store)
+            store_patch.start()
+            self.addCleanup(store_patch.stop)
+
+    def written(self):
+        return [w[0] for w in FakeWriteMethod.written]
+
+    def test_digest(self):
+        digest = ContentStateStore.digest(encode("Hello", datetime(2026, 1, 2, 3, 4, 5)))
+        self.assertEqual(digest, ContentStateStore.digest(encode("Hello", datetime(2027, 6, 7, 8, 9, 10))))
+        self.assertNotEqual(digest, ContentStateStore.digest(encode("Hallo", datetime(2026, 1, 2, 3, 4, 5))))
+
+    def test_skip_unchanged(self):
+        LedNameBadge.write(encode("Hello", datetime(2026, 1, 2)), 'fake')
+        LedNameBadge.write(encode("Hello", datetime(2026, 1, 3)), 'fake')
+        self.assertEqual(['a'], self.written())
+        self.assertIn("Unchanged since the last upload, nothing written (skipped 1 times, 128 bytes in total).",
+                      self.stdout.getvalue())
+        LedNameBadge.write(encode("Hello", datetime(2026, 1, 3)), 'fake', force=True)
+        LedNameBadge.write(encode("Hello", datetime(2026, 1, 3)), 'fake', 'b')
+        LedNameBadge.write(encode("Hallo", datetime(2026, 1, 3)), 'fake')
+        self.assertEqual(['a', 'a', 'b', 'a'], self.written())
+        stats = self.store.get_stats()
+        self.assertEqual(['fake-a', 'fake-b'], list(stats.keys()))
+        self.assertEqual((3, 384, 1, 128), tuple([stats['fake-a'][k] for k in (
+            'written', 'bytes_written', 'skipped', 'bytes_skipped')]))
+
+    def test_failed_write(self):
+        buf = encode("Hello", None)
+        LedNameBadge.write(array('B', buf), 'fake')
+        FakeWriteMethod.failing = {'a': 'write'}
+        with self.assertRaises(IOError):
+            LedNameBadge.write(encode("Hallo", None), 'fake')
+        FakeWriteMethod.failing = {}
+        # The device may show anything after an interrupted upload
+        LedNameBadge.write(array('B', buf), 'fake')
+        self.assertEqual(['a', 'a'], self.written())
+
+    def test_all(self):
+        LedNameBadge.write(encode("Hello", None), 'fake', 'b')
+        results = LedNameBadge.write(encode("Hello", None), 'fake', 'all')
+        self.assertEqual([False, True], [r['skipped'] for r in results])
+        self.assertTrue(all([r['ok'] for r in results]))
+        self.assertEqual(['b', 'a'], self.written())
+        self.assertIn("fake 'b': unchanged, skipped", self.stdout.getvalue())
+
+    def test_all_synchronized(self):
+        LedNameBadge.write(encode("Hello", None), 'fake', 'b')
+        results = LedNameBadge.write(encode("Hello", None), 'fake', 'all', synchronized=True)
+        self.assertEqual([False, False], [r['skipped'] for r in results])  # 'b' too, to start together with 'a'
+        self.assertEqual(['a', 'b'], sorted(self.written()[1:]))
+        results = LedNameBadge.write(encode("Hello", None), 'fake', 'all', synchronized=True)
+        self.assertEqual([True, True], [r['skipped'] for r in results])
+        self.assertEqual(3, len(self.written()))
+
+    def test_disabled(self):
+        with patch.object(WriteMethod, 'state_store', None):
+            LedNameBadge.write(encode("Hello", None), 'fake')
+            LedNameBadge.write(encode("Hello", None), 'fake')
+        self.assertEqual(['a', 'a'], self.written())
+        self.assertEqual((2, 0), (self.store.get('fake-a')['written'], self.store.get('fake-a')['skipped']))
+
+    def test_written_by_others(self):
+        LedNameBadge.write(encode("Hello", None), 'fake')  # e.g. by the command line
+        with patch.object(WriteMethod, 'state_store', None):
+            LedNameBadge.write(encode("Hallo", None), 'fake')  # e.g. by the GUI, not skipping
+        LedNameBadge.write(encode("Hello", None), 'fake')
+        self.assertEqual(['a', 'a', 'a'], self.written())
+
+    def test_default_directory(self):
+        with patch.dict(os.environ, {'XDG_CACHE_HOME': self.directory}):
+            store = ContentStateStore()
+        self.assertEqual(os.path.join(self.directory, 'lednamebadge', 'state'), store.directory)
+        store.put('fake-a', 'digest', 64)
+        self.assertTrue(store.is_unchanged('fake-a', 'digest'))
+        self.assertEqual(0, os.stat(store.directory).st_mode & 0o002)  # not writable by other users
+
+    def test_write_file_atomically(self):
+        path = os.path.join(self.directory, 'sub', 'file.json')
+        self.assertTrue(lednamebadge._write_file_atomically(path, b'1'))
+        self.assertTrue(lednamebadge._write_file_atomically(path, b'2'))
+        with open(path, 'rb') as f:
+            self.assertEqual(b'2', f.read())
+        self.assertEqual(['file.json'], os.listdir(os.path.dirname(path)))  # no temporary files left
+        self.assertFalse(lednamebadge._write_file_atomically(os.path.join(path, 'x'), b'3'))
+        self.assertEqual('usb-3-4_dev_hidraw1', lednamebadge._safe_name('usb-3-4/dev/hidraw1'))
+
+    def test_queue(self):
+        queue = DeviceQueue('fake', 'a')
+        try:
+            states = [queue.put(encode("Hello", None)).wait(5) for i in range(2)]
+            states.append(queue.put(encode("Hello", None), force=True).wait(5))
+            self.assertEqual(['written', 'unchanged', 'written'], states)
+            stats = queue.get_stats()
+            self.assertEqual((2, 1), (stats['written'], stats['skipped']))
+        finally:
+            queue.close()
+
+    def test_concurrent(self):
+        threads = [threading.Thread(target=LedNameBadge.write, args=(encode("Hello", None), 'fake')) for i in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(5)
+        self.assertEqual(['a'], self.written())
+        self.assertEqual(3, self.store.get('fake-a')['skipped'])
@@ -0,0 +1,72 @@
+from array import array
+from unittest import TestCase
+
+from lednamebadge import WriteMethod
+
+
+class FakeWriteMethod(WriteMethod):
+    def __init__(self, report_id=None, results=()):
+        WriteMethod.__init__(self)
+        self.report_id = report_id
+        self.results = list(results)
+        self.packets = []
+        self.packet_objects = []
+
+    def close(self):
+        pass
+
+    def _send_packet(self, packet):
+        self.packets.append(bytes(packet))
+        self.packet_objects.append(id(packet))
+        if self.results:
+            return self.results.pop(0)
+        return len(packet)
+
+
+class Test(TestCase):
+    def setUp(self):
+        self.buf = array('B', range(256)) * 2
+
+    def test_chunks(self):
+        method = FakeWriteMethod()
+        method._write_chunks(self.buf)
+        self.assertEqual([self.buf[i:i + 64].tobytes() for i in range(0, 512, 64)], method.packets)
+        self.buf.append(1)  # all views released
+
+    def test_report_id(self):
+        method = FakeWriteMethod(report_id=0)
+        method._write_chunks(self.buf)
+        self.assertEqual([b'\0' + self.buf[i:i + 64].tobytes() for i in range(0, 512, 64)], method.packets)
+        self.assertEqual(1, len(set(method.packet_objects)))
+
+    def test_bytearray(self):
+        method = FakeWriteMethod(report_id=0)
+        method._write_chunks(bytearray(self.buf.tobytes()))
+        self.assertEqual(8, len(method.packets))
+
+    def test_unknown_count(self):
+        method = FakeWriteMethod(results=[None] * 8)
+        method._write_chunks(self.buf)
+        self.assertEqual(8, len(method.packets))
+
+    def test_short_write(self):
+        method = FakeWriteMethod(results=[64, 10, 54])
+        method._write_chunks(self.buf[:192])
+        self.assertEqual([self.buf[0:64].tobytes(), self.buf[64:128].tobytes(), self.buf[74:128].tobytes(),
+                          self.buf[128:192].tobytes()], method.packets)
+
+    def test_short_write_report(self):
+        method = FakeWriteMethod(report_id=0, results=[65, 10])
+        method._write_chunks(self.buf[:192])
+        self.assertEqual([b'\0' + self.buf[i:i + 64].tobytes() for i in (0, 64, 64, 128)], method.packets)
+
+    def test_errors(self):
+        with self.assertRaises(IOError):
+            FakeWriteMethod(report_id=0, results=[65, -1])._write_chunks(self.buf)
+        with self.assertRaises(IOError):
+            FakeWriteMethod(report_id=0, results=[10] * 4)._write_chunks(self.buf)
+        with self.assertRaises(IOError):
+            FakeWriteMethod(results=[0] * 4)._write_chunks(self.buf)
+        method = FakeWriteMethod(results=[0, 0, 64])
+        method._write_chunks(self.buf[:64])
+        self.assertEqual(3, len(method.packets))
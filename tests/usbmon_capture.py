@@ -0,0 +1,179 @@
+"""Reads the Wireshark text exports of usbmon captures in ../doc/, e.g. doc/ABCDE.txt, and extracts the data, which
+the vendor software has sent to the badge.
+
+The exports contain one block per USB packet. Each block ends with a hex dump of the packet: the usbmon header of
+64 bytes (offsets 0x0000..0x0030) followed by the transferred data (offsets 0x0040..). Some of the dumps have been
+annotated by hand, so lines of the hex dump may be split in two (the continuation keeps its column) and there may
+be comment lines in between. Only submitted interrupt transfers to the device (URB_SUBMIT, URB_INTERRUPT out) with
+data are taken into account. Plain hex dumps of the bitmaps, like doc/hex.txt, are read by read_hex_dump().
+"""
+import os
+import re
+
+DOC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'doc')
+
+_block_start = re.compile(r'^No\.\s+Time', re.MULTILINE)
+_hex_line = re.compile(r'^([0-9a-f]{4})  ((?:[0-9a-f]{2} ?){1,16})')
+_continuation_line = re.compile(r'^( +)((?:[0-9a-f]{2} ?){1,16})')
+_usbmon_header_size = 64
+_hex_column = 6
+
+
+def read_packets(filename):
+    """Returns a list of bytes objects, one per packet sent to the device, in the order of the capture."""
+    with open(filename, encoding='utf-8', errors='replace') as f:
+        text = f.read()
+    packets = []
+    for block in _block_start.split(text):
+        if "URB_SUBMIT" not in block or "URB_INTERRUPT" not in block or "Direction: OUT" not in block:
+            continue
+        data = _parse_hex_dump(block)
+        if len(data) > _usbmon_header_size:
+            packets.append(bytes(data[_usbmon_header_size:]))
+    return packets
+
+
+def read_transfer(filename):
+    """Returns the data of all packets sent to the device, concatenated, i.e. header and bitmaps."""
+    return b''.join(read_packets(filename))
+
+
+def _parse_hex_dump(block):
+    data = bytearray()
+    pending = 0
+    for line in block.splitlines():
+        m = _hex_line.match(line)
+        if m:
+            offset = int(m.group(1), 16)
+            if offset != len(data):
+                raise ValueError("Unexpected offset %04x in hex dump, expected %04x" % (offset, len(data)))
+            values = bytes.fromhex(m.group(2))
+            pending = 16 - len(values)
+            data.extend(values)
+            continue
+        m = _continuation_line.match(line)
+        if m and pending and len(m.group(1)) == _hex_column + 3 * (16 - pending):
+            values = bytes.fromhex(m.group(2))[:pending]
+            pending -= len(values)
+            data.extend(values)
+    return data
+
+
+def list_captures():
+    """Returns the names of all capture files in ../doc/ containing data sent to the device."""
+    names = []
+    for name in sorted(os.listdir(DOC_DIR)):
+        if name.endswith('.txt') and read_packets(os.path.join(DOC_DIR, name)):
+            names.append(name)
+    return names
+
+
+# The captures in ../doc/ with what has been entered into the vendor software:
+# (file, messages, speeds, modes, blinks, ants, brightness), with the settings of all 8 slots, even the empty ones.
+GOLDEN_CAPTURES = [
+    ('ABCDE.txt', ["ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz", "0987654321^°!\"§$%&/()=?`´ß\\}][{",
+                   "@€~µ|<>,;.:-_#'+*"], (5,), (0,), (0,), (0,), 100),
+    ('blink_speed1.txt', ["Hoy!"], (1, 4, 4, 4, 4, 4, 4, 4), (4, 0, 0, 0, 0, 0, 0, 0), (1, 0), (0,), 100),
+    ('dot-dot-pipe_-komma.txt', ["...|_,,,", "", "55555", "7777777"], (5,), (0, 6, 7, 8, 0, 4, 6, 7), (0,), (0,),
+     100),
+    ('dot-dot.txt', [".."], (5,), (0, 6, 7, 8, 0, 4, 6, 7), (0,), (0,), 100),
+    ('percent.txt', ["%"], (5,), (0, 6, 7, 8, 0, 4, 6, 7), (0,), (0,), 100),
+]
+
+# The chars, for which the capture does not show what lednamebadge shall send, with the bytes the vendor software
+# has sent instead and why. Their byte-columns are skipped, when comparing with lednamebadge, but the captured bytes
+# are checked to be exactly these, see test_lednamebadge_golden.py.
+_lowercase_descender = ("The vendor font draws the bowl of g, p, q and y one row higher than the other lowercase "
+                        "letters (e.g. a, o, u start in row 4). The builtin font keeps the common x-height and has "
+                        "the bowl one row shorter instead, so the letters of a word line up. The font is kept, this "
+                        "is not an encoding error.")
+_vendor_substitute = ("The vendor software has no glyph for this char and sends a glyph of its own instead, so the "
+                      "capture does not show what was typed (see doc/alphabet.txt).")
+VENDOR_GLYPHS = {
+    'g': (bytes.fromhex("00 00 00 76 cc cc cc 7c 0c cc 78"), _lowercase_descender),
+    'p': (bytes.fromhex("00 00 00 dc 66 66 66 7c 60 60 f0"), _lowercase_descender),
+    'q': (bytes.fromhex("00 00 00 7c cc cc cc 7c 0c 0c 1e"), _lowercase_descender),
+    'y': (bytes.fromhex("00 00 00 c6 c6 c6 c6 7e 06 0c f8"), _lowercase_descender),
+    '°': (bytes.fromhex("00 00 00 00 00 40 3c 00 00 00 00"), _vendor_substitute + " Here: a tiny asiatic glyph."),
+    '§': (bytes.fromhex("00 00 00 00 7c 04 14 18 10 10 20"), _vendor_substitute + " Here: a small asiatic glyph."),
+    '´': (bytes.fromhex("00 00 00 7c 10 10 10 10 10 10 7c"), _vendor_substitute + " Here: a small I."),
+    'ß': (bytes.fromhex("00 10 28 28 10 00 00 00 00 00 00"), _vendor_substitute + " Here: the degree sign."),
+    '€': (bytes.fromhex("00 00 00 00 00 00 c0 c0 00 00 00"), _vendor_substitute + " Here: a dot at the left."),
+    'µ': (bytes.fromhex("08 08 7c 08 08 18 18 28 28 48 18"), _vendor_substitute + " Here: a tall asiatic glyph."),
+}
+
+# The hex dumps in ../doc/ of the bitmaps only, with the capture they have been taken from. The dump continues with
+# the stale padding of the last packet.
+HEX_DUMPS = [('hex.txt', 'ABCDE.txt')]
+
+_dump_line = re.compile(r'^ ?((?:[0-9a-f]{2} ?){1,16})$')
+
+
+def read_hex_dump(filename):
+    """Returns the data of a plain hex dump like doc/hex.txt: lines of up to 16 hex bytes without offsets."""
+    data = bytearray()
+    with open(filename) as f:
+        for line in f:
+            m = _dump_line.match(line.rstrip('\n'))
+            if m:
+                data.extend(bytes.fromhex(m.group(1)))
+    return bytes(data)
+
+
+def get_capture(filename):
+    """Returns the entry of GOLDEN_CAPTURES for the given capture file."""
+    return [c for c in GOLDEN_CAPTURES if c[0] == filename][0]
+
+
+def renderable_messages(capture):
+    """Returns the messages of the given entry of GOLDEN_CAPTURES with the VENDOR_GLYPHS replaced by blanks."""
+    return [''.join([' ' if ch in VENDOR_GLYPHS else ch for ch in msg]) for msg in capture[1]]
+
+
+def vendor_glyph_positions(capture, offset=0):
+    """Yields a tuple of (char, position in the data) for each of the VENDOR_GLYPHS in the messages of the given entry
+    of GOLDEN_CAPTURES, with the bitmaps starting at offset."""
+    pos = offset
+    for msg in capture[1]:
+        for ch in msg:
+            if ch in VENDOR_GLYPHS:
+                yield ch, pos
+            pos += 11
+
+
+def _mask_vendor_glyphs(capture, expected, actual, offset):
+    """Zeroes the byte-columns of the VENDOR_GLYPHS in both and returns the end of the bitmaps."""
+    for ch, pos in vendor_glyph_positions(capture, offset):
+        expected[pos:pos + 11] = bytes(11)
+        actual[pos:pos + 11] = bytes(11)
+    return offset + sum([len(msg) for msg in capture[1]]) * 11
+
+
+def encode_golden(capture, creator=None):
+    """Encodes the messages of the given entry of GOLDEN_CAPTURES like lednamebadge does and returns a tuple of the
+    data captured and the data encoded, both as bytearray. The byte-columns of the VENDOR_GLYPHS are zeroed in
+    both. The date of the capture is taken over, as it is not set by all versions of the vendor software. The
+    padding after the bitmaps is cut off, as the vendor software fills it with stale data.
+    """
+    from lednamebadge import SimpleTextAndIcons, BadgeProtocol, LedNameBadge
+    filename, messages, speeds, modes, blinks, ants, brightness = capture
+    creator = creator or SimpleTextAndIcons()
+    expected = bytearray(read_transfer(os.path.join(DOC_DIR, filename)))
+    bitmaps = [creator.bitmap_text(msg) for msg in renderable_messages(capture)]
+    actual = BadgeProtocol.encode(bitmaps, speeds, modes, blinks, ants, brightness)
+    actual[38:44] = expected[38:44]
+    end = _mask_vendor_glyphs(capture, expected, actual, LedNameBadge.header_size)
+    return expected[:end], actual[:end]
+
+
+def render_hex_dump(hex_dump, creator=None):
+    """Renders the messages of the capture of the given entry of HEX_DUMPS and returns a tuple of the bitmap data
+    dumped and rendered, both as bytearray, like encode_golden(), but without header.
+    """
+    from lednamebadge import SimpleTextAndIcons
+    creator = creator or SimpleTextAndIcons()
+    capture = get_capture(hex_dump[1])
+    expected = bytearray(read_hex_dump(os.path.join(DOC_DIR, hex_dump[0])))
+    actual = bytearray(b''.join([bytes(creator.bitmap_text(msg)[0]) for msg in renderable_messages(capture)]))
+    end = _mask_vendor_glyphs(capture, expected, actual, 0)
+    return expected[:end], actual[:end]